@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+"""Compare the numba and numpy implementations of akro's batch kernels.
+
+Run with `python benchmarks/bench_kernels.py`. numba must be installed for
+the comparison to be meaningful.
+"""
+import collections
+import timeit
+
+import numpy as np
+
+import akro
+from akro import kernels
+
+
+def _cases():
+    """Return the operations to benchmark.
+
+    Returns:
+        collections.OrderedDict: Callables, keyed by a description.
+
+    """
+    batch = 100000
+    disc = akro.Discrete(64)
+    indices = np.random.randint(disc.n, size=batch)
+    one_hots = disc.flatten_n(indices)
+    box = akro.Box(-1., 1., (32, ))
+    boxes = np.random.uniform(-1., 1., (batch, 32)).astype(np.float32)
+    low, high = box.bounds
+    mul = np.full(32, 127.5, dtype=np.float32)
+    add = np.full(32, 127.5, dtype=np.float32)
+    tup = akro.Tuple((disc, box))
+    tuples = list(zip(indices[:10000], boxes[:10000]))
+    return collections.OrderedDict([
+        ('Discrete.flatten_n', lambda: disc.flatten_n(indices)),
+        ('Discrete.unflatten_n', lambda: disc.unflatten_n(one_hots)),
+        ('in_bounds', lambda: kernels.in_bounds(boxes, low, high)),
+        ('scale', lambda: kernels.scale(boxes, mul, add)),
+        ('Tuple.flatten_n', lambda: tup.flatten_n(tuples)),
+    ])
+
+
+def main():
+    """Print the time taken by each operation with and without numba."""
+    if not akro.numba:
+        print('numba is not installed; only timing numpy.')
+    print('{:<24}{:>12}{:>12}'.format('operation', 'numpy (ms)',
+                                      'numba (ms)'))
+    for name, func in _cases().items():
+        times = []
+        for jit in (False, True):
+            kernels.set_jit_enabled(jit)
+            func()  # Compile the kernel before timing it.
+            times.append(min(timeit.repeat(func, number=10, repeat=3)) * 100)
+        print('{:<24}{:>12.3f}{:>12.3f}'.format(name, *times))
+
+
+if __name__ == '__main__':
+    main()
@@ -6,11 +6,12 @@ from setuptools import setup
 required = [
     # Please keep alphabetized
     'gym>=0.12.4',
-    'numpy',
+    'numpy>=1.17',
 ]
 
 # Framework-specific dependencies
 extras = {
+    'numba': ['numba'],
     'tf': ['tensorflow<2.0'],
     'theano': ['theano'],
 }
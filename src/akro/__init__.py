@@ -1,5 +1,9 @@
 """A library containing types of Spaces."""
+import collections
+import weakref
+
 import gym.spaces
+import numpy as np
 
 try:
     import tensorflow as tf
@@ -11,39 +15,135 @@ try:
 except ImportError:  # pragma: no cover
     theano = False
 
+try:
+    import numba
+except ImportError:  # pragma: no cover
+    numba = False
+
+from akro.batch import Batched
 from akro.box import Box
+from akro.collector import BatchCollector
 from akro.dict import Dict
 from akro.discrete import Discrete
 from akro.image import Image
+from akro.multi_binary import MultiBinary
+from akro.multi_discrete import MultiDiscrete
+from akro.normalizer import RunningNormalizer
+from akro.replay import ReplayBuffer
 from akro.space import Space
 from akro.tuple import Tuple
 
 
-def from_gym(space, is_image=False):
+# Spaces converted with intern=True, keyed by the fingerprint of the input.
+_INTERNED = weakref.WeakValueDictionary()
+
+
+def from_gym(space, is_image=False, intern=False):
     """Convert a gym.space to an akro.space.
 
     Args:
         space(:obj:`gym.Space`): The Space object to convert.
         is_image(boolean): True if input is an image, False otherwise.
             This is False by default.
+        intern(boolean): If True, equivalent inputs are converted to the
+            same akro.Space object, as long as that object is still
+            referenced somewhere. Subspaces of a Dict or Tuple are interned
+            as well. Interned spaces are shared, so they must not be
+            modified: the bounds of an interned Box are read-only, and
+            `spawn` should be used to get independent random streams.
+            Spaces which already are an akro.Space are never interned.
 
     Returns:
         akro.Space: The gym.Space object converted to an
-            akro.Space object.
+            akro.Space object. If space already is an akro.Space, it is
+            returned unchanged.
+
+    """
+    if not intern or (isinstance(space, Space) and not is_image):
+        return _convert(space, is_image, intern)
+    key = _fingerprint(space, is_image)
+    converted = _INTERNED.get(key)
+    if converted is None:
+        converted = _convert(space, is_image, intern)
+        _INTERNED[key] = converted
+    return converted
+
+
+def _convert(space, is_image, intern):
+    """Convert a gym.space to an akro.space.
+
+    Args:
+        space(:obj:`gym.Space`): The Space object to convert.
+        is_image(boolean): True if input is an image, False otherwise.
+        intern(boolean): Whether to intern the converted subspaces, and to
+            make the bounds of a converted Box read-only.
+
+    Returns:
+        akro.Space: The gym.Space object converted to an akro.Space object.
 
     """
+    if isinstance(space, Space) and not is_image:
+        return space
     if isinstance(space, gym.spaces.Box):
         if is_image:
             assert (space.low == 0).all() and (space.high == 255).all(), \
                 'Low and high values must be 0 and 255 for an Image'
-            return Image(space.shape)
-        return Box(low=space.low, high=space.high)
+            converted = Image(space.shape)
+        else:
+            converted = Box(low=space.low, high=space.high)
+        if intern:
+            converted.low.flags.writeable = False
+            converted.high.flags.writeable = False
+        return converted
     elif isinstance(space, gym.spaces.Dict):
-        return Dict(space.spaces)
+        return Dict(
+            collections.OrderedDict([(key, from_gym(s, intern=intern))
+                                     for key, s in space.spaces.items()]))
     elif isinstance(space, gym.spaces.Discrete):
         return Discrete(space.n)
+    elif isinstance(space, gym.spaces.MultiDiscrete):
+        return MultiDiscrete(space.nvec, dtype=space.dtype)
+    elif isinstance(space, gym.spaces.MultiBinary):
+        return MultiBinary(space.n)
+    elif isinstance(space, gym.spaces.Tuple):
+        return Tuple([from_gym(s, intern=intern) for s in space.spaces])
+    else:  # pragma: no cover
+        raise TypeError
+
+
+def _fingerprint(space, is_image=False):
+    """Return a key identifying the structure of a gym.space.
+
+    Two spaces with the same fingerprint are converted to equivalent
+    akro.Spaces by `from_gym`.
+
+    Args:
+        space(:obj:`gym.Space`): The Space object to identify.
+        is_image(boolean): True if space is converted to an Image.
+
+    Returns:
+        tuple: A hashable fingerprint of space.
+
+    """
+    # The akro.tuple module shadows the tuple builtin in this namespace.
+    if isinstance(space, gym.spaces.Box):
+        return (type(space).__name__, is_image, space.shape,
+                np.dtype(space.dtype).str, space.low.tobytes(),
+                space.high.tobytes())
+    elif isinstance(space, gym.spaces.Dict):
+        return (type(space).__name__,
+                (*[(key, _fingerprint(s))
+                   for key, s in space.spaces.items()], ))
+    elif isinstance(space, gym.spaces.Discrete):
+        return (type(space).__name__, int(space.n))
+    elif isinstance(space, gym.spaces.MultiDiscrete):
+        return (type(space).__name__, space.nvec.shape,
+                np.dtype(space.dtype).str, space.nvec.tobytes())
+    elif isinstance(space, gym.spaces.MultiBinary):
+        return (type(space).__name__, space.shape)
     elif isinstance(space, gym.spaces.Tuple):
-        return Tuple(list(map(from_gym, space.spaces)))
+        return (type(space).__name__,
+                (*[_fingerprint(s) for s in space.spaces], ))
     else:  # pragma: no cover
         raise TypeError
 
@@ -64,6 +164,8 @@ def concat(first, second):
 
 
 __all__ = [
-    'Space', 'Box', 'Dict', 'Discrete', 'Image', 'Tuple', 'from_gym', 'tf',
-    'theano', 'concat'
+    'Space', 'Batched', 'Box', 'Dict', 'Discrete', 'Image', 'MultiBinary',
+    'MultiDiscrete', 'Tuple',
+    'BatchCollector', 'ReplayBuffer', 'RunningNormalizer', 'from_gym', 'tf',
+    'theano', 'numba', 'concat'
 ]
@@ -0,0 +1,346 @@
+"""A Space of fixed-size batches of samples of another Space."""
+import numpy as np
+
+from akro import kernels
+from akro import schema
+from akro.box import Box
+from akro.discrete import Discrete
+from akro.requires import requires_tf, requires_theano
+from akro.space import Space
+
+
+class Batched(Space):
+    """Batches of n samples of a space, e.g. from n parallel environments.
+
+    A sample of this space is a batched structure of n samples of the
+    wrapped space (see `akro.schema`): an array with n rows for a Box or
+    Discrete, an OrderedDict of batches for a Dict and a tuple of batches
+    for a Tuple. Whole batches are sampled, checked, flattened and
+    unflattened with a single call, and the flattened batch always has the
+    shape `flat_shape`.
+
+    Example usage:
+        obs_space = env.observation_space.batched(num_envs)
+        flat_obs = obs_space.flatten(obs)  # Shape (num_envs, flat_dim).
+
+    Args:
+        space (akro.Space): Space of each sample of a batch.
+        n (int): Number of samples in a batch.
+
+    """
+
+    def __init__(self, space, n):
+        if n < 1:
+            raise ValueError('n must be positive')
+        shape = None
+        dtype = None
+        if isinstance(space, Box):
+            shape = (n, ) + space.shape
+            dtype = space.dtype
+        elif isinstance(space, Discrete):
+            shape = (n, )
+            dtype = np.int64
+        super().__init__(shape=shape, dtype=dtype)
+        self.space = space
+        self.n = n
+        self._leaves = [leaf for _, leaf in schema.leaves(space)]
+        self._leaf_offsets = np.concatenate(
+            [[0], np.cumsum([leaf.flat_dim
+                             for leaf in self._leaves])]).astype(int)
+
+    @property
+    def flat_dim(self):
+        """int: Length of the flattened vector of each sample of a batch."""
+        return self.space.flat_dim
+
+    @property
+    def flat_shape(self):
+        """tuple: Shape of a flattened batch."""
+        return (self.n, self.space.flat_dim)
+
+    @property
+    def flat_dtype(self):
+        """np.dtype: dtype of the flattened batches."""
+        return self.space.flat_dtype
+
+    def empty_flat(self, n, dtype=None, alignment=64, order='C'):
+        """Allocate an uninitialized array for n flattened batches.
+
+        Args:
+            n (int): Number of batches.
+            dtype (np.dtype): dtype of the array. If None, `flat_dtype` is
+                used.
+            alignment (int): Alignment of the first element in bytes, see
+                `akro.kernels.empty_aligned`.
+            order (str): 'C' for a row-major array, 'F' for a column-major
+                one.
+
+        Returns:
+            np.ndarray: An array of shape `(n, ) + flat_shape`.
+
+        """
+        if dtype is None:
+            dtype = self.flat_dtype
+        return kernels.empty_aligned((n, ) + self.flat_shape,
+                                     dtype=dtype,
+                                     alignment=alignment,
+                                     order=order)
+
+    def leaf_nbytes(self, kind='sample'):
+        """Return the number of bytes needed to store each leaf of a batch.
+
+        Args:
+            kind (str): Representation of the batch, see `Space.nbytes`.
+
+        Returns:
+            collections.OrderedDict: The number of bytes per batch of each
+                leaf, by path (see `akro.schema.leaves`).
+
+        """
+        sizes = self.space.leaf_nbytes(kind)
+        for path in sizes:
+            sizes[path] *= self.n
+        return sizes
+
+    @property
+    def rng(self):
+        """np.random.Generator: Generator of the wrapped space."""
+        return self.space.rng
+
+    def set_rng(self, seed=None):
+        """Give the wrapped space its own random number generator.
+
+        Args:
+            seed (int or np.random.SeedSequence or np.random.Generator): Seed
+                of the generator, or the generator itself. If None, fresh
+                entropy is used.
+
+        Returns:
+            np.random.Generator: The generator of the wrapped space.
+
+        """
+        return self.space.set_rng(seed)
+
+    def sample(self):
+        """Randomly sample a batch.
+
+        Returns:
+            object: A batch of n samples of the wrapped space.
+
+        """
+        return self.space.sample_n(self.n)
+
+    def contains(self, x):
+        """Return whether x is a batch of n samples of the wrapped space.
+
+        Args:
+            x (object): A batched structure.
+
+        Returns:
+            bool: True if every sample of x belongs to the wrapped space.
+
+        """
+        if not schema.is_batch(self.space, x):
+            return False
+        for leaf, values in zip(self._leaves,
+                                schema.leaf_values(self.space, x)):
+            if len(values) != self.n or not _contains_n(leaf, values).all():
+                return False
+        return True
+
+    def flatten(self, x, out=None):
+        """Flatten a batch.
+
+        Args:
+            x (object): A batched structure of n samples.
+            out (np.ndarray): Optional array of shape `flat_shape` to write
+                the flattened samples to.
+
+        Returns:
+            np.ndarray: The flattened samples, with shape `flat_shape`, or
+                out if it is given.
+
+        Raises:
+            ValueError: If x doesn't hold n samples.
+
+        """
+        flat = self.space.flatten_batch(x, out=out)
+        if flat.shape != self.flat_shape:
+            raise ValueError('Expected a batch of {} samples, got {}'.format(
+                self.n, len(flat)))
+        return flat
+
+    def unflatten(self, x):
+        """Unflatten a flattened batch.
+
+        Args:
+            x (np.ndarray): Flattened samples, with shape `flat_shape`.
+
+        Returns:
+            object: A batched structure of the n samples.
+
+        Raises:
+            ValueError: If x doesn't have shape `flat_shape`.
+
+        """
+        x = np.asarray(x)
+        if x.shape != self.flat_shape:
+            raise ValueError('Expected shape {}, got {}'.format(
+                self.flat_shape, x.shape))
+        values = [
+            leaf.unflatten_n(block) for leaf, block in zip(
+                self._leaves, kernels.gather(x, self._leaf_offsets))
+        ]
+        return schema.from_leaf_values(self.space, values)
+
+    def flatten_n(self, xs, out=None):
+        """Flatten several batches.
+
+        Args:
+            xs (:obj:`Iterable`): Batched structures of n samples each.
+            out (np.ndarray): Optional array of shape
+                `(len(xs), ) + flat_shape` to write the flattened batches to,
+                e.g. one allocated by `empty_flat`.
+
+        Returns:
+            np.ndarray: The flattened batches, stacked in the first
+                dimension, or out if it is given.
+
+        """
+        if out is not None:
+            for i, x in enumerate(xs):
+                self.flatten(x, out=out[i])
+            return out
+        flat = [self.flatten(x) for x in xs]
+        if not flat:
+            return np.zeros((0, ) + self.flat_shape)
+        return np.stack(flat)
+
+    def unflatten_n(self, xs):
+        """Unflatten several flattened batches.
+
+        Args:
+            xs (:obj:`Iterable`): Flattened batches.
+
+        Returns:
+            list: A batched structure per flattened batch.
+
+        """
+        return [self.unflatten(x) for x in xs]
+
+    def concat(self, other):
+        """Concatenate with another Batched space of the same batch size.
+
+        Args:
+            other (Batched): A space to be concatenated with this space.
+
+        Returns:
+            Batched: Batches of the concatenation of the wrapped spaces.
+
+        """
+        assert isinstance(other, Batched) and other.n == self.n
+        return Batched(self.space.concat(other.space), self.n)
+
+    def _init_args(self):
+        """Return the arguments of the constructor rebuilding the space.
+
+        Returns:
+            tuple: Positional arguments of the constructor.
+
+        """
+        return (self.space, self.n)
+
+    def __repr__(self):
+        """Return a string representation of the space.
+
+        Returns:
+            str: A representation of the wrapped space and the batch size.
+
+        """
+        return 'Batched({!r}, {})'.format(self.space, self.n)
+
+    def __eq__(self, other):
+        """Compare with another space.
+
+        Args:
+            other (object): The object to compare with.
+
+        Returns:
+            bool: True if other batches equal spaces with the same size.
+
+        """
+        return (isinstance(other, Batched) and self.n == other.n
+                and self.space == other.space)
+
+    def __hash__(self):
+        """Hash the space.
+
+        Not every space is hashable, so only the flat dimension of the
+        wrapped space is hashed, along with the batch size.
+
+        Returns:
+            int: A hash of the space.
+
+        """
+        return hash((self.space.flat_dim, self.n))
+
+    @requires_tf
+    def to_tf_placeholder(self, name, batch_dims):
+        """Create a tensor placeholder from the Space object.
+
+        The batch of the space becomes the last batch dimension, with an
+        unknown size.
+
+        Args:
+            name (str): name of the variable
+            batch_dims (:obj:`list`): batch dimensions to add to the
+                shape of the object.
+
+        Returns:
+            tf.Tensor: Tensor object of the wrapped space, with one more
+                batch dimension.
+
+        """
+        return self.space.to_tf_placeholder(name, batch_dims + 1)
+
+    @requires_theano
+    def to_theano_tensor(self, name, batch_dims):
+        """Create a theano tensor from the Space object.
+
+        The batch of the space becomes the last batch dimension, with an
+        unknown size.
+
+        Args:
+            name (str): name of the variable
+            batch_dims (:obj:`list`): batch dimensions to add to the
+                shape of the object.
+
+        Returns:
+            theano.tensor.TensorVariable: Tensor object of the wrapped
+                space, with one more batch dimension.
+
+        """
+        return self.space.to_theano_tensor(name, batch_dims + 1)
+
+
+def _contains_n(space, xs):
+    """Check which samples of a batch belong to a leaf space.
+
+    Args:
+        space (akro.Space): A leaf space.
+        xs (np.ndarray): A batch of samples of space.
+
+    Returns:
+        np.ndarray: A 1-D boolean array, one entry per sample.
+
+    """
+    if isinstance(space, Box):
+        if (xs.shape[1:] != space.shape
+                or not np.can_cast(xs.dtype, space.dtype)):
+            return np.zeros(len(xs), dtype=bool)
+        return kernels.in_bounds(xs, space.low, space.high)
+    elif isinstance(space, Discrete):
+        if xs.dtype.kind not in 'iu':
+            return np.zeros(len(xs), dtype=bool)
+        return (xs >= 0) & (xs < space.n)
+    return np.array([space.contains(x) for x in xs], dtype=bool)
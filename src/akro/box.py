@@ -2,8 +2,10 @@
 import gym.spaces
 import numpy as np
 
+from akro import kernels
 from akro import tf, theano
-from akro.requires import requires_tf, requires_theano
+from akro.requires import (cache_tf_placeholder, requires_tf,
+                           requires_theano)
 from akro.space import Space
 
 
@@ -18,11 +20,75 @@ class Box(gym.spaces.Box, Space):
         """Return the length of the flattened vector of the space."""
         return np.prod(self.low.shape)
 
+    @property
+    def flat_dtype(self):
+        """np.dtype: dtype of the flattened samples of the space."""
+        return np.dtype(self.dtype)
+
+    @property
+    def compact_dtype(self):
+        """np.dtype: dtype of the most compact encoding of a sample.
+
+        Floating point samples with finite bounds are encoded by `quantize`
+        into uint8. Other samples are stored in their own dtype.
+        """
+        if (self.dtype.kind == 'f' and np.isfinite(self.low).all()
+                and np.isfinite(self.high).all()):
+            return np.dtype(np.uint8)
+        return np.dtype(self.dtype)
+
     @property
     def bounds(self):
         """Return a 2-tuple containing the lower and upper bounds."""
         return self.low, self.high
 
+    def sample(self):
+        """Randomly sample an element of the space, using `rng`.
+
+        Dimensions bounded on both sides are sampled uniformly, dimensions
+        bounded on one side from a shifted exponential distribution and
+        unbounded dimensions from a normal distribution.
+
+        Returns:
+            np.ndarray: A sample of the space.
+
+        """
+        return self.sample_n(1)[0]
+
+    def sample_n(self, n):
+        """Randomly sample n elements of the space at once, using `rng`.
+
+        See `sample`.
+
+        Args:
+            n (int): Number of samples.
+
+        Returns:
+            np.ndarray: The samples, with shape (n, ) + self.shape.
+
+        """
+        rng = self.rng
+        shape = (n, ) + self.shape
+        low = np.broadcast_to(self.low, shape)
+        high = self.high
+        if self.dtype.kind != 'f':
+            high = high.astype(np.int64) + 1
+        high = np.broadcast_to(high, shape)
+        bounded_below = np.isfinite(low)
+        bounded_above = np.isfinite(high)
+        sample = np.empty(shape)
+        unbounded = ~bounded_below & ~bounded_above
+        sample[unbounded] = rng.normal(size=unbounded.sum())
+        lower = bounded_below & ~bounded_above
+        sample[lower] = rng.exponential(size=lower.sum()) + low[lower]
+        upper = ~bounded_below & bounded_above
+        sample[upper] = high[upper] - rng.exponential(size=upper.sum())
+        bounded = bounded_below & bounded_above
+        sample[bounded] = rng.uniform(low[bounded], high[bounded])
+        if self.dtype.kind != 'f':
+            sample = np.floor(sample)
+        return sample.astype(self.dtype)
+
     def flatten(self, x):
         """Return a flattened observation x.
 
@@ -33,6 +99,9 @@ class Box(gym.spaces.Box, Space):
             np.ndarray: An array of x collapsed into one dimension.
 
         """
+        xp = kernels.array_namespace(x)
+        if xp is not None:
+            return xp.reshape(x, (-1, ))
         return np.asarray(x).flatten()
 
     def unflatten(self, x):
@@ -45,20 +114,30 @@ class Box(gym.spaces.Box, Space):
             np.ndarray: An array of x in the shape of self.shape.
 
         """
+        xp = kernels.array_namespace(x)
+        if xp is not None:
+            return xp.reshape(x, self.shape)
         return np.asarray(x).reshape(self.shape)
 
-    def flatten_n(self, obs):
+    def flatten_n(self, obs, out=None):
         """Return flattened observations obs.
 
         Args:
             obs (:obj:`Iterable`): The object to reshape and flatten
+            out (np.ndarray): Optional array of shape (len(obs), flat_dim) to
+                write the flattened observations to, e.g. one allocated by
+                `empty_flat`.
 
         Returns:
             np.ndarray: An array of obs in a shape inferred by the size of
-                its first element.
+                its first element, or out if it is given.
 
         """
-        return np.asarray(obs).reshape((len(obs), -1))
+        obs = kernels.as_batch(obs)
+        xp = kernels.array_namespace(obs)
+        if xp is not None:
+            return kernels.copy_to(out, xp.reshape(obs, (obs.shape[0], -1)))
+        return kernels.copy_to(out, np.asarray(obs).reshape((len(obs), -1)))
 
     def unflatten_n(self, obs):
         """Return unflattened observation of obs.
@@ -71,8 +150,134 @@ class Box(gym.spaces.Box, Space):
                 its first element and self.shape.
 
         """
+        xp = kernels.array_namespace(obs)
+        if xp is not None:
+            return xp.reshape(obs, (obs.shape[0], ) + self.shape)
         return np.asarray(obs).reshape((len(obs), ) + self.shape)
 
+    def quantize(self, x, dtype=np.uint8, out=None):
+        """Encode a sample, or a batch of samples, in a compact dtype.
+
+        With an unsigned integer dtype, every dimension is mapped linearly
+        from its bounds onto the full range of the dtype, so the bounds must
+        be finite. With np.float16, values are simply cast. See
+        `quantization_error` for the error introduced by each dtype.
+
+        Args:
+            x (:obj:`Iterable`): A sample of shape self.shape, or a batch of
+                shape (B, ) + self.shape.
+            dtype (np.dtype): np.uint8, np.uint16 or np.float16.
+            out (np.ndarray): Optional array of the shape of x and of type
+                dtype to write to.
+
+        Returns:
+            np.ndarray: The encoded values.
+
+        """
+        x = np.asarray(x)
+        dtype = np.dtype(dtype)
+        if out is None:
+            out = np.empty(x.shape, dtype=dtype)
+        if dtype == np.float16:
+            out[...] = x
+            return out
+        _, _, inverse, inverse_offset = self._quantization(dtype)
+        batch = x.reshape((-1, ) + self.shape)
+        q = kernels.scale(batch, inverse, inverse_offset)
+        np.rint(q, out=q)
+        np.clip(q, 0, np.iinfo(dtype).max, out=q)
+        out[...] = q.reshape(x.shape)
+        return out
+
+    def dequantize(self, q, out=None):
+        """Decode values encoded by `quantize`.
+
+        Args:
+            q (np.ndarray): Encoded sample, or batch of samples.
+            out (np.ndarray): Optional array of the shape of q to write to.
+                By default, a new array of the dtype of the space is
+                allocated, or of np.float64 if the space is not a floating
+                point one.
+
+        Returns:
+            np.ndarray: The decoded values.
+
+        """
+        q = np.asarray(q)
+        if out is None:
+            dtype = self.dtype if self.dtype.kind == 'f' else np.float64
+            out = np.empty(q.shape, dtype=dtype)
+        if q.dtype == np.float16:
+            out[...] = q
+            return out
+        scale, offset, _, _ = self._quantization(q.dtype)
+        batch = q.reshape((-1, ) + self.shape)
+        kernels.scale(batch, scale, offset, out=out.reshape(batch.shape))
+        return out
+
+    def quantization_error(self, dtype=np.uint8):
+        """Return the largest error introduced by quantizing a sample.
+
+        Args:
+            dtype (np.dtype): np.uint8, np.uint16 or np.float16.
+
+        Returns:
+            float: An upper bound on the absolute difference between any
+                value within the bounds and its dequantized encoding.
+
+        """
+        dtype = np.dtype(dtype)
+        if dtype == np.float16:
+            largest = np.max(np.maximum(np.abs(self.low), np.abs(self.high)))
+            if largest > np.finfo(np.float16).max:
+                return np.inf
+            # Half a unit in the last place, or the subnormal spacing.
+            return float(max(largest * 2.**-11, 2.**-25))
+        scale = self._quantization(dtype)[0]
+        return float(np.max(scale) / 2)
+
+    def _quantization(self, dtype):
+        """Return the per-dimension coefficients of an integer encoding.
+
+        The coefficients are computed once per dtype, and cached on the
+        space, so the bounds must not be modified after quantizing.
+
+        Args:
+            dtype (np.dtype): An unsigned integer dtype.
+
+        Returns:
+            tuple: The scale and offset decoding values, and the inverse
+                scale and offset encoding them, each a read-only np.ndarray
+                of self.shape.
+
+        Raises:
+            ValueError: If dtype is not an unsigned integer dtype, or the
+                bounds are not finite.
+
+        """
+        cache = getattr(self, '_quantizations', None)
+        if cache is None:
+            cache = self._quantizations = {}
+        coefficients = cache.get(dtype)
+        if coefficients is not None:
+            return coefficients
+        if dtype.kind != 'u':
+            raise ValueError('Cannot quantize to {}'.format(dtype))
+        low = self.low.astype(np.float64)
+        high = self.high.astype(np.float64)
+        if not (np.isfinite(low).all() and np.isfinite(high).all()):
+            raise ValueError('Quantization requires finite bounds')
+        scale = (high - low) / np.iinfo(dtype).max
+        inverse = np.divide(1.,
+                            scale,
+                            out=np.zeros_like(scale),
+                            where=scale > 0)
+        coefficients = (scale, low, inverse, -low * inverse)
+        for array in coefficients:
+            array.flags.writeable = False
+        cache[dtype] = coefficients
+        return coefficients
+
     def concat(self, other):
         """Concatenate with another Box space.
 
@@ -94,6 +299,22 @@ class Box(gym.spaces.Box, Space):
         return Box(np.concatenate([first_lb, second_lb]),
                    np.concatenate([first_ub, second_ub]))
 
+    def _init_args(self):
+        """Return the arguments of the constructor rebuilding the space.
+
+        Bounds which are the same for every dimension are collapsed to a
+        single value.
+
+        Returns:
+            tuple: Positional arguments of the constructor.
+
+        """
+        low = self.low.reshape(-1)
+        high = self.high.reshape(-1)
+        if low.size and (low == low[0]).all() and (high == high[0]).all():
+            return (low[0], high[0], self.shape, self.dtype)
+        return (self.low, self.high, None, self.dtype)
+
     def __hash__(self):
         """Hash the Box Space.
 
@@ -110,6 +331,42 @@ class Box(gym.spaces.Box, Space):
         return hash((self.low[0][0], self.high[0][0], self.shape))
 
     @requires_tf
+    def tf_flatten(self, x, dtype=None):
+        """Flatten a batch of samples in the TensorFlow graph.
+
+        This is the graph counterpart of `flatten_n`. Samples can be fed in
+        their own dtype, e.g. uint8 images, and are only converted to dtype
+        in the graph.
+
+        Args:
+            x (tf.Tensor): Samples, with shape [batch] + self.shape.
+            dtype (tf.DType): dtype of the flattened tensor. If None,
+                tf.float32 is used.
+
+        Returns:
+            tf.Tensor: The flattened samples, with shape [batch, flat_dim].
+
+        """
+        return tf.cast(tf.reshape(x, [-1, int(self.flat_dim)]),
+                       dtype or tf.float32)
+
+    @requires_tf
+    def tf_unflatten(self, x):
+        """Unflatten a batch of samples in the TensorFlow graph.
+
+        This is the graph counterpart of `unflatten_n`.
+
+        Args:
+            x (tf.Tensor): Flattened samples, with shape [batch, flat_dim].
+
+        Returns:
+            tf.Tensor: The samples, with shape [batch] + self.shape.
+
+        """
+        return tf.reshape(x, [-1] + list(self.shape))
+
+    @requires_tf
+    @cache_tf_placeholder
     def to_tf_placeholder(self, name, batch_dims):
         """Create a tensor placeholder from the Space object.
 
@@ -128,6 +385,43 @@ class Box(gym.spaces.Box, Space):
                                         list(self.shape),
                                         name=name)
 
+    @requires_theano
+    def theano_flatten(self, x, dtype=None):
+        """Flatten a batch of samples symbolically.
+
+        This is the theano counterpart of `flatten_n`. Samples can be passed
+        in their own dtype, e.g. uint8 images, and are only converted to
+        dtype in the compiled function.
+
+        Args:
+            x (theano.tensor.TensorVariable): Samples, with shape
+                [batch] + self.shape.
+            dtype (str): dtype of the flattened variable. If None,
+                theano.config.floatX is used.
+
+        Returns:
+            theano.tensor.TensorVariable: The flattened samples, with shape
+                [batch, flat_dim].
+
+        """
+        return theano.tensor.cast(x.reshape((-1, int(self.flat_dim))),
+                                  dtype or theano.config.floatX)
+
+    @requires_theano
+    def theano_unflatten(self, x):
+        """Unflatten a batch of samples symbolically.
+
+        Args:
+            x (theano.tensor.TensorVariable): Flattened samples, with shape
+                [batch, flat_dim].
+
+        Returns:
+            theano.tensor.TensorVariable: The samples, with shape
+                [batch] + self.shape.
+
+        """
+        return x.reshape((-1, ) + tuple(self.shape))
+
     @requires_theano
     def to_theano_tensor(self, name, batch_dims):
         """Create a theano tensor from the Space object.
@@ -0,0 +1,165 @@
+"""Collect samples from many coroutines into flat batches.
+
+Samples are flattened straight into the next free row of a preallocated
+batch, so batched inference over many asynchronous environments doesn't need
+to stack individually flattened samples afterwards.
+"""
+import asyncio
+import collections
+
+from akro import kernels
+
+
+class BatchCollector:
+    """Packs samples of a Space into flat batches.
+
+    Samples are added one at a time with `add`, typically by many coroutines
+    each driving one environment. A batch is emitted as soon as it is full,
+    or when `timeout` seconds have passed since its first sample was added,
+    whichever comes first. Emitted batches are retrieved by awaiting `get`.
+
+    Every batch is a freshly allocated array which the consumer owns, so it
+    remains valid after later samples are added. Batches are allocated with
+    `Space.empty_flat`, so they are C-contiguous and cache-line aligned.
+
+    Example usage:
+        collector = BatchCollector(env.observation_space, batch_size=32,
+                                   timeout=0.01)
+
+        async def actor(env):
+            obs = env.reset()
+            row = collector.add(obs)
+            ...
+
+        async def learner():
+            batch = await collector.get()
+            ...
+
+    Args:
+        space (akro.Space): Space of the samples.
+        batch_size (int): Number of samples in a full batch.
+        timeout (float): Seconds after the first sample of a batch is added
+            before the batch is emitted, even if it is not full. If None,
+            only full batches are emitted, unless `flush` is called.
+        dtype (np.dtype): dtype of the batches. If None, the dtype of the
+            first flattened sample of each batch is used.
+
+    """
+
+    def __init__(self, space, batch_size, timeout=None, dtype=None):
+        if batch_size < 1:
+            raise ValueError('batch_size must be positive')
+        self._space = space
+        self._batch_size = batch_size
+        self._timeout = timeout
+        self._dtype = dtype
+        self._buffer = None
+        self._size = 0
+        self._timer = None
+        self._ready = collections.deque()
+        self._waiters = collections.deque()
+
+    @property
+    def space(self):
+        """akro.Space: Space of the collected samples."""
+        return self._space
+
+    @property
+    def batch_size(self):
+        """int: Number of samples in a full batch."""
+        return self._batch_size
+
+    @property
+    def pending(self):
+        """int: Number of samples in the batch being filled."""
+        return self._size
+
+    def add(self, sample):
+        """Flatten a sample straight into the next free row of the batch.
+
+        This must be called from the thread running the event loop.
+
+        Args:
+            sample (:obj:`Iterable`): A sample of the space.
+
+        Returns:
+            int: The row of the sample in its batch.
+
+        """
+        row = self._size
+        flat = None
+        if self._buffer is None:
+            # The first sample decides the dtype of the batch.
+            flat = self._space.flatten_n([sample])
+            dtype = flat.dtype if self._dtype is None else self._dtype
+            self._buffer = self._space.empty_flat(self._batch_size,
+                                                  dtype=dtype)
+            if self._timeout is not None:
+                loop = asyncio.get_event_loop()
+                self._timer = loop.call_later(self._timeout, self.flush)
+        out = self._buffer[row:row + 1]
+        if flat is None:
+            flat = self._space.flatten_n([sample], out=out)
+        kernels.copy_to(out, flat)
+        self._size += 1
+        if self._size == self._batch_size:
+            self._emit()
+        return row
+
+    def flush(self):
+        """Emit the current batch, even if it is not full.
+
+        Does nothing if no sample has been added since the last batch.
+
+        """
+        if self._size:
+            self._emit()
+
+    async def get(self):
+        """Wait for the next batch.
+
+        Returns:
+            np.ndarray: A batch of flattened samples of shape
+                (rows, space.flat_dim), where rows is batch_size unless the
+                batch was flushed early.
+
+        """
+        while not self._ready:
+            waiter = asyncio.get_event_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                # Hand the wakeup over to the next waiter, if any.
+                self._wake()
+                raise
+        return self._ready.popleft()
+
+    def get_nowait(self):
+        """Return the next batch if one is ready.
+
+        Returns:
+            np.ndarray: The next batch, or None if no batch is ready.
+
+        """
+        if self._ready:
+            return self._ready.popleft()
+        return None
+
+    def _emit(self):
+        """Move the current batch to the ready batches."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._ready.append(self._buffer[:self._size])
+        self._buffer = None
+        self._size = 0
+        self._wake()
+
+    def _wake(self):
+        """Wake up the first waiter which is still waiting."""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                break
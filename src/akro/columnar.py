@@ -0,0 +1,303 @@
+"""A chunked, columnar on-disk format for samples of a Space.
+
+A dataset is a directory containing `schema.json`, which describes the Space
+of the samples, and one `.npy` file per leaf of the Space (see
+`akro.schema.leaves`). Each `.npy` file holds the values of its leaf for
+every sample, with the samples in the first dimension.
+
+Samples are appended in chunks. Every time a chunk is written, the header of
+each `.npy` file is updated in place, so a dataset can be read while it is
+still being written, and every column can be memory-mapped with
+`np.load(..., mmap_mode='r')`. This allows e.g. loading a single key of a
+Dict without reading the rest of the dataset.
+
+Example usage:
+    space = akro.Dict({'observation': env.observation_space,
+                       'action': env.action_space})
+    with ColumnarWriter('data', space, chunk_size=4096) as writer:
+        for obs, action in trajectory:
+            writer.append({'observation': obs, 'action': action})
+
+    reader = ColumnarReader('data')
+    actions = reader.column('action')
+    for batch in reader.iter_chunks(1024):
+        ...
+"""
+import json
+import os
+
+import numpy as np
+
+from akro import schema
+
+_HEADER_SIZE = 256
+_SCHEMA_FILE = 'schema.json'
+
+
+def _write_header(f, shape, dtype):
+    """Write a fixed-size .npy (version 1.0) header at the start of a file.
+
+    The header is padded to a fixed size, so that it can be rewritten in
+    place when more rows are appended.
+
+    Args:
+        f (file): File opened for binary writing.
+        shape (tuple): Shape of the array stored in the file.
+        dtype (np.dtype): dtype of the array stored in the file.
+
+    """
+    header = repr({
+        'descr': np.lib.format.dtype_to_descr(np.dtype(dtype)),
+        'fortran_order': False,
+        'shape': tuple(shape),
+    })
+    magic = np.lib.format.magic(1, 0)
+    length = _HEADER_SIZE - len(magic) - 2
+    header = header.ljust(length - 1) + '\n'
+    if len(header) != length:
+        raise ValueError('Shape {} is too large for a column'.format(shape))
+    f.seek(0)
+    f.write(magic)
+    f.write(np.uint16(length).tobytes())
+    f.write(header.encode('latin1'))
+
+
+def _column_file(i):
+    """Return the name of the file of the i-th column.
+
+    Args:
+        i (int): Index of the column.
+
+    Returns:
+        str: A file name.
+
+    """
+    return 'column_{}.npy'.format(i)
+
+
+class ColumnarWriter:
+    """Writes samples of a Space to a columnar dataset.
+
+    Samples are buffered in preallocated per-leaf arrays and written once
+    chunk_size samples have been added, or when the writer is flushed or
+    closed.
+
+    Args:
+        path (str): Directory of the dataset. It is created if it does not
+            exist. Existing columns are overwritten.
+        space (akro.Space): Space of the samples.
+        chunk_size (int): Number of samples per chunk.
+
+    """
+
+    def __init__(self, path, space, chunk_size=1024):
+        if chunk_size < 1:
+            raise ValueError('chunk_size must be positive')
+        os.makedirs(path, exist_ok=True)
+        self._space = space
+        self._chunk_size = chunk_size
+        self._leaves = list(schema.leaves(space))
+        self._shapes = [schema.leaf_shape(s) for _, s in self._leaves]
+        self._dtypes = [schema.leaf_dtype(s) for _, s in self._leaves]
+        self._chunk = [
+            np.empty((chunk_size, ) + shape, dtype=dtype)
+            for shape, dtype in zip(self._shapes, self._dtypes)
+        ]
+        self._chunk_rows = 0
+        self._rows = 0
+        with open(os.path.join(path, _SCHEMA_FILE), 'w') as f:
+            json.dump(
+                {
+                    'space': schema.to_schema(space),
+                    'columns': [{
+                        'path': list(leaf_path),
+                        'file': _column_file(i),
+                    } for i, (leaf_path, _) in enumerate(self._leaves)],
+                },
+                f,
+                indent=2)
+        self._files = []
+        for i, (shape, dtype) in enumerate(zip(self._shapes, self._dtypes)):
+            f = open(os.path.join(path, _column_file(i)), 'wb')
+            _write_header(f, (0, ) + shape, dtype)
+            f.flush()
+            self._files.append(f)
+
+    @property
+    def space(self):
+        """akro.Space: Space of the samples."""
+        return self._space
+
+    def __len__(self):
+        """Return the number of samples added, including buffered ones.
+
+        Returns:
+            int: Number of samples.
+
+        """
+        return self._rows + self._chunk_rows
+
+    def append(self, sample):
+        """Add a single sample.
+
+        Args:
+            sample (object): A sample of the space.
+
+        """
+        values = schema.leaf_values(self._space, sample)
+        for buf, value in zip(self._chunk, values):
+            buf[self._chunk_rows] = value
+        self._chunk_rows += 1
+        if self._chunk_rows == self._chunk_size:
+            self.flush()
+
+    def extend(self, batch):
+        """Add a batch of samples.
+
+        Args:
+            batch (object): A batched structure of samples of the space, as
+                described in `akro.schema`.
+
+        """
+        values = [np.asarray(v) for v in schema.leaf_values(self._space,
+                                                            batch)]
+        n = len(values[0])
+        start = 0
+        while start < n:
+            count = min(n - start, self._chunk_size - self._chunk_rows)
+            for buf, value in zip(self._chunk, values):
+                buf[self._chunk_rows:self._chunk_rows + count] = \
+                    value[start:start + count]
+            self._chunk_rows += count
+            start += count
+            if self._chunk_rows == self._chunk_size:
+                self.flush()
+
+    def flush(self):
+        """Write the buffered samples to disk."""
+        if not self._chunk_rows:
+            return
+        self._rows += self._chunk_rows
+        for f, buf, shape, dtype in zip(self._files, self._chunk,
+                                        self._shapes, self._dtypes):
+            f.seek(0, os.SEEK_END)
+            f.write(buf[:self._chunk_rows].tobytes())
+            _write_header(f, (self._rows, ) + shape, dtype)
+            f.flush()
+        self._chunk_rows = 0
+
+    def close(self):
+        """Flush the buffered samples and close the dataset."""
+        self.flush()
+        for f in self._files:
+            f.close()
+        self._files = []
+
+    def __enter__(self):
+        """Enter a context.
+
+        Returns:
+            ColumnarWriter: This writer.
+
+        """
+        return self
+
+    def __exit__(self, *args):
+        """Close the writer when leaving a context.
+
+        Args:
+            args (tuple): Exception information, ignored.
+
+        """
+        self.close()
+
+
+class ColumnarReader:
+    """Reads a columnar dataset.
+
+    Args:
+        path (str): Directory of the dataset.
+
+    """
+
+    def __init__(self, path):
+        self._path = path
+        with open(os.path.join(path, _SCHEMA_FILE)) as f:
+            meta = json.load(f)
+        self._space = schema.from_schema(meta['space'])
+        self._files = [column['file'] for column in meta['columns']]
+        self._paths = [tuple(column['path']) for column in meta['columns']]
+
+    @property
+    def space(self):
+        """akro.Space: Space of the samples."""
+        return self._space
+
+    @property
+    def paths(self):
+        """list[tuple]: Path of the leaf stored in each column."""
+        return list(self._paths)
+
+    def __len__(self):
+        """Return the number of samples written to disk.
+
+        Returns:
+            int: Number of samples.
+
+        """
+        return min([len(self._load(i)) for i in range(len(self._files))])
+
+    def column(self, path=()):
+        """Memory-map the values of a single leaf.
+
+        Args:
+            path (tuple or str or int): Path of the leaf. A single key of a
+                Dict or index of a Tuple may be passed on its own.
+
+        Returns:
+            np.ndarray: A read-only memory-mapped array with the samples in
+                the first dimension.
+
+        Raises:
+            KeyError: If there is no leaf with the given path.
+
+        """
+        if not isinstance(path, tuple):
+            path = (path, )
+        try:
+            i = self._paths.index(path)
+        except ValueError:
+            raise KeyError(path)
+        return self._load(i)
+
+    def iter_chunks(self, chunk_size):
+        """Iterate over the samples in chunks.
+
+        Args:
+            chunk_size (int): Number of samples per chunk. The last chunk
+                may be shorter.
+
+        Yields:
+            object: A batched structure of samples of the space, as
+                described in `akro.schema`.
+
+        """
+        columns = [self._load(i) for i in range(len(self._files))]
+        rows = min([len(c) for c in columns])
+        for start in range(0, rows, chunk_size):
+            yield schema.from_leaf_values(
+                self._space,
+                [np.array(c[start:start + chunk_size]) for c in columns])
+
+    def _load(self, i):
+        """Memory-map the i-th column.
+
+        Args:
+            i (int): Index of the column.
+
+        Returns:
+            np.ndarray: A read-only memory-mapped array.
+
+        """
+        return np.load(os.path.join(self._path, self._files[i]),
+                       mmap_mode='r')
@@ -4,12 +4,17 @@ This Space produces samples which are dicts, where the values of those dicts
 are drawn from the values of this Space.
 """
 import collections
+import collections.abc
 
 import gym.spaces
 import numpy as np
 
 import akro
-from akro.requires import requires_tf, requires_theano
+from akro import kernels
+from akro import schema
+from akro import tf, theano
+from akro.requires import (cache_tf_placeholder, requires_tf,
+                           requires_theano)
 from akro.space import Space
 
 
@@ -32,6 +37,63 @@ class Dict(gym.spaces.Dict, Space):
         """Return the length of the flattened vector of the space."""
         return sum([space.flat_dim for _, space in self.spaces.items()])
 
+    @property
+    def flat_offsets(self):
+        """Return the offsets of each space in a flattened observation.
+
+        Returns:
+            np.ndarray: An array with one more entry than there are spaces.
+                The flattened value of the i-th space spans the indices
+                offsets[i]:offsets[i + 1].
+
+        """
+        dims = [space.flat_dim for space in self.spaces.values()]
+        return np.concatenate([[0], np.cumsum(dims)]).astype(int)
+
+    def sample(self):
+        """Randomly sample an element of the space.
+
+        Each subspace is sampled with its own generator.
+
+        Returns:
+            collections.OrderedDict: A sample of the space.
+
+        """
+        return collections.OrderedDict([(key, space.sample())
+                                        for key, space in self.spaces.items()])
+
+    def sample_n(self, n):
+        """Randomly sample n elements of the space at once.
+
+        Args:
+            n (int): Number of samples.
+
+        Returns:
+            collections.OrderedDict: The samples, as a batched structure
+                (see `stack_n`).
+
+        """
+        return collections.OrderedDict([(key, space.sample_n(n))
+                                        for key, space in self.spaces.items()])
+
+    def set_rng(self, seed=None):
+        """Give the space and its subspaces their own generators.
+
+        Args:
+            seed (int or np.random.SeedSequence or np.random.Generator): Seed
+                of the generator, or the generator itself. If None, fresh
+                entropy is used.
+
+        Returns:
+            np.random.Generator: The generator of the space.
+
+        """
+        rng = super().set_rng(seed)
+        for space, child in zip(self.spaces.values(),
+                                self._spawn_seeds(len(self.spaces))):
+            space.set_rng(child)
+        return rng
+
     def flat_dim_with_keys(self, keys):
         """Return a flat dimension of the spaces specified by the keys.
 
@@ -52,7 +114,7 @@ class Dict(gym.spaces.Dict, Space):
                   Keys are unchanged.
 
         """
-        return np.concatenate(
+        return kernels.concat(
             [space.flatten(x[key]) for key, space in self.spaces.items()],
             axis=-1,
         )
@@ -67,25 +129,58 @@ class Dict(gym.spaces.Dict, Space):
             collections.OrderedDict
 
         """
-        dims = np.array([s.flat_dim for s in self.spaces.values()])
-        flat_x = np.split(x, np.cumsum(dims)[:-1])
+        flat_x = kernels.gather(x, self.flat_offsets)
         return collections.OrderedDict([
             (key, self.spaces[key].unflatten(xi))
             for key, xi in zip(self.spaces.keys(), flat_x)
         ])
 
-    def flatten_n(self, xs):
+    def flatten_n(self, xs, out=None):
         """Return flattened observations xs.
 
         Args:
-            xs (:obj:`Iterable`): The object to reshape and flatten
+            xs (:obj:`Iterable`): The object to reshape and flatten. This may
+                also be a record array (see `to_records`), or a batched
+                structure, which is passed to `flatten_batch`.
+            out (np.ndarray): Optional array of shape (len(xs), flat_dim) to
+                write the flattened observations to, e.g. one allocated by
+                `empty_flat`.
 
         Returns:
             np.ndarray: An array of xs in a shape inferred by the size of
-                its first element.
+                its first element, or out if it is given.
 
         """
-        return np.array([self.flatten(x) for x in xs])
+        if isinstance(xs, np.ndarray) and xs.dtype.names is not None:
+            return schema.flatten_records(self, xs, out=out)
+        if isinstance(xs, collections.abc.Mapping):
+            return self.flatten_batch(xs, out=out)
+        xs = list(xs)
+        if not xs:
+            return kernels.copy_to(out, np.zeros((0, self.flat_dim)))
+        blocks = [
+            space.flatten_n([x[key] for x in xs])
+            for key, space in self.spaces.items()
+        ]
+        return kernels.scatter(blocks, self.flat_offsets, out=out)
+
+    def flatten_batch(self, batch, out=None):
+        """Flatten a batched structure.
+
+        Args:
+            batch (dict): A batched structure of samples (see `stack_n`).
+            out (np.ndarray): Optional array of shape (n, flat_dim) to write
+                the flattened samples to.
+
+        Returns:
+            np.ndarray: The flattened samples, or out if it is given.
+
+        """
+        blocks = [
+            space.flatten_batch(batch[key])
+            for key, space in self.spaces.items()
+        ]
+        return kernels.scatter(blocks, self.flat_offsets, out=out)
 
     def unflatten_n(self, xs):
         """Return unflattened observations xs.
@@ -97,7 +192,114 @@ class Dict(gym.spaces.Dict, Space):
             List[OrderedDict]
 
         """
-        return [self.unflatten(x) for x in xs]
+        blocks = kernels.gather(xs, self.flat_offsets)
+        values = [
+            space.unflatten_n(block)
+            for space, block in zip(self.spaces.values(), blocks)
+        ]
+        return [
+            collections.OrderedDict(zip(self.spaces.keys(), x))
+            for x in zip(*values)
+        ]
+
+    @property
+    def record_dtype(self):
+        """np.dtype: Structured dtype holding one sample per record.
+
+        The fields are named after the keys. Discrete values are stored
+        as int64.
+        """
+        return schema.record_dtype(self)
+
+    def to_records(self, batch):
+        """Copy a batch of samples into a single record array.
+
+        Args:
+            batch (object): A batched structure of samples (see
+                `akro.schema`).
+
+        Returns:
+            np.ndarray: A 1-D array of dtype `record_dtype`, with one record
+                per sample.
+
+        """
+        return schema.to_records(self, batch)
+
+    def from_records(self, records):
+        """Return the batched structure of a record array, without copying.
+
+        Args:
+            records (np.ndarray): An array of dtype `record_dtype`.
+
+        Returns:
+            object: A batched structure (see `akro.schema`) of views of the
+                fields of records.
+
+        """
+        return schema.from_records(self, records)
+
+    def unflatten_view(self, x):
+        """Return a lazy unflattened view of the flat observation x.
+
+        See `DictView`.
+
+        Args:
+            x (np.ndarray): A flattened observation.
+
+        Returns:
+            DictView: A mapping unflattening each key of x when it is read.
+
+        """
+        return DictView(self, x)
+
+    def unflatten_n_view(self, xs):
+        """Return a lazy unflattened view of the flat observations xs.
+
+        See `DictBatchView`.
+
+        Args:
+            xs (np.ndarray): Flattened observations, one per row.
+
+        Returns:
+            DictBatchView: A mapping unflattening the batch of each key of xs
+                when it is read.
+
+        """
+        return DictBatchView(self, xs)
+
+    def _flat_layout(self):
+        """Return the layout of a flattened observation.
+
+        It is computed the first time it is needed, and then shared by every
+        view of the space.
+
+        Returns:
+            tuple: A collections.OrderedDict with the slice of the flattened
+                observation holding each key, and the flat_dim of the space.
+
+        """
+        layout = getattr(self, '_layout', None)
+        if layout is None:
+            offsets = self.flat_offsets
+            slices = collections.OrderedDict([
+                (key, slice(start, stop))
+                for key, start, stop in zip(self.spaces.keys(), offsets[:-1],
+                                            offsets[1:])
+            ])
+            layout = (slices, int(offsets[-1]))
+            self._layout = layout
+        return layout
+
+    def delta_flattener(self):
+        """Create a flattener which only rewrites the keys which changed.
+
+        See `DeltaFlattener`.
+
+        Returns:
+            DeltaFlattener: A flattener for observations of this space.
+
+        """
+        return DeltaFlattener(self)
 
     def flatten_with_keys(self, x, keys):
         """Return flattened obs of spaces specified by the keys using x.
@@ -162,12 +364,69 @@ class Dict(gym.spaces.Dict, Space):
 
         return Dict(spaces)
 
+    def _init_args(self):
+        """Return the arguments of the constructor rebuilding the space.
+
+        The subspaces are already akro spaces, so they are not converted
+        again when the space is rebuilt.
+
+        Returns:
+            tuple: Positional arguments of the constructor.
+
+        """
+        return (collections.OrderedDict(self.spaces), )
+
+    @requires_tf
+    def tf_flatten(self, x, dtype=None):
+        """Flatten a batch of samples in the TensorFlow graph.
+
+        Each key is flattened by its space, so compact values such as
+        Discrete indices or uint8 images can be fed directly. The layout of
+        the result is the same as `flatten_n`, see `flat_offsets`.
+
+        Args:
+            x (dict): A tensor of samples per key, with the batch in the
+                first dimension.
+            dtype (tf.DType): dtype of the flattened tensor. If None,
+                tf.float32 is used.
+
+        Returns:
+            tf.Tensor: The flattened samples, with shape [batch, flat_dim].
+
+        """
+        blocks = [
+            space.tf_flatten(x[key], dtype)
+            for key, space in self.spaces.items()
+        ]
+        return tf.concat(blocks, axis=-1)
+
+    @requires_tf
+    def tf_unflatten(self, x):
+        """Unflatten a batch of samples in the TensorFlow graph.
+
+        Args:
+            x (tf.Tensor): Flattened samples, with shape [batch, flat_dim].
+
+        Returns:
+            collections.OrderedDict: The samples of each key, as tensors.
+
+        """
+        blocks = tf.split(x, np.diff(self.flat_offsets).tolist(), axis=-1)
+        return collections.OrderedDict([
+            (key, space.tf_unflatten(block))
+            for (key, space), block in zip(self.spaces.items(), blocks)
+        ])
+
     @requires_tf
+    @cache_tf_placeholder
     def to_tf_placeholder(self, name, batch_dims):
         """Create a tensor placeholder from the Space object.
 
+        Placeholders are cached per graph, see `cache_tf_placeholder`.
+
         Args:
-            name (str): name of the variable
+            name (str): name of the variable. The placeholder of each key is
+                named name-key.
             batch_dims (:obj:`list`): batch dimensions to add to the
                 shape of the object.
 
@@ -178,9 +437,52 @@ class Dict(gym.spaces.Dict, Space):
         """
         newdict = Dict()
         for key, space in self.spaces.items():
-            newdict.spaces[key] = space.to_tf_placeholder(name, batch_dims)
+            newdict.spaces[key] = space.to_tf_placeholder(
+                '{}-{}'.format(name, key), batch_dims)
         return newdict
 
+    @requires_theano
+    def theano_flatten(self, x, dtype=None):
+        """Flatten a batch of samples symbolically.
+
+        Each key is flattened by its space, so compact values such as
+        Discrete indices or uint8 images can be passed directly to compiled
+        functions. The layout of the result is the same as `flatten_n`.
+
+        Args:
+            x (dict): A variable of samples per key, with the batch in the
+                first dimension.
+            dtype (str): dtype of the flattened variable. If None,
+                theano.config.floatX is used.
+
+        Returns:
+            theano.tensor.TensorVariable: The flattened samples, with shape
+                [batch, flat_dim].
+
+        """
+        blocks = [
+            space.theano_flatten(x[key], dtype)
+            for key, space in self.spaces.items()
+        ]
+        return theano.tensor.concatenate(blocks, axis=1)
+
+    @requires_theano
+    def theano_unflatten(self, x):
+        """Unflatten a batch of samples symbolically.
+
+        Args:
+            x (theano.tensor.TensorVariable): Flattened samples, with shape
+                [batch, flat_dim].
+
+        Returns:
+            collections.OrderedDict: The samples of each key, as variables.
+
+        """
+        return collections.OrderedDict([
+            (key, self.spaces[key].theano_unflatten(x[:, s]))
+            for key, s in self._flat_layout()[0].items()
+        ])
+
     @requires_theano
     def to_theano_tensor(self, name, batch_dims):
         """Create a theano tensor from the Space object.
@@ -200,3 +502,232 @@ class Dict(gym.spaces.Dict, Space):
         for key, space in self.spaces.items():
             newdict.spaces[key] = space.to_theano_tensor(name, batch_dims)
         return newdict
+
+
+class DeltaFlattener:
+    """Flattens observations of a Dict, rewriting only the keys which changed.
+
+    The flattener keeps the flat vector of the previous observation. Each
+    call to `flatten` rewrites the part of that vector belonging to the keys
+    which changed, so the cost of flattening scales with the size of the
+    changed values rather than the size of the whole observation. This helps
+    when large values, such as maps or goal images, rarely change.
+
+    A key is considered changed if it is listed in `changed`, or, if
+    `changed` is not given, if its value is not the same object as the value
+    flattened previously. Values which are modified in place must be listed
+    in `changed`.
+
+    Example usage:
+        flattener = obs_space.delta_flattener()
+        flat = flattener.flatten(obs)
+        obs['position'] = new_position
+        flat = flattener.flatten(obs)  # Only rewrites 'position'.
+
+    Args:
+        space (Dict): Space of the observations.
+
+    """
+
+    def __init__(self, space):
+        self._space = space
+        self._slices, _ = space._flat_layout()
+        self._buffer = None
+        self._previous = {}
+
+    def flatten(self, x, changed=None):
+        """Return the flattened observation x.
+
+        The first call flattens every key.
+
+        Args:
+            x (:obj:`Mapping`): The observation to flatten.
+            changed (:obj:`Iterable`): Keys whose values changed since the
+                previous call. If None, keys whose values are not the same
+                objects as in the previous call are rewritten.
+
+        Returns:
+            np.ndarray: The flattened observation. The same array is
+                returned, and updated, by every call, so copy it to keep it.
+
+        """
+        if self._buffer is None:
+            self._buffer = self._space.flatten(x)
+            self._previous = {key: x[key] for key in self._slices}
+            return self._buffer
+        if changed is None:
+            changed = [
+                key for key in self._slices
+                if x[key] is not self._previous[key]
+            ]
+        for key in changed:
+            self._buffer[self._slices[key]] = self._space.spaces[key].flatten(
+                x[key])
+            self._previous[key] = x[key]
+        return self._buffer
+
+    def reset(self):
+        """Forget the previous observation, so every key is rewritten."""
+        self._buffer = None
+        self._previous = {}
+
+
+class DictView(collections.abc.Mapping):
+    """A lazily unflattened observation of a Dict.
+
+    Each key is only unflattened the first time it is read, from its slice
+    of the flat observation, so reading a few keys of a large observation
+    doesn't pay for unflattening the others. The values of Box subspaces are
+    views of the flat observation rather than copies, and the values of Dict
+    subspaces are nested DictViews.
+
+    Example usage:
+        obs = obs_space.unflatten_view(flat_obs)
+        position = obs['position']  # Other keys are not unflattened.
+
+    Args:
+        space (Dict): Space of the observation.
+        x (np.ndarray): A flattened observation.
+
+    """
+
+    def __init__(self, space, x):
+        x = np.asarray(x)
+        self._slices, flat_dim = space._flat_layout()
+        self._check_shape(flat_dim, x)
+        self._space = space
+        self._flat = x
+        self._values = {}
+
+    @staticmethod
+    def _check_shape(flat_dim, x):
+        """Check that x is a single flattened observation.
+
+        Args:
+            flat_dim (int): flat_dim of the space of the observation.
+            x (np.ndarray): The flattened observation.
+
+        Raises:
+            ValueError: If x doesn't have shape (flat_dim, ).
+
+        """
+        if x.shape != (flat_dim, ):
+            raise ValueError('Expected a flat observation of shape ({}, ), '
+                             'got shape {}. Use unflatten_n_view for '
+                             'batches.'.format(flat_dim, x.shape))
+
+    @property
+    def flat(self):
+        """np.ndarray: The flattened observation."""
+        return self._flat
+
+    def __getitem__(self, key):
+        """Return the unflattened value of a key.
+
+        Args:
+            key (str): The key to read.
+
+        Returns:
+            object: The unflattened value of key.
+
+        """
+        if key not in self._values:
+            self._values[key] = self._unflatten(self._space.spaces[key],
+                                                self._flat[self._slices[key]])
+        return self._values[key]
+
+    def __iter__(self):
+        """Iterate over the keys, in the order of the space.
+
+        Returns:
+            iterator: An iterator over the keys.
+
+        """
+        return iter(self._slices)
+
+    def __len__(self):
+        """Return the number of keys.
+
+        Returns:
+            int: Number of keys.
+
+        """
+        return len(self._slices)
+
+    @staticmethod
+    def _unflatten(space, x):
+        """Unflatten the value of a single key.
+
+        Args:
+            space (akro.Space): Space of the key.
+            x (np.ndarray): The flattened value of the key.
+
+        Returns:
+            object: The unflattened value.
+
+        """
+        if isinstance(space, Dict):
+            return space.unflatten_view(x)
+        return space.unflatten(x)
+
+
+class DictBatchView(DictView):
+    """A lazily unflattened batch of observations of a Dict.
+
+    This is the batched counterpart of `DictView`: each key maps to the batch
+    of its values, as returned by `unflatten_n` of its space, so the view has
+    the layout of a batched structure (see `akro.schema`).
+
+    Args:
+        space (Dict): Space of the observations.
+        xs (np.ndarray): Flattened observations, one per row.
+
+    """
+
+    @staticmethod
+    def _check_shape(flat_dim, x):
+        """Check that x is a batch of flattened observations.
+
+        Args:
+            flat_dim (int): flat_dim of the space of the observations.
+            x (np.ndarray): The flattened observations.
+
+        Raises:
+            ValueError: If x doesn't have shape (B, flat_dim).
+
+        """
+        if x.ndim != 2 or x.shape[1] != flat_dim:
+            raise ValueError('Expected a 2-D array of flat observations of '
+                             'length {}, got shape {}'.format(
+                                 flat_dim, x.shape))
+
+    def __getitem__(self, key):
+        """Return the unflattened batch of a key.
+
+        Args:
+            key (str): The key to read.
+
+        Returns:
+            object: The unflattened values of key.
+
+        """
+        if key not in self._values:
+            self._values[key] = self._unflatten_n(
+                self._space.spaces[key], self._flat[:, self._slices[key]])
+        return self._values[key]
+
+    @staticmethod
+    def _unflatten_n(space, xs):
+        """Unflatten the values of a single key.
+
+        Args:
+            space (akro.Space): Space of the key.
+            xs (np.ndarray): The flattened values of the key.
+
+        Returns:
+            object: The unflattened values.
+
+        """
+        if isinstance(space, Dict):
+            return space.unflatten_n_view(xs)
+        return space.unflatten_n(xs)
@@ -3,14 +3,37 @@
 import gym.spaces
 import numpy as np
 
+from akro import kernels
 from akro import tf, theano
-from akro.requires import requires_tf, requires_theano
+from akro.requires import (cache_tf_placeholder, requires_tf,
+                           requires_theano)
 from akro.space import Space
 
 
 class Discrete(gym.spaces.Discrete, Space):
     """{0,1,...,n-1}."""
 
+    def sample(self):
+        """Randomly sample an element of the space, using `rng`.
+
+        Returns:
+            int: A sample of the space.
+
+        """
+        return int(self.rng.integers(self.n))
+
+    def sample_n(self, n):
+        """Randomly sample n elements of the space at once, using `rng`.
+
+        Args:
+            n (int): Number of samples.
+
+        Returns:
+            np.ndarray: The samples, as an int64 array of shape (n, ).
+
+        """
+        return self.rng.integers(self.n, size=n, dtype=np.int64)
+
     def flatten(self, x):
         """Return a flattened observation x.
 
@@ -21,6 +44,9 @@ class Discrete(gym.spaces.Discrete, Space):
             np.ndarray: An array of x collapsed into one dimension.
 
         """
+        xp = kernels.array_namespace(x)
+        if xp is not None:
+            return kernels.one_hot(xp.reshape(x, (1, )), self.n)[0]
         ret = np.zeros(self.n)
         ret[x] = 1
         return ret
@@ -35,22 +61,26 @@ class Discrete(gym.spaces.Discrete, Space):
             np.ndarray: An array of x in the shape of self.shape.
 
         """
+        xp = kernels.array_namespace(x)
+        if xp is not None:
+            return xp.argmax(x)
         return np.nonzero(x)[0][0]
 
-    def flatten_n(self, xs):
+    def flatten_n(self, xs, out=None):
         """Return flattened observations xs.
 
         Args:
             xs (:obj:`Iterable`): The object to reshape and flatten
+            out (np.ndarray): Optional array of shape (len(xs), flat_dim) to
+                write the flattened observations to, e.g. one allocated by
+                `empty_flat`.
 
         Returns:
             np.ndarray: An array of xs in a shape inferred by the size of
-                its first element.
+                its first element, or out if it is given.
 
         """
-        ret = np.zeros((len(xs), self.n))
-        ret[np.arange(len(xs)), xs] = 1
-        return ret
+        return kernels.one_hot(kernels.as_batch(xs), self.n, out=out)
 
     def unflatten_n(self, xs):
         """Return unflattened observations xs.
@@ -63,13 +93,26 @@ class Discrete(gym.spaces.Discrete, Space):
                 its first element and self.shape.
 
         """
-        return np.nonzero(xs)[1]
+        xp = kernels.array_namespace(xs)
+        if xp is not None:
+            return xp.argmax(xs, axis=1)
+        return kernels.nonzero_columns(xs)
 
     @property
     def flat_dim(self):
         """Return the length of the flattened vector of the space."""
         return self.n
 
+    @property
+    def flat_dtype(self):
+        """np.dtype: dtype of the flattened (one-hot) samples."""
+        return np.dtype(np.float64)
+
+    @property
+    def compact_dtype(self):
+        """np.dtype: Smallest unsigned integer dtype holding a sample."""
+        return np.min_scalar_type(max(self.n - 1, 0))
+
     def weighted_sample(self, weights):
         """Compute a weighted sample of the elements in the Discrete Space.
 
@@ -83,7 +126,171 @@ class Discrete(gym.spaces.Discrete, Space):
         """
         assert len(weights) == self.n
         weights = np.asarray(weights)
-        return np.random.choice(self.n, p=weights / weights.sum())
+        return self.rng.choice(self.n, p=weights / weights.sum())
+
+    def weighted_sample_n(self, weights, size=None):
+        """Compute a batch of weighted samples of the Discrete Space.
+
+        The weights are normalized once and sampled by inverting their
+        cumulative sum, so each sample costs O(log n) when weights is 1-D.
+        To sample many times from the same weights, use
+        `weighted_sampler`.
+
+        Args:
+            weights (:obj:`Iterable`): Non-negative weights of shape (n, ),
+                or (B, n) to sample with different weights per row.
+            size (int or tuple): Number of samples per set of weights. For
+                1-D weights, the default is a single sample. For 2-D weights,
+                the default is one sample per row.
+
+        Returns:
+            int or np.ndarray: A single sample for 1-D weights and no size,
+                samples of shape size for 1-D weights, or (B, ) or (B, size)
+                for 2-D weights.
+
+        """
+        weights = _check_weights(weights, self.n)
+        cdf = np.cumsum(weights, axis=-1)
+        cdf /= cdf[..., -1:]
+        if weights.ndim == 1:
+            u = self.rng.random(size)
+            return np.searchsorted(cdf, u, side='right')
+        if size is None:
+            u = self.rng.random(len(weights))
+            return np.sum(cdf <= u[:, None], axis=-1)
+        u = self.rng.random((len(weights), size))
+        return np.sum(cdf[:, None, :] <= u[..., None], axis=-1)
+
+    def weighted_sampler(self, weights):
+        """Create a sampler which draws weighted samples in O(1) each.
+
+        The sampler draws from the generator of the space.
+
+        Args:
+            weights (:obj:`Iterable`): Non-negative weights of shape (n, ).
+
+        Returns:
+            AliasSampler: A sampler for the given weights.
+
+        """
+        return AliasSampler(_check_weights(weights, self.n, ndim=1),
+                            rng=self.rng)
+
+    def pack_mask(self, mask):
+        """Pack a boolean action mask into bits.
+
+        Args:
+            mask (:obj:`Iterable`): Boolean mask of shape (..., n).
+
+        Returns:
+            np.ndarray: A uint8 array of shape (..., ceil(n / 8)).
+
+        """
+        return np.packbits(self._check_mask(mask), axis=-1)
+
+    def unpack_mask(self, mask):
+        """Unpack an action mask packed by `pack_mask`.
+
+        Args:
+            mask (:obj:`Iterable`): Packed mask of shape (..., ceil(n / 8)).
+
+        Returns:
+            np.ndarray: A boolean array of shape (..., n).
+
+        """
+        return np.unpackbits(np.asarray(mask, dtype=np.uint8),
+                             axis=-1,
+                             count=self.n).astype(bool)
+
+    def sample_masked_n(self, mask, packed=False):
+        """Sample uniformly among the valid elements of each row of a mask.
+
+        Args:
+            mask (:obj:`Iterable`): Boolean mask of shape (B, n) where True
+                marks valid elements, or a mask packed by `pack_mask`.
+            packed (bool): Whether mask was packed by `pack_mask`.
+
+        Returns:
+            np.ndarray: B samples, one per row.
+
+        Raises:
+            ValueError: If a row of the mask has no valid element.
+
+        """
+        mask = self._check_mask(mask, packed, allow_empty_rows=False)
+        keys = self.rng.random(mask.shape)
+        keys[~mask] = -1.
+        return np.argmax(keys, axis=-1)
+
+    def weighted_sample_masked_n(self, weights, mask, packed=False):
+        """Compute weighted samples among the valid elements of a mask.
+
+        Args:
+            weights (:obj:`Iterable`): Non-negative weights of shape (n, ),
+                shared by every row, or (B, n).
+            mask (:obj:`Iterable`): Boolean mask of shape (B, n) where True
+                marks valid elements, or a mask packed by `pack_mask`.
+            packed (bool): Whether mask was packed by `pack_mask`.
+
+        Returns:
+            np.ndarray: B samples, one per row.
+
+        Raises:
+            ValueError: If a row has no valid element with a positive
+                weight.
+
+        """
+        mask = self._check_mask(mask, packed)
+        weights = np.where(mask, np.asarray(weights, dtype=np.float64), 0.)
+        return self.weighted_sample_n(weights)
+
+    def masked_argmax_n(self, logits, mask, packed=False):
+        """Return the valid element with the largest logit in each row.
+
+        Args:
+            logits (:obj:`Iterable`): Logits of shape (B, n).
+            mask (:obj:`Iterable`): Boolean mask of shape (B, n) where True
+                marks valid elements, or a mask packed by `pack_mask`.
+            packed (bool): Whether mask was packed by `pack_mask`.
+
+        Returns:
+            np.ndarray: B elements, one per row.
+
+        Raises:
+            ValueError: If a row of the mask has no valid element.
+
+        """
+        mask = self._check_mask(mask, packed, allow_empty_rows=False)
+        return np.argmax(np.where(mask, logits, -np.inf), axis=-1)
+
+    def _check_mask(self, mask, packed=False, allow_empty_rows=True):
+        """Validate an action mask, unpacking it if needed.
+
+        Args:
+            mask (:obj:`Iterable`): Mask of shape (..., n), whose nonzero
+                elements are valid, or a uint8 mask packed by `pack_mask`.
+            packed (bool): Whether mask was packed by `pack_mask`.
+            allow_empty_rows (bool): Whether rows without any valid element
+                are allowed.
+
+        Returns:
+            np.ndarray: The boolean mask.
+
+        Raises:
+            ValueError: If the mask has the wrong shape, or contains a row
+                without any valid element when those are not allowed.
+
+        """
+        if packed:
+            mask = self.unpack_mask(mask)
+        else:
+            mask = np.asarray(mask).astype(bool, copy=False)
+        if mask.shape[-1] != self.n:
+            raise ValueError('Expected a mask of {} elements, got {}'.format(
+                self.n, mask.shape[-1]))
+        if not allow_empty_rows and not mask.any(axis=-1).all():
+            raise ValueError('Every row of the mask needs a valid element')
+        return mask
 
     def concat(self, other):
         """Concatenate with another space of the same type.
@@ -97,6 +304,15 @@ class Discrete(gym.spaces.Discrete, Space):
         """
         raise NotImplementedError
 
+    def _init_args(self):
+        """Return the arguments of the constructor rebuilding the space.
+
+        Returns:
+            tuple: Positional arguments of the constructor.
+
+        """
+        return (self.n, )
+
     def __hash__(self):
         """Hash the Discrete Space.
 
@@ -107,6 +323,38 @@ class Discrete(gym.spaces.Discrete, Space):
         return hash(self.n)
 
     @requires_tf
+    def tf_flatten(self, x, dtype=None):
+        """One-hot encode a batch of samples in the TensorFlow graph.
+
+        This is the graph counterpart of `flatten_n`, so indices can be fed
+        directly.
+
+        Args:
+            x (tf.Tensor): Integer samples, with shape [batch].
+            dtype (tf.DType): dtype of the flattened tensor. If None,
+                tf.float32 is used.
+
+        Returns:
+            tf.Tensor: The one-hot samples, with shape [batch, n].
+
+        """
+        return tf.one_hot(x, int(self.n), dtype=dtype or tf.float32)
+
+    @requires_tf
+    def tf_unflatten(self, x):
+        """Decode one-hot samples in the TensorFlow graph.
+
+        Args:
+            x (tf.Tensor): One-hot samples, with shape [batch, n].
+
+        Returns:
+            tf.Tensor: The int64 samples, with shape [batch].
+
+        """
+        return tf.argmax(x, axis=-1)
+
+    @requires_tf
+    @cache_tf_placeholder
     def to_tf_placeholder(self, name, batch_dims):
         """Create a tensor placeholder from the Space object.
 
@@ -125,6 +373,42 @@ class Discrete(gym.spaces.Discrete, Space):
                                         [self.flat_dim],
                                         name=name)
 
+    @requires_theano
+    def theano_flatten(self, x, dtype=None):
+        """One-hot encode a batch of samples symbolically.
+
+        This is the theano counterpart of `flatten_n`, so indices can be
+        passed directly to compiled functions.
+
+        Args:
+            x (theano.tensor.TensorVariable): Integer samples, with shape
+                [batch].
+            dtype (str): dtype of the flattened variable. If None,
+                theano.config.floatX is used.
+
+        Returns:
+            theano.tensor.TensorVariable: The one-hot samples, with shape
+                [batch, n].
+
+        """
+        return theano.tensor.extra_ops.to_one_hot(
+            x, int(self.n), dtype=dtype or theano.config.floatX)
+
+    @requires_theano
+    def theano_unflatten(self, x):
+        """Decode one-hot samples symbolically.
+
+        Args:
+            x (theano.tensor.TensorVariable): One-hot samples, with shape
+                [batch, n].
+
+        Returns:
+            theano.tensor.TensorVariable: The int64 samples, with shape
+                [batch].
+
+        """
+        return theano.tensor.argmax(x, axis=-1)
+
     @requires_theano
     def to_theano_tensor(self, name, batch_dims):
         """Create a theano tensor from the Space object.
@@ -142,3 +426,77 @@ class Discrete(gym.spaces.Discrete, Space):
         """
         return theano.tensor.TensorType(self.dtype,
                                         (False, ) * (batch_dims + 1))(name)
+
+
+class AliasSampler:
+    """Draws weighted samples with the alias method.
+
+    Building the sampler costs O(n), after which every sample costs O(1).
+    This is faster than `Discrete.weighted_sample` when the same weights are
+    sampled from many times.
+
+    Args:
+        weights (:obj:`Iterable`): Non-negative weights of each element.
+        rng (np.random.Generator): Generator to draw from. If None, a new
+            generator is seeded with fresh entropy.
+
+    """
+
+    def __init__(self, weights, rng=None):
+        weights = np.asarray(weights, dtype=np.float64)
+        self._prob, self._alias = kernels.alias_table(weights / weights.sum())
+        self._rng = np.random.default_rng() if rng is None else rng
+
+    @property
+    def n(self):
+        """int: Number of elements which can be sampled."""
+        return len(self._prob)
+
+    def sample(self, size=None):
+        """Draw weighted samples.
+
+        Args:
+            size (int or tuple): Shape of the samples. If None, a single
+                sample is returned.
+
+        Returns:
+            int or np.ndarray: The samples.
+
+        """
+        i = self._rng.integers(self.n, size=size)
+        keep = self._rng.random(size) < self._prob[i]
+        ret = np.where(keep, i, self._alias[i])
+        if size is None:
+            return int(ret)
+        return ret
+
+
+def _check_weights(weights, n, ndim=None):
+    """Validate sampling weights.
+
+    Args:
+        weights (:obj:`Iterable`): Weights of each of the n elements.
+        n (int): Number of elements.
+        ndim (int): Required number of dimensions, or None to allow 1 or 2.
+
+    Returns:
+        np.ndarray: The weights, as a float64 array.
+
+    Raises:
+        ValueError: If the weights have the wrong shape, are negative or all
+            zero.
+
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    allowed = (1, 2) if ndim is None else (ndim, )
+    if weights.ndim not in allowed:
+        raise ValueError('Weights must have {} dimension(s), not {}'.format(
+            ' or '.join(map(str, allowed)), weights.ndim))
+    if weights.shape[-1] != n:
+        raise ValueError('Expected {} weights, got {}'.format(
+            n, weights.shape[-1]))
+    if (weights < 0).any():
+        raise ValueError('Weights must be non-negative')
+    if (weights.sum(axis=-1) <= 0).any():
+        raise ValueError('Weights must not all be zero')
+    return weights
@@ -20,6 +20,15 @@ class Image(Box):
         assert len(shape) <= 3, 'Images must have at most three dimensions'
         super(Box, self).__init__(low=0, high=255, shape=shape, dtype=np.uint8)
 
+    def _init_args(self):
+        """Return the arguments of the constructor rebuilding the space.
+
+        Returns:
+            tuple: Positional arguments of the constructor.
+
+        """
+        return (self.shape, )
+
     def concat(self, other):
         """Concatenate with another Image space.
 
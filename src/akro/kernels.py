@@ -0,0 +1,550 @@
+"""Kernels used by the batch conversions of Spaces.
+
+Each kernel has a pure numpy (or Python) implementation. When numba is
+installed, the kernels which are loops in disguise (one-hot encoding and
+decoding, bounds checking, scaling and building alias tables) are
+JIT-compiled instead. Both implementations produce identical results, so
+numba is only ever an optional speedup.
+
+Arrays from other libraries implementing the Python array API standard
+(arrays with an `__array_namespace__` method, other than numpy arrays) are
+handled with the functions of their own namespace, see `array_namespace`,
+so they are never converted to numpy.
+
+Flattened batches can be written to preallocated arrays, such as the
+cache-line-aligned arrays allocated by `empty_aligned`, so they can be passed
+to BLAS or SIMD code without being copied again.
+"""
+import numpy as np
+
+from akro import numba
+
+
+def _one_hot_loop(xs, out):
+    """Set out[i, xs[i]] to 1 for every row i.
+
+    Args:
+        xs (np.ndarray): 1-D integer indices.
+        out (np.ndarray): Zeroed 2-D array of shape (len(xs), n).
+
+    Returns:
+        int: The position of the first out-of-bounds index, or -1.
+
+    """
+    n = out.shape[1]
+    for i in range(xs.shape[0]):
+        x = xs[i]
+        if x < 0 or x >= n:
+            return i
+        out[i, x] = 1
+    return -1
+
+
+def _nonzero_columns_loop(xs):
+    """Return the column of every nonzero entry of xs in row-major order.
+
+    Args:
+        xs (np.ndarray): A 2-D array.
+
+    Returns:
+        np.ndarray: 1-D int64 array of column indices.
+
+    """
+    count = 0
+    for i in range(xs.shape[0]):
+        for j in range(xs.shape[1]):
+            if xs[i, j] != 0:
+                count += 1
+    ret = np.empty(count, dtype=np.int64)
+    k = 0
+    for i in range(xs.shape[0]):
+        for j in range(xs.shape[1]):
+            if xs[i, j] != 0:
+                ret[k] = j
+                k += 1
+    return ret
+
+
+def _in_bounds_loop(xs, low, high, out):
+    """Set out[i] to whether every element of row i lies in [low, high].
+
+    Args:
+        xs (np.ndarray): A 2-D array.
+        low (np.ndarray): 1-D lower bounds, one per column.
+        high (np.ndarray): 1-D upper bounds, one per column.
+        out (np.ndarray): 1-D boolean array of length len(xs).
+
+    """
+    for i in range(xs.shape[0]):
+        out[i] = True
+        for j in range(xs.shape[1]):
+            if not low[j] <= xs[i, j] <= high[j]:
+                out[i] = False
+                break
+
+
+def _scale_loop(xs, mul, add, out):
+    """Set out[i, j] to xs[i, j] * mul[j] + add[j].
+
+    Args:
+        xs (np.ndarray): A 2-D array.
+        mul (np.ndarray): 1-D multipliers, one per column.
+        add (np.ndarray): 1-D offsets, one per column.
+        out (np.ndarray): A 2-D array with the same shape as xs.
+
+    """
+    for i in range(xs.shape[0]):
+        for j in range(xs.shape[1]):
+            out[i, j] = xs[i, j] * mul[j] + add[j]
+
+
+def _alias_table_loop(p, prob, alias):
+    """Build the tables of the alias method (Vose's algorithm).
+
+    Args:
+        p (np.ndarray): Probabilities multiplied by their count, so that
+            they average to 1. Modified in place.
+        prob (np.ndarray): Output probability of keeping each entry.
+        alias (np.ndarray): Output alias of each entry.
+
+    """
+    n = p.shape[0]
+    small = np.empty(n, dtype=np.int64)
+    large = np.empty(n, dtype=np.int64)
+    n_small = 0
+    n_large = 0
+    for i in range(n):
+        if p[i] < 1:
+            small[n_small] = i
+            n_small += 1
+        else:
+            large[n_large] = i
+            n_large += 1
+    while n_small > 0 and n_large > 0:
+        n_small -= 1
+        s = small[n_small]
+        n_large -= 1
+        g = large[n_large]
+        prob[s] = p[s]
+        alias[s] = g
+        p[g] = (p[g] + p[s]) - 1
+        if p[g] < 1:
+            small[n_small] = g
+            n_small += 1
+        else:
+            large[n_large] = g
+            n_large += 1
+    # Whatever remains has a probability of 1, up to rounding errors.
+    for k in range(n_large):
+        prob[large[k]] = 1
+        alias[large[k]] = large[k]
+    for k in range(n_small):
+        prob[small[k]] = 1
+        alias[small[k]] = small[k]
+
+
+if numba:
+    _JIT_KERNELS = {
+        'alias_table': numba.njit(_alias_table_loop),
+        'one_hot': numba.njit(_one_hot_loop),
+        'nonzero_columns': numba.njit(_nonzero_columns_loop),
+        'in_bounds': numba.njit(_in_bounds_loop),
+        'scale': numba.njit(_scale_loop),
+    }
+else:  # pragma: no cover
+    _JIT_KERNELS = None
+
+_jit_enabled = bool(numba)
+
+
+def jit_enabled():
+    """Return whether the numba kernels are in use.
+
+    Returns:
+        bool: True if numba is installed and has not been disabled.
+
+    """
+    return _jit_enabled
+
+
+def set_jit_enabled(enabled):
+    """Enable or disable the numba kernels.
+
+    This is mostly useful to compare both implementations. Enabling the
+    kernels has no effect if numba is not installed.
+
+    Args:
+        enabled (bool): Whether to use the numba kernels.
+
+    """
+    global _jit_enabled
+    _jit_enabled = bool(enabled) and _JIT_KERNELS is not None
+
+
+def _kernel(name):
+    """Return the JIT-compiled kernel with the given name, if enabled.
+
+    Args:
+        name (str): Name of the kernel.
+
+    Returns:
+        callable: The compiled kernel, or None if numba is not in use.
+
+    """
+    if _jit_enabled:
+        return _JIT_KERNELS[name]
+    return None
+
+
+def array_namespace(*xs):
+    """Return the array API namespace of the first non-numpy array in xs.
+
+    Args:
+        xs (list): Arrays, or other objects.
+
+    Returns:
+        module: The namespace returned by `__array_namespace__`, or None if
+            no element of xs is an array API array other than an
+            np.ndarray, in which case numpy should be used.
+
+    """
+    for x in xs:
+        if (not isinstance(x, np.ndarray)
+                and hasattr(x, '__array_namespace__')):
+            return x.__array_namespace__()
+    return None
+
+
+def concat(arrays, axis=-1):
+    """Concatenate arrays along an axis, in their own namespace.
+
+    Args:
+        arrays (:obj:`list`): The arrays to concatenate.
+        axis (int): The axis to concatenate along.
+
+    Returns:
+        object: The concatenated array.
+
+    """
+    xp = array_namespace(*arrays)
+    if xp is None:
+        return np.concatenate(arrays, axis=axis)
+    return xp.concat(arrays, axis=axis)
+
+
+def as_batch(xs):
+    """Stack a sequence of samples of another library into a batch.
+
+    Args:
+        xs (:obj:`Iterable`): A batch, or a list or tuple of samples.
+
+    Returns:
+        object: The samples stacked with their own namespace, if xs is a
+            non-empty list or tuple of arrays of another library (see
+            `array_namespace`), otherwise xs itself.
+
+    """
+    if isinstance(xs, (list, tuple)) and xs:
+        xp = array_namespace(*xs)
+        if xp is not None:
+            return xp.stack(list(xs))
+    return xs
+
+
+def namespace_dtype(xp, dtype):
+    """Return the dtype of an array API namespace matching a numpy dtype.
+
+    Args:
+        xp (module): An array API namespace.
+        dtype (np.dtype): A numpy dtype, such as np.int64.
+
+    Returns:
+        object: The dtype of xp with the same name, such as xp.int64.
+
+    """
+    return getattr(xp, np.dtype(dtype).name)
+
+
+def as_indices(xs):
+    """Convert xs into a 1-D int64 array of indices.
+
+    Args:
+        xs (:obj:`Iterable`): Integer indices.
+
+    Returns:
+        np.ndarray: A 1-D int64 array.
+
+    Raises:
+        IndexError: If xs does not contain integers.
+
+    """
+    xs = np.asarray(xs)
+    if xs.size and not np.issubdtype(xs.dtype, np.integer):
+        raise IndexError('Indices must be integers, not {}'.format(xs.dtype))
+    return xs.reshape(-1).astype(np.int64, copy=False)
+
+
+def one_hot(xs, n, out=None):
+    """One-hot encode a batch of indices.
+
+    Args:
+        xs (:obj:`Iterable`): Integer indices in [0, n).
+        n (int): Number of classes.
+        out (np.ndarray): Optional array of shape (len(xs), n) to write the
+            encoding to. The encoding of arrays of other libraries is copied
+            to it with `copy_to`.
+
+    Returns:
+        np.ndarray: A float64 array of shape (len(xs), n), or out.
+
+    Raises:
+        IndexError: If any index is outside of [0, n).
+
+    """
+    xp = array_namespace(xs)
+    if xp is not None:
+        xs = xp.reshape(xs, (-1, 1))
+        if xp.any((xs < 0) | (xs >= n)):
+            raise IndexError('Index out of bounds for {} classes'.format(n))
+        return copy_to(out, xp.astype(xs == xp.arange(n), xp.float64))
+    xs = as_indices(xs)
+    if out is None:
+        ret = np.zeros((len(xs), n))
+    else:
+        ret = out
+        ret[...] = 0
+    kernel = _kernel('one_hot')
+    if kernel is not None:
+        bad = kernel(xs, ret)
+    else:
+        invalid = np.flatnonzero((xs < 0) | (xs >= n))
+        bad = invalid[0] if len(invalid) else -1
+        if bad < 0:
+            ret[np.arange(len(xs)), xs] = 1
+    if bad >= 0:
+        raise IndexError('Index {} is out of bounds for {} classes'.format(
+            xs[bad], n))
+    return ret
+
+
+def nonzero_columns(xs):
+    """Return the column of every nonzero entry of a batch.
+
+    For a batch of one-hot vectors, this is the index encoded by each row.
+    This is identical to `np.nonzero(xs)[1]`.
+
+    Args:
+        xs (:obj:`Iterable`): A 2-D array.
+
+    Returns:
+        np.ndarray: A 1-D int64 array of column indices, in row-major order.
+
+    """
+    xs = np.asarray(xs)
+    kernel = _kernel('nonzero_columns')
+    if kernel is not None and xs.ndim == 2:
+        return kernel(xs)
+    return np.nonzero(xs)[1].astype(np.int64, copy=False)
+
+
+def in_bounds(xs, low, high):
+    """Check which samples in a batch lie within the given bounds.
+
+    Args:
+        xs (:obj:`Iterable`): A batch of samples, with the batch in the
+            first dimension.
+        low (np.ndarray): Lower bounds with the shape of one sample.
+        high (np.ndarray): Upper bounds with the shape of one sample.
+
+    Returns:
+        np.ndarray: A 1-D boolean array, one entry per sample.
+
+    """
+    xs = np.asarray(xs)
+    low = np.broadcast_to(low, xs.shape[1:]).reshape(-1)
+    high = np.broadcast_to(high, xs.shape[1:]).reshape(-1)
+    xs = xs.reshape((len(xs), low.size))
+    kernel = _kernel('in_bounds')
+    if kernel is not None:
+        ret = np.empty(len(xs), dtype=bool)
+        kernel(xs, low, high, ret)
+        return ret
+    return np.all((xs >= low) & (xs <= high), axis=1)
+
+
+def scale(xs, mul, add, out=None):
+    """Compute `xs * mul + add` for a batch of samples.
+
+    Args:
+        xs (:obj:`Iterable`): A batch of samples, with the batch in the
+            first dimension.
+        mul (np.ndarray): Multipliers with the shape of one sample.
+        add (np.ndarray): Offsets with the shape of one sample.
+        out (np.ndarray): Optional array with the shape of xs to write the
+            result to.
+
+    Returns:
+        np.ndarray: The scaled batch.
+
+    """
+    xs = np.asarray(xs)
+    dtype = np.result_type(xs, mul, add)
+    if out is None:
+        out = np.empty(xs.shape, dtype=dtype)
+    kernel = _kernel('scale')
+    if kernel is not None and out.flags.c_contiguous:
+        mul = np.broadcast_to(mul, xs.shape[1:]).reshape(-1)
+        add = np.broadcast_to(add, xs.shape[1:]).reshape(-1)
+        flat_xs = xs.reshape((len(xs), mul.size)).astype(dtype, copy=False)
+        kernel(flat_xs, mul.astype(dtype), add.astype(dtype),
+               out.reshape(flat_xs.shape))
+    elif out.dtype == dtype:
+        np.multiply(xs, mul, out=out)
+        np.add(out, add, out=out)
+    else:
+        out[...] = xs * mul + add
+    return out
+
+
+def alias_table(probs):
+    """Build the tables used to sample from a distribution in O(1).
+
+    To sample with the alias method, draw an index i uniformly, then keep it
+    with probability prob[i], or else use alias[i].
+
+    Args:
+        probs (np.ndarray): Probabilities of each entry, summing to 1.
+
+    Returns:
+        tuple: The probability of keeping each entry (np.ndarray of float64)
+            and the alias of each entry (np.ndarray of int64).
+
+    """
+    p = np.asarray(probs, dtype=np.float64) * len(probs)
+    prob = np.empty(len(p))
+    alias = np.empty(len(p), dtype=np.int64)
+    kernel = _kernel('alias_table')
+    if kernel is not None:
+        kernel(p, prob, alias)
+    else:
+        _alias_table_loop(p, prob, alias)
+    return prob, alias
+
+
+def scatter(blocks, offsets, out=None):
+    """Write column blocks side by side into a single 2-D array.
+
+    This is the layout used by `flatten_n` of composite spaces. Block i is
+    written to the columns `offsets[i]:offsets[i + 1]`.
+
+    Args:
+        blocks (:obj:`list`): 2-D arrays with the same number of rows.
+        offsets (np.ndarray): Column offsets of the blocks, with one more
+            entry than there are blocks.
+        out (np.ndarray): Optional array of shape (rows, offsets[-1]) to
+            write to. If None, a C-contiguous array aligned with
+            `empty_aligned` is allocated.
+
+    Returns:
+        np.ndarray: The array containing every block.
+
+    """
+    if out is None and array_namespace(*blocks) is not None:
+        return concat(blocks, axis=1)
+    if out is None:
+        rows = len(blocks[0]) if blocks else 0
+        out = empty_aligned((rows, offsets[-1]),
+                            dtype=np.result_type(*blocks))
+    for block, start, stop in zip(blocks, offsets[:-1], offsets[1:]):
+        out[:, start:stop] = block
+    return out
+
+
+def gather(flat, offsets):
+    """Split the columns of a 2-D array into blocks.
+
+    This is the inverse of `scatter`. The blocks are slices of flat, so
+    they are views of flat if it is an np.ndarray.
+
+    Args:
+        flat (np.ndarray): Array with offsets[-1] columns.
+        offsets (np.ndarray): Column offsets of the blocks.
+
+    Returns:
+        list[np.ndarray]: One block per pair of consecutive offsets.
+
+    """
+    if array_namespace(flat) is None:
+        flat = np.asarray(flat)
+    return [
+        flat[..., start:stop]
+        for start, stop in zip(offsets[:-1], offsets[1:])
+    ]
+
+
+def empty_aligned(shape, dtype=np.float64, alignment=64, order='C'):
+    """Allocate an uninitialized array whose data starts at an aligned address.
+
+    Args:
+        shape (int or tuple): Shape of the array.
+        dtype (np.dtype): dtype of the array.
+        alignment (int): Alignment of the first element in bytes, a power
+            of two. The default of 64 bytes is the size of a cache line, and
+            of an AVX-512 register.
+        order (str): 'C' for a row-major array, 'F' for a column-major one.
+
+    Returns:
+        np.ndarray: The array. It is a view of a slightly larger buffer.
+
+    Raises:
+        ValueError: If alignment is not a power of two, or order is neither
+            'C' nor 'F'.
+
+    """
+    if alignment < 1 or alignment & (alignment - 1):
+        raise ValueError('alignment must be a power of two')
+    if order not in ('C', 'F'):
+        raise ValueError("order must be 'C' or 'F'")
+    if isinstance(shape, int):
+        shape = (shape, )
+    dtype = np.dtype(dtype)
+    nbytes = int(np.prod(shape)) * dtype.itemsize
+    buf = np.empty(nbytes + alignment, dtype=np.uint8)
+    start = -buf.ctypes.data % alignment
+    return buf[start:start + nbytes].view(dtype).reshape(shape, order=order)
+
+
+def is_aligned(x, alignment=64):
+    """Return whether the data of an array starts at an aligned address.
+
+    Args:
+        x (np.ndarray): An array.
+        alignment (int): Alignment in bytes.
+
+    Returns:
+        bool: True if the address of the first element of x is a multiple
+            of alignment.
+
+    """
+    return x.ctypes.data % alignment == 0
+
+
+def copy_to(out, x):
+    """Copy a batch to a preallocated array, if one is given.
+
+    Values are cast to the dtype of out as by assignment. Arrays of other
+    libraries are converted by numpy, which raises TypeError if they can't
+    be, e.g. because they live on another device.
+
+    Args:
+        out (np.ndarray): Array with the shape of x to copy x to, or None.
+        x (np.ndarray): A batch.
+
+    Returns:
+        np.ndarray: out if it is given, otherwise x.
+
+    """
+    if out is None or x is out:
+        return x
+    out[...] = x
+    return out
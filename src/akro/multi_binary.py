@@ -0,0 +1,303 @@
+"""A Space of binary vectors."""
+import gym.spaces
+import numpy as np
+
+from akro import kernels
+from akro import tf, theano
+from akro.requires import (cache_tf_placeholder, requires_tf,
+                           requires_theano)
+from akro.space import Space
+
+
+class MultiBinary(gym.spaces.MultiBinary, Space):
+    """Arrays of bits, e.g. the state of several buttons.
+
+    A sample is flattened into its bits as floats. Batches of samples can
+    also be stored compactly, eight bits per byte, with `pack_n`.
+
+    Example usage:
+        self.observation_space = MultiBinary(5)
+
+    Args:
+        n (int or :obj:`Iterable`): Number of bits, or shape of a sample.
+
+    """
+
+    @property
+    def flat_dim(self):
+        """Return the length of the flattened vector of the space."""
+        return int(np.prod(self.shape))
+
+    @property
+    def flat_dtype(self):
+        """np.dtype: dtype of the flattened samples."""
+        return np.dtype(np.float64)
+
+    @property
+    def compact_dtype(self):
+        """np.dtype: dtype of the samples packed by `pack_n`."""
+        return np.dtype(np.uint8)
+
+    @property
+    def compact_nbytes(self):
+        """int: Number of bytes of a sample packed by `pack_n`."""
+        return (self.flat_dim + 7) // 8
+
+    def sample(self):
+        """Randomly sample an element of the space, using `rng`.
+
+        Returns:
+            np.ndarray: A sample of the space.
+
+        """
+        return self.sample_n(1)[0]
+
+    def sample_n(self, n):
+        """Randomly sample n elements of the space at once, using `rng`.
+
+        Args:
+            n (int): Number of samples.
+
+        Returns:
+            np.ndarray: The samples, with shape (n, ) + self.shape.
+
+        """
+        return self.rng.integers(2, size=(n, ) + self.shape, dtype=self.dtype)
+
+    def flatten(self, x):
+        """Return a flattened observation x.
+
+        Args:
+            x (:obj:`Iterable`): The object to flatten.
+
+        Returns:
+            np.ndarray: The bits of x as floats, in one dimension.
+
+        """
+        xp = kernels.array_namespace(x)
+        if xp is not None:
+            return xp.reshape(xp.astype(x, xp.float64), (-1, ))
+        return np.asarray(x, dtype=np.float64).reshape(-1)
+
+    def unflatten(self, x):
+        """Return an unflattened observation x.
+
+        Args:
+            x (:obj:`Iterable`): The object to unflatten.
+
+        Returns:
+            np.ndarray: An array of x in the shape of self.shape.
+
+        """
+        xp = kernels.array_namespace(x)
+        if xp is not None:
+            return xp.reshape(
+                xp.astype(x != 0, kernels.namespace_dtype(xp, self.dtype)),
+                self.shape)
+        return (np.asarray(x) != 0).astype(self.dtype).reshape(self.shape)
+
+    def flatten_n(self, xs, out=None):
+        """Return flattened observations xs.
+
+        Args:
+            xs (:obj:`Iterable`): The object to reshape and flatten
+            out (np.ndarray): Optional array of shape (len(xs), flat_dim) to
+                write the flattened observations to, e.g. one allocated by
+                `empty_flat`.
+
+        Returns:
+            np.ndarray: An array of shape (len(xs), flat_dim), or out if it
+                is given.
+
+        """
+        xs = kernels.as_batch(xs)
+        xp = kernels.array_namespace(xs)
+        if xp is not None:
+            return kernels.copy_to(
+                out,
+                xp.reshape(xp.astype(xs, xp.float64), (-1, self.flat_dim)))
+        return kernels.copy_to(
+            out,
+            np.asarray(xs, dtype=np.float64).reshape((-1, self.flat_dim)))
+
+    def unflatten_n(self, xs):
+        """Return unflattened observations xs.
+
+        Args:
+            xs (:obj:`Iterable`): The object to reshape and unflatten
+
+        Returns:
+            np.ndarray: An array of shape (len(xs), ) + self.shape.
+
+        """
+        xp = kernels.array_namespace(xs)
+        if xp is not None:
+            return xp.reshape(
+                xp.astype(xs != 0, kernels.namespace_dtype(xp, self.dtype)),
+                (xs.shape[0], ) + self.shape)
+        xs = np.asarray(xs)
+        return (xs != 0).astype(self.dtype).reshape((len(xs), ) + self.shape)
+
+    def pack_n(self, xs):
+        """Pack a batch of samples, eight bits per byte.
+
+        Args:
+            xs (:obj:`Iterable`): Samples of the space.
+
+        Returns:
+            np.ndarray: A uint8 array of shape (len(xs), compact_nbytes).
+
+        """
+        xs = np.asarray(xs).reshape((-1, self.flat_dim))
+        return np.packbits(xs != 0, axis=1)
+
+    def unpack_n(self, packed):
+        """Unpack a batch of samples packed by `pack_n`.
+
+        Args:
+            packed (np.ndarray): A uint8 array of shape
+                (len(xs), compact_nbytes).
+
+        Returns:
+            np.ndarray: The samples, with shape (len(packed), ) + self.shape.
+
+        """
+        packed = np.asarray(packed, dtype=np.uint8)
+        bits = np.unpackbits(packed, axis=1, count=self.flat_dim)
+        return bits.astype(self.dtype).reshape((len(packed), ) + self.shape)
+
+    def concat(self, other):
+        """Concatenate with another MultiBinary space.
+
+        Note that the bits of both spaces will be flattened.
+
+        Args:
+            other (MultiBinary): A space to be concatenated with this space.
+
+        Returns:
+            MultiBinary: A concatenated space.
+
+        """
+        assert isinstance(other, MultiBinary)
+        return MultiBinary(self.flat_dim + other.flat_dim)
+
+    def _init_args(self):
+        """Return the arguments of the constructor rebuilding the space.
+
+        Returns:
+            tuple: Positional arguments of the constructor.
+
+        """
+        return (self.n, )
+
+    def __hash__(self):
+        """Hash the MultiBinary Space.
+
+        Returns:
+            int: A hash of the shape of the space.
+
+        """
+        return hash(self.shape)
+
+    @requires_tf
+    def tf_flatten(self, x, dtype=None):
+        """Flatten a batch of samples in the TensorFlow graph.
+
+        Args:
+            x (tf.Tensor): Samples, with shape [batch] + self.shape.
+            dtype (tf.DType): dtype of the flattened tensor. If None,
+                tf.float32 is used.
+
+        Returns:
+            tf.Tensor: The bits as floats, with shape [batch, flat_dim].
+
+        """
+        return tf.cast(tf.reshape(x, [-1, self.flat_dim]),
+                       dtype or tf.float32)
+
+    @requires_tf
+    def tf_unflatten(self, x):
+        """Unflatten a batch of samples in the TensorFlow graph.
+
+        Args:
+            x (tf.Tensor): Flattened samples, with shape [batch, flat_dim].
+
+        Returns:
+            tf.Tensor: The samples, with shape [batch] + self.shape.
+
+        """
+        bits = tf.cast(tf.not_equal(x, 0), self.dtype)
+        return tf.reshape(bits, [-1] + list(self.shape))
+
+    @requires_tf
+    @cache_tf_placeholder
+    def to_tf_placeholder(self, name, batch_dims):
+        """Create a tensor placeholder from the Space object.
+
+        Args:
+            name (str): name of the variable
+            batch_dims (:obj:`list`): batch dimensions to add to the
+                shape of the object.
+
+        Returns:
+            tf.Tensor: Tensor object with the same properties as
+                the MultiBinary obj where the shape is modified by
+                batch_dims.
+
+        """
+        return tf.compat.v1.placeholder(dtype=self.dtype,
+                                        shape=[None] * batch_dims +
+                                        list(self.shape),
+                                        name=name)
+
+    @requires_theano
+    def theano_flatten(self, x, dtype=None):
+        """Flatten a batch of samples symbolically.
+
+        Args:
+            x (theano.tensor.TensorVariable): Samples, with shape
+                [batch] + self.shape.
+            dtype (str): dtype of the flattened variable. If None,
+                theano.config.floatX is used.
+
+        Returns:
+            theano.tensor.TensorVariable: The bits as floats, with shape
+                [batch, flat_dim].
+
+        """
+        return theano.tensor.cast(x.reshape((-1, self.flat_dim)),
+                                  dtype or theano.config.floatX)
+
+    @requires_theano
+    def theano_unflatten(self, x):
+        """Unflatten a batch of samples symbolically.
+
+        Args:
+            x (theano.tensor.TensorVariable): Flattened samples, with shape
+                [batch, flat_dim].
+
+        Returns:
+            theano.tensor.TensorVariable: The samples, with shape
+                [batch] + self.shape.
+
+        """
+        bits = theano.tensor.cast(theano.tensor.neq(x, 0), str(self.dtype))
+        return bits.reshape((-1, ) + tuple(self.shape))
+
+    @requires_theano
+    def to_theano_tensor(self, name, batch_dims):
+        """Create a theano tensor from the Space object.
+
+        Args:
+            name (str): name of the variable
+            batch_dims (:obj:`list`): batch dimensions to add to the
+                shape of the object.
+
+        Returns:
+            theano.tensor.TensorVariable: Tensor object with the
+                same properties as the MultiBinary obj where the shape is
+                modified by batch_dims.
+
+        """
+        return theano.tensor.TensorType(
+            self.dtype, (False, ) * (batch_dims + len(self.shape)))(name)
@@ -0,0 +1,321 @@
+"""A Space of vectors of discrete values, each with its own range."""
+import gym.spaces
+import numpy as np
+
+from akro import kernels
+from akro import tf, theano
+from akro.requires import (cache_tf_placeholder, requires_tf,
+                           requires_theano)
+from akro.space import Space
+
+
+class MultiDiscrete(gym.spaces.MultiDiscrete, Space):
+    """Vectors of discrete values, where value i lies in [0, nvec[i]).
+
+    A sample is flattened into the concatenation of the one-hot encodings of
+    its values. The offset of each value in the flattened vector is
+    precomputed, so whole batches are encoded and decoded with a single
+    scatter or gather, rather than one Discrete space per value.
+
+    Example usage:
+        self.action_space = MultiDiscrete([5, 2, 2])
+
+    Args:
+        nvec (:obj:`Iterable`): Number of values of each component.
+        dtype (np.dtype): dtype of the samples.
+
+    """
+
+    def __init__(self, nvec, dtype=np.int64):
+        super().__init__(nvec, dtype=dtype)
+        self._offsets = np.concatenate(
+            [[0], np.cumsum(self.nvec.reshape(-1))[:-1]]).astype(np.int64)
+
+    @property
+    def flat_dim(self):
+        """Return the length of the flattened vector of the space."""
+        return int(self.nvec.sum())
+
+    @property
+    def flat_dtype(self):
+        """np.dtype: dtype of the flattened (one-hot) samples."""
+        return np.dtype(np.float64)
+
+    @property
+    def compact_dtype(self):
+        """np.dtype: Smallest unsigned integer dtype holding a component."""
+        return np.min_scalar_type(max(int(self.nvec.max()) - 1, 0))
+
+    def sample(self):
+        """Randomly sample an element of the space, using `rng`.
+
+        Returns:
+            np.ndarray: A sample of the space.
+
+        """
+        return self.sample_n(1)[0]
+
+    def sample_n(self, n):
+        """Randomly sample n elements of the space at once, using `rng`.
+
+        Args:
+            n (int): Number of samples.
+
+        Returns:
+            np.ndarray: The samples, with shape (n, ) + self.shape.
+
+        """
+        return self.rng.integers(self.nvec, size=(n, ) + self.shape,
+                                 dtype=self.dtype)
+
+    def flatten(self, x):
+        """Return a flattened observation x.
+
+        Args:
+            x (:obj:`Iterable`): The object to flatten.
+
+        Returns:
+            np.ndarray: The concatenated one-hot encodings of the components
+                of x.
+
+        """
+        xp = kernels.array_namespace(x)
+        if xp is not None:
+            return self.flatten_n(xp.reshape(x, (1, -1)))[0]
+        return self.flatten_n(np.asarray(x)[np.newaxis])[0]
+
+    def unflatten(self, x):
+        """Return an unflattened observation x.
+
+        Args:
+            x (:obj:`Iterable`): The object to unflatten.
+
+        Returns:
+            np.ndarray: An array of x in the shape of self.shape.
+
+        """
+        xp = kernels.array_namespace(x)
+        if xp is not None:
+            return self.unflatten_n(xp.reshape(x, (1, -1)))[0]
+        return self.unflatten_n(np.asarray(x)[np.newaxis])[0]
+
+    def flatten_n(self, xs, out=None):
+        """Return flattened observations xs.
+
+        Args:
+            xs (:obj:`Iterable`): The object to reshape and flatten
+            out (np.ndarray): Optional array of shape (len(xs), flat_dim) to
+                write the flattened observations to, e.g. one allocated by
+                `empty_flat`.
+
+        Returns:
+            np.ndarray: An array of shape (len(xs), flat_dim), or out if it
+                is given.
+
+        Raises:
+            IndexError: If a component is out of its range.
+
+        """
+        xs = kernels.as_batch(xs)
+        xp = kernels.array_namespace(xs)
+        if xp is not None:
+            xs = xp.reshape(xs, (-1, self._offsets.size))
+            blocks = [
+                kernels.one_hot(xs[:, i], n)
+                for i, n in enumerate(self.nvec.reshape(-1))
+            ]
+            return kernels.copy_to(out, kernels.concat(blocks, axis=1))
+        xs = kernels.as_indices(xs).reshape((-1, self._offsets.size))
+        if ((xs < 0) | (xs >= self.nvec.reshape(-1))).any():
+            raise IndexError('Component out of range for {}'.format(self))
+        if out is None:
+            ret = np.zeros((len(xs), self.flat_dim))
+        else:
+            ret = out
+            ret[...] = 0
+        ret[np.arange(len(xs))[:, np.newaxis], xs + self._offsets] = 1
+        return ret
+
+    def unflatten_n(self, xs):
+        """Return unflattened observations xs.
+
+        Args:
+            xs (:obj:`Iterable`): The object to reshape and unflatten
+
+        Returns:
+            np.ndarray: An array of shape (len(xs), ) + self.shape.
+
+        """
+        xp = kernels.array_namespace(xs)
+        if xp is not None:
+            values = [
+                xp.argmax(xs[:, start:start + n], axis=1)
+                for start, n in zip(self._offsets, self.nvec.reshape(-1))
+            ]
+            values = xp.astype(xp.stack(values, axis=1),
+                               kernels.namespace_dtype(xp, self.dtype))
+            return xp.reshape(values, (xs.shape[0], ) + self.shape)
+        xs = np.asarray(xs)
+        columns = kernels.nonzero_columns(xs).reshape(
+            (len(xs), self._offsets.size))
+        return (columns - self._offsets).astype(self.dtype).reshape(
+            (len(xs), ) + self.shape)
+
+    def concat(self, other):
+        """Concatenate with another MultiDiscrete space.
+
+        Note that the components of both spaces will be flattened.
+
+        Args:
+            other (MultiDiscrete): A space to be concatenated with this
+                space.
+
+        Returns:
+            MultiDiscrete: A concatenated space.
+
+        """
+        assert isinstance(other, MultiDiscrete)
+        return MultiDiscrete(
+            np.concatenate([self.nvec.reshape(-1),
+                            other.nvec.reshape(-1)]), dtype=self.dtype)
+
+    def _init_args(self):
+        """Return the arguments of the constructor rebuilding the space.
+
+        Returns:
+            tuple: Positional arguments of the constructor.
+
+        """
+        return (self.nvec, self.dtype)
+
+    def __hash__(self):
+        """Hash the MultiDiscrete Space.
+
+        Returns:
+            int: A hash of the number of values of each component.
+
+        """
+        return hash((self.nvec.shape, tuple(self.nvec.reshape(-1))))
+
+    @requires_tf
+    def tf_flatten(self, x, dtype=None):
+        """One-hot encode a batch of samples in the TensorFlow graph.
+
+        The offset of each component is added to its value, and the one-hot
+        encodings of the shifted values are summed.
+
+        Args:
+            x (tf.Tensor): Integer samples, with shape [batch] + self.shape.
+            dtype (tf.DType): dtype of the flattened tensor. If None,
+                tf.float32 is used.
+
+        Returns:
+            tf.Tensor: The flattened samples, with shape [batch, flat_dim].
+
+        """
+        x = tf.reshape(x, [-1, int(self._offsets.size)])
+        shifted = x + tf.constant(self._offsets, dtype=x.dtype)
+        return tf.reduce_sum(tf.one_hot(shifted,
+                                        self.flat_dim,
+                                        dtype=dtype or tf.float32),
+                             axis=-2)
+
+    @requires_tf
+    def tf_unflatten(self, x):
+        """Decode flattened samples in the TensorFlow graph.
+
+        Args:
+            x (tf.Tensor): Flattened samples, with shape [batch, flat_dim].
+
+        Returns:
+            tf.Tensor: The int64 samples, with shape [batch] + self.shape.
+
+        """
+        blocks = tf.split(x, self.nvec.reshape(-1).tolist(), axis=-1)
+        values = tf.stack([tf.argmax(block, axis=-1) for block in blocks],
+                          axis=-1)
+        return tf.reshape(values, [-1] + list(self.shape))
+
+    @requires_tf
+    @cache_tf_placeholder
+    def to_tf_placeholder(self, name, batch_dims):
+        """Create a tensor placeholder from the Space object.
+
+        Args:
+            name (str): name of the variable
+            batch_dims (:obj:`list`): batch dimensions to add to the
+                shape of the object.
+
+        Returns:
+            tf.Tensor: Tensor object with the same properties as
+                the MultiDiscrete obj where the shape is modified by
+                batch_dims.
+
+        """
+        return tf.compat.v1.placeholder(dtype=self.dtype,
+                                        shape=[None] * batch_dims +
+                                        [self.flat_dim],
+                                        name=name)
+
+    @requires_theano
+    def theano_flatten(self, x, dtype=None):
+        """One-hot encode a batch of samples symbolically.
+
+        The offset of each component is added to its value, and the
+        shifted values are compared to every index of the flattened vector.
+
+        Args:
+            x (theano.tensor.TensorVariable): Integer samples, with shape
+                [batch] + self.shape.
+            dtype (str): dtype of the flattened variable. If None,
+                theano.config.floatX is used.
+
+        Returns:
+            theano.tensor.TensorVariable: The flattened samples, with shape
+                [batch, flat_dim].
+
+        """
+        shifted = x.reshape((-1, int(self._offsets.size))) + self._offsets
+        one_hot = theano.tensor.eq(shifted.dimshuffle(0, 1, 'x'),
+                                   theano.tensor.arange(self.flat_dim))
+        return theano.tensor.cast(one_hot.sum(axis=1),
+                                  dtype or theano.config.floatX)
+
+    @requires_theano
+    def theano_unflatten(self, x):
+        """Decode flattened samples symbolically.
+
+        Args:
+            x (theano.tensor.TensorVariable): Flattened samples, with shape
+                [batch, flat_dim].
+
+        Returns:
+            theano.tensor.TensorVariable: The int64 samples, with shape
+                [batch] + self.shape.
+
+        """
+        ends = self._offsets + self.nvec.reshape(-1)
+        values = [
+            theano.tensor.argmax(x[:, start:end], axis=-1)
+            for start, end in zip(self._offsets.tolist(), ends.tolist())
+        ]
+        values = theano.tensor.stack(values, axis=1)
+        return values.reshape((-1, ) + tuple(self.shape))
+
+    @requires_theano
+    def to_theano_tensor(self, name, batch_dims):
+        """Create a theano tensor from the Space object.
+
+        Args:
+            name (str): name of the variable
+            batch_dims (:obj:`list`): batch dimensions to add to the
+                shape of the object.
+
+        Returns:
+            theano.tensor.TensorVariable: Tensor object with the
+                same properties as the MultiDiscrete obj where the shape is
+                modified by batch_dims.
+
+        """
+        return theano.tensor.TensorType(self.dtype,
+                                        (False, ) * (batch_dims + 1))(name)
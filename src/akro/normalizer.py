@@ -0,0 +1,266 @@
+"""Running mean and standard deviation normalization of samples of a Space.
+
+Statistics are updated from whole batches, and merged with the parallel
+algorithm of Chan et al., so normalizers updated in different worker
+processes can be merged without sending them the samples.
+
+Example usage:
+    normalizer = RunningNormalizer(env.observation_space)
+    normalizer.update(obs_batch)
+    normalized = normalizer.normalize(obs_batch)
+
+    # In the learner, with normalizers sent back by the samplers:
+    for worker_normalizer in worker_normalizers:
+        normalizer.merge(worker_normalizer)
+"""
+import collections
+
+import numpy as np
+
+from akro import schema
+from akro.box import Box
+
+
+class _RunningStats:
+    """Running mean and variance of samples of a given shape.
+
+    Args:
+        shape (tuple): Shape of a sample.
+
+    """
+
+    def __init__(self, shape):
+        self.count = 0
+        self.mean = np.zeros(shape)
+        self.m2 = np.zeros(shape)
+
+    @property
+    def var(self):
+        """np.ndarray: Variance of the samples, or ones if there are none."""
+        if not self.count:
+            return np.ones_like(self.m2)
+        return self.m2 / self.count
+
+    def update(self, xs):
+        """Add a batch of samples.
+
+        Args:
+            xs (np.ndarray): Samples, with the batch in the first dimension.
+
+        """
+        xs = np.asarray(xs, dtype=np.float64)
+        if not len(xs):
+            return
+        mean = xs.mean(axis=0)
+        m2 = np.square(xs - mean).sum(axis=0)
+        self.merge(len(xs), mean, m2)
+
+    def merge(self, count, mean, m2):
+        """Add the statistics of other samples.
+
+        Args:
+            count (int): Number of other samples.
+            mean (np.ndarray): Mean of the other samples.
+            m2 (np.ndarray): Sum of squared deviations from the mean of the
+                other samples.
+
+        """
+        if not count:
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean = self.mean + delta * (count / total)
+        self.m2 = self.m2 + m2 + np.square(delta) * (self.count * count /
+                                                     total)
+        self.count = total
+
+
+class RunningNormalizer:
+    """Normalizes samples of a Space by their running mean and std.
+
+    Every Box leaf of the space (see `akro.schema.leaves`) has its own
+    statistics, computed per element. Other leaves, such as Discrete ones,
+    are left unchanged.
+
+    Samples are passed as batched structures (see `akro.schema`), with the
+    batch in the first dimension of every leaf.
+
+    Args:
+        space (akro.Space): Space of the samples.
+        epsilon (float): Added to the variance before taking its square
+            root, to avoid dividing by zero.
+        clip (float): If not None, normalized values are clipped to
+            [-clip, clip].
+
+    """
+
+    def __init__(self, space, epsilon=1e-8, clip=None):
+        self._space = space
+        self._epsilon = epsilon
+        self._clip = clip
+        self._stats = collections.OrderedDict([
+            (path, _RunningStats(leaf.shape))
+            for path, leaf in schema.leaves(space) if isinstance(leaf, Box)
+        ])
+
+    @property
+    def space(self):
+        """akro.Space: Space of the samples."""
+        return self._space
+
+    @property
+    def count(self):
+        """int: Number of samples the statistics were computed from."""
+        for stats in self._stats.values():
+            return stats.count
+        return 0
+
+    def mean(self, path=()):
+        """Return the running mean of a Box leaf.
+
+        Args:
+            path (tuple): Path of the leaf.
+
+        Returns:
+            np.ndarray: The mean, with the shape of a sample of the leaf.
+
+        """
+        return self._stats[path].mean
+
+    def std(self, path=()):
+        """Return the running standard deviation of a Box leaf.
+
+        Args:
+            path (tuple): Path of the leaf.
+
+        Returns:
+            np.ndarray: The standard deviation, with the shape of a sample of
+                the leaf.
+
+        """
+        return np.sqrt(self._stats[path].var + self._epsilon)
+
+    def update(self, batch):
+        """Update the statistics with a batch of samples.
+
+        Args:
+            batch (object): A batched structure of samples.
+
+        """
+        for path, value in self._leaf_items(batch):
+            if path in self._stats:
+                self._stats[path].update(value)
+
+    def merge(self, other):
+        """Merge the statistics of another normalizer of the same space.
+
+        Args:
+            other (RunningNormalizer): The normalizer to merge, e.g. one
+                updated in another process.
+
+        Raises:
+            ValueError: If other doesn't normalize the same leaves.
+
+        """
+        if list(other._stats.keys()) != list(self._stats.keys()):
+            raise ValueError('Cannot merge normalizers of different spaces')
+        for path, stats in self._stats.items():
+            theirs = other._stats[path]
+            stats.merge(theirs.count, theirs.mean, theirs.m2)
+
+    def reset(self):
+        """Forget every sample seen."""
+        for path, stats in self._stats.items():
+            self._stats[path] = _RunningStats(stats.mean.shape)
+
+    def normalize(self, batch, out=None):
+        """Subtract the mean and divide by the std of every Box leaf.
+
+        Args:
+            batch (object): A batched structure of samples.
+            out (object): A batched structure of preallocated arrays to
+                write the normalized values of the Box leaves to. Other
+                leaves of out are ignored. If None, the arrays are allocated,
+                with a floating point dtype at least as wide as float32.
+
+        Returns:
+            object: The batched structure of normalized samples. Leaves which
+                are not a Box are the same objects as in batch.
+
+        """
+        return self._transform(batch, out, denormalize=False)
+
+    def denormalize(self, batch, out=None):
+        """Invert `normalize`, up to clipping.
+
+        Args:
+            batch (object): A batched structure of normalized samples.
+            out (object): A batched structure of preallocated arrays, as in
+                `normalize`.
+
+        Returns:
+            object: The batched structure of samples.
+
+        """
+        return self._transform(batch, out, denormalize=True)
+
+    def _transform(self, batch, out, denormalize):
+        """Normalize or denormalize a batch.
+
+        Args:
+            batch (object): A batched structure of samples.
+            out (object): A batched structure of preallocated arrays, or
+                None.
+            denormalize (bool): Whether to denormalize instead.
+
+        Returns:
+            object: The batched structure of transformed samples.
+
+        """
+        if out is None:
+            outs = [None] * len(self._leaf_paths())
+        else:
+            outs = schema.leaf_values(self._space, out)
+        values = []
+        for (path, value), buf in zip(self._leaf_items(batch), outs):
+            if path not in self._stats:
+                values.append(value)
+                continue
+            value = np.asarray(value)
+            if buf is None:
+                buf = np.empty(value.shape,
+                               dtype=np.result_type(value.dtype, np.float32))
+            mean = self._stats[path].mean
+            std = self.std(path)
+            if denormalize:
+                np.multiply(value, std, out=buf, casting='same_kind')
+                np.add(buf, mean, out=buf, casting='same_kind')
+            else:
+                np.subtract(value, mean, out=buf, casting='same_kind')
+                np.divide(buf, std, out=buf, casting='same_kind')
+                if self._clip is not None:
+                    np.clip(buf, -self._clip, self._clip, out=buf)
+            values.append(buf)
+        return schema.from_leaf_values(self._space, values)
+
+    def _leaf_paths(self):
+        """Return the paths of the leaves of the space.
+
+        Returns:
+            list[tuple]: The path of every leaf.
+
+        """
+        return [path for path, _ in schema.leaves(self._space)]
+
+    def _leaf_items(self, batch):
+        """Pair the values of the leaves of a batch with their paths.
+
+        Args:
+            batch (object): A batched structure of samples.
+
+        Returns:
+            list[tuple]: The path and value of every leaf.
+
+        """
+        return list(
+            zip(self._leaf_paths(), schema.leaf_values(self._space, batch)))
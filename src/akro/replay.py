@@ -0,0 +1,201 @@
+"""A replay buffer preallocated from observation and action spaces."""
+import collections
+
+import numpy as np
+
+from akro import kernels
+from akro import schema
+
+
+class _Field:
+    """Storage for one field of the transitions, with one array per leaf.
+
+    Args:
+        space (akro.Space): Space of the values of the field.
+        capacity (int): Maximum number of values stored.
+
+    """
+
+    def __init__(self, space, capacity):
+        self.space = space
+        self.leaves = [leaf for _, leaf in schema.leaves(space)]
+        self.arrays = [
+            np.empty((capacity, ) + schema.leaf_shape(leaf),
+                     dtype=schema.leaf_dtype(leaf)) for leaf in self.leaves
+        ]
+
+    @property
+    def nbytes(self):
+        """int: Number of bytes used by the arrays of the field."""
+        return sum(a.nbytes for a in self.arrays)
+
+    def write(self, indices, batch, keep):
+        """Write part of a batch of values at the given indices.
+
+        Args:
+            indices (np.ndarray): Rows to write to.
+            batch (object): A batched structure of values.
+            keep (slice): Part of the batch to write.
+
+        """
+        for array, value in zip(self.arrays,
+                                schema.leaf_values(self.space, batch)):
+            array[indices] = np.asarray(value)[keep]
+
+    def read(self, indices, flat):
+        """Read a batch of values.
+
+        Args:
+            indices (np.ndarray): Rows to read.
+            flat (bool): Whether to flatten the values.
+
+        Returns:
+            np.ndarray or object: The flattened values, or the result of
+                `unflatten_n` on the flattened values.
+
+        """
+        blocks = [
+            leaf.flatten_n(array[indices])
+            for leaf, array in zip(self.leaves, self.arrays)
+        ]
+        offsets = np.concatenate([[0], np.cumsum([b.shape[1]
+                                                  for b in blocks])])
+        values = kernels.scatter(blocks, offsets)
+        if flat:
+            return values
+        return self.space.unflatten_n(values)
+
+
+class ReplayBuffer:
+    """A ring buffer of transitions, preallocated from the spaces.
+
+    Every leaf of the observation and action spaces (see
+    `akro.schema.leaves`) is stored in its own preallocated array, so the
+    memory used by the buffer is fully allocated, and reported by `nbytes`,
+    when it is constructed. Once the buffer is full, new transitions
+    overwrite the oldest ones.
+
+    Transitions are added in batches, as batched structures (see
+    `akro.schema`): an array with the batch in the first dimension for a Box
+    or Discrete, an OrderedDict of batches for a Dict and a tuple of batches
+    for a Tuple.
+
+    Args:
+        observation_space (akro.Space): Space of the observations.
+        action_space (akro.Space): Space of the actions.
+        capacity (int): Maximum number of transitions stored.
+        rng (int or np.random.SeedSequence or np.random.Generator): Seed of
+            the generator transitions are sampled with, or the generator
+            itself. If None, fresh entropy is used.
+
+    """
+
+    def __init__(self, observation_space, action_space, capacity, rng=None):
+        if capacity < 1:
+            raise ValueError('capacity must be positive')
+        self._capacity = capacity
+        self._observations = _Field(observation_space, capacity)
+        self._actions = _Field(action_space, capacity)
+        self._next_observations = _Field(observation_space, capacity)
+        self._rewards = np.empty(capacity, dtype=np.float32)
+        self._terminals = np.empty(capacity, dtype=bool)
+        self._next = 0
+        self._size = 0
+        self._rng = np.random.default_rng(rng)
+
+    @staticmethod
+    def capacity_for(observation_space, action_space, nbytes):
+        """Return the capacity of the largest buffer fitting in a byte budget.
+
+        Args:
+            observation_space (akro.Space): Space of the observations.
+            action_space (akro.Space): Space of the actions.
+            nbytes (int): The byte budget.
+
+        Returns:
+            int: Number of transitions.
+
+        """
+        per_transition = (2 * observation_space.nbytes() +
+                          action_space.nbytes() +
+                          np.dtype(np.float32).itemsize +
+                          np.dtype(bool).itemsize)
+        return int(nbytes // per_transition)
+
+    @property
+    def capacity(self):
+        """int: Maximum number of transitions stored."""
+        return self._capacity
+
+    @property
+    def nbytes(self):
+        """int: Number of bytes used to store the transitions."""
+        return (self._observations.nbytes + self._actions.nbytes +
+                self._next_observations.nbytes + self._rewards.nbytes +
+                self._terminals.nbytes)
+
+    def __len__(self):
+        """Return the number of transitions stored.
+
+        Returns:
+            int: Number of transitions.
+
+        """
+        return self._size
+
+    def add_n(self, observations, actions, rewards, next_observations,
+              terminals):
+        """Add a batch of transitions.
+
+        If the batch is larger than the capacity, only its last transitions
+        are kept.
+
+        Args:
+            observations (object): Batched observations.
+            actions (object): Batched actions.
+            rewards (:obj:`Iterable`): Rewards, one per transition.
+            next_observations (object): Batched next observations.
+            terminals (:obj:`Iterable`): Whether each transition ended an
+                episode.
+
+        """
+        rewards = np.asarray(rewards)
+        n = len(rewards)
+        keep = slice(max(n - self._capacity, 0), n)
+        indices = (self._next + np.arange(n)[keep]) % self._capacity
+        self._observations.write(indices, observations, keep)
+        self._actions.write(indices, actions, keep)
+        self._next_observations.write(indices, next_observations, keep)
+        self._rewards[indices] = rewards[keep]
+        self._terminals[indices] = np.asarray(terminals)[keep]
+        self._next = (self._next + n) % self._capacity
+        self._size = min(self._size + n, self._capacity)
+
+    def sample(self, batch_size, flat=True):
+        """Sample a batch of transitions uniformly at random, using the rng.
+
+        Args:
+            batch_size (int): Number of transitions to sample.
+            flat (bool): If True, observations and actions are returned as
+                flat matrices, as by `flatten_n`. Otherwise, they are
+                returned as by `unflatten_n`.
+
+        Returns:
+            collections.OrderedDict: The observations, actions, rewards,
+                next_observations and terminals of the transitions.
+
+        Raises:
+            ValueError: If the buffer is empty.
+
+        """
+        if not self._size:
+            raise ValueError('Cannot sample from an empty buffer')
+        indices = self._rng.integers(self._size, size=batch_size)
+        return collections.OrderedDict([
+            ('observations', self._observations.read(indices, flat)),
+            ('actions', self._actions.read(indices, flat)),
+            ('rewards', self._rewards[indices]),
+            ('next_observations',
+             self._next_observations.read(indices, flat)),
+            ('terminals', self._terminals[indices]),
+        ])
@@ -1,9 +1,16 @@
 """Decorators used for calling tensorflow and theano functions safely."""
 
 import functools
+import json
+import weakref
 
+from akro import schema
 from akro import tf, theano
 
+# Placeholders created by functions decorated with cache_tf_placeholder, per
+# graph. Entries are dropped with their graph.
+_PLACEHOLDERS = weakref.WeakKeyDictionary()
+
 
 def requires_tf(func):
     """Check tf is installed before calling a function."""
@@ -49,3 +56,40 @@ def requires_theano(func):
         return func(*args, **kwargs)
 
     return check
+
+
+def cache_tf_placeholder(func):
+    """Reuse the placeholders created for equivalent spaces in a graph.
+
+    The decorated method is only called once per default graph, schema of
+    the space (see `akro.schema`), name and batch_dims. Later calls return
+    the same placeholders.
+    """
+    @functools.wraps(func)  # yapf: disable
+    def cached(space, name, batch_dims):
+        """Return the cached placeholders, creating them if needed.
+
+        Args:
+            space (akro.Space): The space to create placeholders for.
+            name (str): name of the placeholders.
+            batch_dims (int or :obj:`list`): batch dimensions to add to the
+                shape of the placeholders.
+
+        Returns:
+            object: The result of func.
+
+        """
+        try:
+            fingerprint = json.dumps(schema.to_schema(space), sort_keys=True)
+        except TypeError:
+            return func(space, name, batch_dims)
+        if isinstance(batch_dims, list):
+            batch_dims = tuple(batch_dims)
+        graph = tf.compat.v1.get_default_graph()
+        placeholders = _PLACEHOLDERS.setdefault(graph, {})
+        key = (fingerprint, name, batch_dims)
+        if key not in placeholders:
+            placeholders[key] = func(space, name, batch_dims)
+        return placeholders[key]
+
+    return cached
@@ -0,0 +1,388 @@
+"""Structural descriptions of Spaces.
+
+A schema is a JSON-serializable description of a Space, from which an
+equivalent Space can be rebuilt. Bounds which are the same for every element
+of a Box are collapsed to a single value.
+
+The leaves of a Space are the spaces which are neither a Dict nor a Tuple.
+Each leaf is identified by its path, a tuple containing the keys of the Dicts
+and indices of the Tuples leading to it. A batch of samples can be stored as
+one array per leaf, with the batch in the first dimension. For a Dict, such a
+batched structure is an OrderedDict of batched values, and for a Tuple a
+tuple of batched values.
+
+A batch can also be stored as a single structured numpy array, a record
+array, whose dtype is returned by `record_dtype`. The fields of a Dict are
+named after its keys and the fields of a Tuple are named f0, f1, etc.
+"""
+import collections
+import collections.abc
+
+import numpy as np
+import numpy.lib.recfunctions as rfn
+
+import akro
+from akro import kernels
+
+
+def _collapse(bound):
+    """Return a JSON-serializable form of a Box bound.
+
+    Args:
+        bound (np.ndarray): Lower or upper bound of a Box.
+
+    Returns:
+        float or list: A single value if every element of bound is the same,
+            else bound as nested lists.
+
+    """
+    flat = bound.reshape(-1)
+    if flat.size and (flat == flat[0]).all():
+        return flat[0].item()
+    return bound.tolist()
+
+
+def to_schema(space):
+    """Describe a Space as a JSON-serializable dict.
+
+    Args:
+        space (akro.Space): The Space to describe.
+
+    Returns:
+        dict: The schema of the space.
+
+    Raises:
+        TypeError: If the type of space is not supported.
+
+    """
+    if isinstance(space, akro.Image):
+        return {'type': 'Image', 'shape': list(space.shape)}
+    elif isinstance(space, akro.Box):
+        return {
+            'type': 'Box',
+            'shape': list(space.shape),
+            'dtype': np.dtype(space.dtype).str,
+            'low': _collapse(space.low),
+            'high': _collapse(space.high),
+        }
+    elif isinstance(space, akro.Discrete):
+        return {'type': 'Discrete', 'n': int(space.n)}
+    elif isinstance(space, akro.MultiDiscrete):
+        return {
+            'type': 'MultiDiscrete',
+            'nvec': space.nvec.tolist(),
+            'dtype': np.dtype(space.dtype).str,
+        }
+    elif isinstance(space, akro.MultiBinary):
+        n = space.n
+        return {
+            'type': 'MultiBinary',
+            'n': int(n) if np.ndim(n) == 0 else [int(i) for i in n],
+        }
+    elif isinstance(space, akro.Dict):
+        return {
+            'type': 'Dict',
+            'spaces': [[key, to_schema(s)] for key, s in space.spaces.items()],
+        }
+    elif isinstance(space, akro.Tuple):
+        return {
+            'type': 'Tuple',
+            'spaces': [to_schema(s) for s in space.spaces],
+        }
+    else:
+        raise TypeError('Unsupported space {}'.format(space))
+
+
+def from_schema(schema):
+    """Build a Space from its schema.
+
+    Args:
+        schema (dict): A schema returned by `to_schema`.
+
+    Returns:
+        akro.Space: A space equivalent to the one described by schema.
+
+    Raises:
+        TypeError: If the schema has an unknown type.
+
+    """
+    kind = schema['type']
+    if kind == 'Image':
+        return akro.Image(tuple(schema['shape']))
+    elif kind == 'Box':
+        shape = tuple(schema['shape'])
+        dtype = np.dtype(schema['dtype'])
+        low = np.broadcast_to(np.asarray(schema['low'], dtype=dtype), shape)
+        high = np.broadcast_to(np.asarray(schema['high'], dtype=dtype), shape)
+        return akro.Box(low=np.array(low), high=np.array(high), dtype=dtype)
+    elif kind == 'Discrete':
+        return akro.Discrete(schema['n'])
+    elif kind == 'MultiDiscrete':
+        return akro.MultiDiscrete(schema['nvec'],
+                                  dtype=np.dtype(schema['dtype']))
+    elif kind == 'MultiBinary':
+        n = schema['n']
+        return akro.MultiBinary(tuple(n) if isinstance(n, list) else n)
+    elif kind == 'Dict':
+        return akro.Dict(
+            collections.OrderedDict([(key, from_schema(s))
+                                     for key, s in schema['spaces']]))
+    elif kind == 'Tuple':
+        return akro.Tuple([from_schema(s) for s in schema['spaces']])
+    else:
+        raise TypeError('Unknown space type {}'.format(kind))
+
+
+def leaves(space, path=()):
+    """Iterate over the leaves of a Space, depth first.
+
+    Args:
+        space (akro.Space): The Space to iterate over.
+        path (tuple): Path of space itself.
+
+    Yields:
+        tuple: The path of the leaf, and the leaf space.
+
+    """
+    if isinstance(space, akro.Dict):
+        for key, s in space.spaces.items():
+            for leaf in leaves(s, path + (key, )):
+                yield leaf
+    elif isinstance(space, akro.Tuple):
+        for i, s in enumerate(space.spaces):
+            for leaf in leaves(s, path + (i, )):
+                yield leaf
+    else:
+        yield path, space
+
+
+def leaf_shape(space):
+    """Return the shape of a single sample of a leaf space.
+
+    Args:
+        space (akro.Space): A leaf space.
+
+    Returns:
+        tuple: The shape of a sample.
+
+    """
+    if isinstance(space, akro.Discrete):
+        return ()
+    return tuple(space.shape)
+
+
+def leaf_dtype(space):
+    """Return the dtype of a single sample of a leaf space.
+
+    Args:
+        space (akro.Space): A leaf space.
+
+    Returns:
+        np.dtype: The dtype of a sample.
+
+    """
+    if isinstance(space, akro.Discrete):
+        return np.dtype(np.int64)
+    return np.dtype(space.dtype)
+
+
+def leaf_values(space, sample):
+    """Return the values of the leaves of a sample.
+
+    This also splits a batched structure into one batched array per leaf.
+
+    Args:
+        space (akro.Space): Space of the sample.
+        sample (:obj:`Iterable`): A sample of space.
+
+    Returns:
+        list: The value of each leaf, in the order of `leaves`.
+
+    """
+    if isinstance(space, akro.Dict):
+        return [
+            value for key, s in space.spaces.items()
+            for value in leaf_values(s, sample[key])
+        ]
+    elif isinstance(space, akro.Tuple):
+        return [
+            value for s, x in zip(space.spaces, sample)
+            for value in leaf_values(s, x)
+        ]
+    else:
+        return [sample]
+
+
+def is_batch(space, batch):
+    """Return whether an object is a batched structure of a Space.
+
+    This only checks the structure. A tuple of samples of a Tuple whose
+    leaves are arrays can pass it too, so it can't tell samples from batches.
+
+    Args:
+        space (akro.Space): The Space of the samples.
+        batch (object): The object to check.
+
+    Returns:
+        bool: True if batch is a batched structure of samples of space.
+
+    """
+    if isinstance(space, akro.Dict):
+        return (isinstance(batch, collections.abc.Mapping)
+                and all(key in batch and is_batch(s, batch[key])
+                        for key, s in space.spaces.items()))
+    elif isinstance(space, akro.Tuple):
+        return (isinstance(batch, tuple) and len(batch) == len(space.spaces)
+                and all(is_batch(s, b) for s, b in zip(space.spaces, batch)))
+    return ((isinstance(batch, np.ndarray)
+             or kernels.array_namespace(batch) is not None)
+            and batch.ndim == len(leaf_shape(space)) + 1)
+
+
+def from_leaf_values(space, values):
+    """Build a sample from the values of its leaves.
+
+    This is the inverse of `leaf_values`. It also builds a batched
+    structure from one batched array per leaf.
+
+    Args:
+        space (akro.Space): Space of the sample.
+        values (:obj:`Iterable`): The value of each leaf, in the order of
+            `leaves`.
+
+    Returns:
+        object: The sample, or batched structure.
+
+    """
+    return _from_leaf_values(space, iter(values))
+
+
+def _from_leaf_values(space, values):
+    """Build a sample from an iterator over the values of its leaves.
+
+    Args:
+        space (akro.Space): Space of the sample.
+        values (iterator): Iterator over the value of each leaf.
+
+    Returns:
+        object: The sample, or batched structure.
+
+    """
+    if isinstance(space, akro.Dict):
+        return collections.OrderedDict([
+            (key, _from_leaf_values(s, values))
+            for key, s in space.spaces.items()
+        ])
+    elif isinstance(space, akro.Tuple):
+        return tuple(_from_leaf_values(s, values) for s in space.spaces)
+    else:
+        return next(values)
+
+
+def record_dtype(space):
+    """Return the structured dtype of the records of a Space.
+
+    Args:
+        space (akro.Space): The Space of the records.
+
+    Returns:
+        np.dtype: A structured dtype for a Dict or Tuple, else the dtype of
+            the leaf, with the shape of a sample as a subarray.
+
+    """
+    if isinstance(space, akro.Dict):
+        return np.dtype([(key, record_dtype(s))
+                         for key, s in space.spaces.items()])
+    elif isinstance(space, akro.Tuple):
+        return np.dtype([('f{}'.format(i), record_dtype(s))
+                         for i, s in enumerate(space.spaces)])
+    shape = leaf_shape(space)
+    if shape:
+        return np.dtype((leaf_dtype(space), shape))
+    return leaf_dtype(space)
+
+
+def to_records(space, batch):
+    """Copy a batched structure into a record array.
+
+    Args:
+        space (akro.Space): Space of the samples.
+        batch (object): A batched structure of samples of space.
+
+    Returns:
+        np.ndarray: A 1-D array of dtype `record_dtype(space)`, with one
+            record per sample.
+
+    """
+    values = leaf_values(space, batch)
+    records = np.empty(len(values[0]), dtype=record_dtype(space))
+    for path, value in zip([path for path, _ in leaves(space)], values):
+        _field(space, records, path)[...] = value
+    return records
+
+
+def from_records(space, records):
+    """Return the batched structure of a record array.
+
+    Args:
+        space (akro.Space): Space of the samples.
+        records (np.ndarray): An array of dtype `record_dtype(space)`.
+
+    Returns:
+        object: A batched structure whose leaves are views of the fields of
+            records.
+
+    """
+    return from_leaf_values(
+        space, [_field(space, records, path) for path, _ in leaves(space)])
+
+
+def flatten_records(space, records, out=None):
+    """Flatten a record array, as `flatten_n` does for a batch of samples.
+
+    If every leaf is a Box, this is a single cast, or a view of records if
+    every leaf has the same dtype.
+
+    Args:
+        space (akro.Space): Space of the samples.
+        records (np.ndarray): A 1-D array of dtype `record_dtype(space)`.
+        out (np.ndarray): Optional array of shape (len(records), flat_dim)
+            to write the flattened samples to.
+
+    Returns:
+        np.ndarray: The flattened samples, one per row, or out if it is
+            given.
+
+    """
+    space_leaves = list(leaves(space))
+    if all(isinstance(s, akro.Box) for _, s in space_leaves):
+        return kernels.copy_to(
+            out,
+            rfn.structured_to_unstructured(records).reshape(
+                (len(records), space.flat_dim)))
+    blocks = [
+        s.flatten_n(_field(space, records, path)) for path, s in space_leaves
+    ]
+    offsets = np.concatenate([[0],
+                              np.cumsum([s.flat_dim
+                                         for _, s in space_leaves])])
+    return kernels.scatter(blocks, offsets.astype(int), out=out)
+
+
+def _field(space, records, path):
+    """Return the field of a record array holding a leaf.
+
+    Args:
+        space (akro.Space): Space of the records.
+        records (np.ndarray): An array of dtype `record_dtype(space)`.
+        path (tuple): Path of the leaf, as returned by `leaves`.
+
+    Returns:
+        np.ndarray: A view of the values of the leaf.
+
+    """
+    for key in path:
+        name = key if isinstance(space, akro.Dict) else 'f{}'.format(key)
+        records = records[name]
+        space = space.spaces[key]
+    return records
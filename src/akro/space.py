@@ -1,8 +1,18 @@
 """The abstract base class for all Space types."""
 
 import abc
+import collections
+import copy
+import itertools
 
 import gym.spaces
+import numpy as np
+
+import akro
+from akro import kernels
+from akro import schema
+from akro import tf
+from akro.requires import requires_tf
 
 
 class Space(abc.ABC, gym.spaces.Space):
@@ -10,8 +20,34 @@ class Space(abc.ABC, gym.spaces.Space):
 
     Allows you to write generic code that applies to any Environment.
     E.g. to choose a random action.
+
+    Spaces are pickled compactly, as the arguments needed to rebuild them.
+    The generator set with `set_rng` is only pickled if pickle_rng is True.
     """
 
+    pickle_rng = False
+
+    def __reduce_ex__(self, protocol):
+        """Return the arguments needed to pickle the space.
+
+        Spaces whose own class defines `_init_args` are pickled as the
+        arguments of their constructor. Other spaces, such as subclasses
+        with a different constructor, are pickled with their attributes.
+
+        Args:
+            protocol (int): The pickle protocol.
+
+        Returns:
+            tuple: The callable rebuilding the space and its arguments.
+
+        """
+        if '_init_args' not in type(self).__dict__:
+            return super().__reduce_ex__(protocol)
+        rng = getattr(self, '_rng', None)
+        if self.pickle_rng and rng is not None:
+            return (_unpickle_with_rng, (type(self), self._init_args(), rng))
+        return (type(self), self._init_args())
+
     @abc.abstractmethod
     def flatten(self, x):
         """Return a flattened observation x.
@@ -37,15 +73,18 @@ class Space(abc.ABC, gym.spaces.Space):
         """
 
     @abc.abstractmethod
-    def flatten_n(self, xs):
+    def flatten_n(self, xs, out=None):
         """Return flattened observations xs.
 
         Args:
             xs (:obj:`Iterable`): The object to reshape and flatten
+            out (np.ndarray): Optional array of shape (len(xs), flat_dim) to
+                write the flattened observations to, e.g. one allocated by
+                `empty_flat`.
 
         Returns:
             np.ndarray: An array of xs in a shape inferred by the size of
-                its first element.
+                its first element, or out if it is given.
 
         """
 
@@ -62,6 +101,319 @@ class Space(abc.ABC, gym.spaces.Space):
 
         """
 
+    def sample_n(self, n):
+        """Randomly sample n elements of the space at once.
+
+        Args:
+            n (int): Number of samples.
+
+        Returns:
+            object: The samples, as a batched structure (see `stack_n`).
+
+        """
+        return self.stack_n([self.sample() for _ in range(n)])
+
+    def batched(self, n):
+        """Return the space of batches of n samples of this space.
+
+        See `akro.Batched`.
+
+        Args:
+            n (int): Number of samples in a batch, e.g. the number of
+                parallel environments.
+
+        Returns:
+            akro.Batched: The space of batches.
+
+        """
+        return akro.Batched(self, n)
+
+    def stack_n(self, samples):
+        """Stack samples into a batched structure.
+
+        The value of every leaf of the samples (see `akro.schema.leaves`) is
+        written into a preallocated array, with the samples in the first
+        dimension. The result can be passed to `flatten_batch`.
+
+        Args:
+            samples (:obj:`Iterable`): Samples of the space.
+
+        Returns:
+            object: An array for a Box or Discrete, an OrderedDict of batches
+                for a Dict and a tuple of batches for a Tuple.
+
+        """
+        samples = list(samples)
+        arrays = [
+            np.empty((len(samples), ) + schema.leaf_shape(leaf),
+                     dtype=schema.leaf_dtype(leaf))
+            for _, leaf in schema.leaves(self)
+        ]
+        for i, sample in enumerate(samples):
+            for array, value in zip(arrays, schema.leaf_values(self, sample)):
+                array[i] = value
+        return schema.from_leaf_values(self, arrays)
+
+    def unstack_n(self, batch):
+        """Split a batched structure into samples.
+
+        This is the inverse of `stack_n`. The leaves of the samples are views
+        of the arrays of batch.
+
+        Args:
+            batch (object): A batched structure of samples of the space.
+
+        Returns:
+            list: The samples of batch.
+
+        """
+        values = schema.leaf_values(self, batch)
+        return [
+            schema.from_leaf_values(self, [value[i] for value in values])
+            for i in range(len(values[0]))
+        ]
+
+    def flatten_batch(self, batch, out=None):
+        """Flatten a batched structure.
+
+        Unlike `flatten_n`, which reads any sequence as a list of samples,
+        batch is always read as a batched structure (see `stack_n`).
+
+        Args:
+            batch (object): A batched structure of samples of the space.
+            out (np.ndarray): Optional array of shape (n, flat_dim) to write
+                the flattened samples to, e.g. one allocated by `empty_flat`.
+
+        Returns:
+            np.ndarray: The flattened samples, or out if it is given.
+
+        """
+        return self.flatten_n(batch, out=out)
+
+    @property
+    def rng(self):
+        """np.random.Generator: Generator used to sample from the space.
+
+        Unless one is set with `set_rng`, this is derived from the gym random
+        state of the space, so `seed` still makes sampling reproducible.
+
+        """
+        rng = getattr(self, '_rng', None)
+        if rng is not None:
+            return rng
+        source = self.np_random
+        derived = getattr(self, '_derived_rng', None)
+        if derived is None or derived[0] is not source:
+            if isinstance(source, np.random.Generator):
+                derived = (source, source)
+            else:
+                derived = (source,
+                           np.random.default_rng(
+                               source.randint(2**31, size=4)))
+            self._derived_rng = derived
+        return derived[1]
+
+    def set_rng(self, seed=None):
+        """Give the space its own random number generator.
+
+        Subspaces of a Dict or Tuple get independent streams spawned from
+        the same seed.
+
+        Args:
+            seed (int or np.random.SeedSequence or np.random.Generator): Seed
+                of the generator, or the generator itself. If None, fresh
+                entropy is used.
+
+        Returns:
+            np.random.Generator: The generator of the space.
+
+        """
+        if isinstance(seed, np.random.Generator):
+            self._seed_sequence = None
+            self._rng = seed
+        else:
+            if not isinstance(seed, np.random.SeedSequence):
+                seed = np.random.SeedSequence(seed)
+            self._seed_sequence = seed
+            self._rng = np.random.default_rng(seed)
+        return self._rng
+
+    def spawn(self, n):
+        """Create copies of the space with independent random streams.
+
+        The streams are spawned from the seed of the space, so spawning from
+        a seeded space is reproducible, and no two copies share any random
+        state. This is useful to give every parallel worker its own space.
+
+        Args:
+            n (int): Number of copies.
+
+        Returns:
+            list[Space]: The copies of the space.
+
+        """
+        spaces = []
+        for seed in self._spawn_seeds(n):
+            space = copy.deepcopy(self)
+            space.set_rng(seed)
+            spaces.append(space)
+        return spaces
+
+    def _spawn_seeds(self, n):
+        """Spawn independent seeds from the seed of the space.
+
+        Args:
+            n (int): Number of seeds.
+
+        Returns:
+            list[np.random.SeedSequence]: The seeds.
+
+        """
+        seed = getattr(self, '_seed_sequence', None)
+        if seed is None:
+            seed = np.random.SeedSequence(self.rng.integers(2**63, size=2))
+            self._seed_sequence = seed
+        return seed.spawn(n)
+
+    def flatten_chunks(self, xs, chunk_size):
+        """Flatten observations from an iterable, in fixed-size chunks.
+
+        Each chunk is flattened with `flatten_n` straight into the same
+        output buffer, so memory use is bounded by chunk_size rather than by
+        the number of observations. The buffer is allocated once with
+        `empty_flat`, with the dtype `flatten_n` returns for the first
+        chunk. A chunk is only valid until the next one is requested, so
+        copy it to keep it.
+
+        Args:
+            xs (:obj:`Iterable`): The observations to flatten. If xs is an
+                np.ndarray, chunks are flattened from slices of it.
+            chunk_size (int): Number of observations per chunk.
+
+        Yields:
+            np.ndarray: A chunk of shape (rows, self.flat_dim), where rows is
+                chunk_size except for the last chunk, which may be shorter.
+
+        """
+        if isinstance(xs, np.ndarray):
+            chunks = (xs[start:start + chunk_size]
+                      for start in range(0, len(xs), chunk_size))
+        else:
+            chunks = _chunks(xs, chunk_size)
+        buf = None
+        for chunk in chunks:
+            if buf is None:
+                flat = self.flatten_n(chunk)
+                buf = self.empty_flat(chunk_size, dtype=flat.dtype)
+                out = buf[:len(chunk)]
+            else:
+                out = buf[:len(chunk)]
+                flat = self.flatten_n(chunk, out=out)
+            yield kernels.copy_to(out, flat)
+
+    def unflatten_chunks(self, xs, chunk_size):
+        """Unflatten flat observations from an iterable, in fixed-size chunks.
+
+        Flat observations are collected into the same buffer, and each chunk
+        is unflattened from it with `unflatten_n`. Since unflattened values
+        may be views of that buffer, a chunk is only valid until the next
+        one is requested.
+
+        Args:
+            xs (:obj:`Iterable`): The flat observations to unflatten. If xs
+                is an np.ndarray, chunks are unflattened from slices of it.
+            chunk_size (int): Number of observations per chunk.
+
+        Yields:
+            object: The result of `unflatten_n` for each chunk.
+
+        """
+        if isinstance(xs, np.ndarray):
+            for start in range(0, len(xs), chunk_size):
+                yield self.unflatten_n(xs[start:start + chunk_size])
+            return
+        buf = None
+        for chunk in _chunks(xs, chunk_size):
+            if buf is None:
+                first = np.asarray(chunk[0])
+                buf = np.empty((chunk_size, ) + first.shape,
+                               dtype=first.dtype)
+            for i, x in enumerate(chunk):
+                buf[i] = x
+            yield self.unflatten_n(buf[:len(chunk)])
+
+    def pack_episodes(self, episodes, max_length=None):
+        """Flatten episodes of different lengths into a padded batch.
+
+        Each episode is flattened with `flatten_n` straight into its column
+        of a zero-padded, time-major array, which is allocated once with
+        `empty_flat`. The array has the dtype `flatten_n` returns for the
+        first non-empty episode, or `flat_dtype` if every episode is empty.
+
+        Args:
+            episodes (:obj:`Iterable`): The episodes, each a sequence of
+                samples.
+            max_length (int): Number of time steps of the output. If None,
+                the length of the longest episode is used.
+
+        Returns:
+            np.ndarray: The flattened samples, with shape
+                (max_length, len(episodes), self.flat_dim).
+            np.ndarray: A boolean mask of shape (max_length, len(episodes)),
+                True for the time steps belonging to an episode.
+
+        Raises:
+            ValueError: If an episode is longer than max_length.
+
+        """
+        episodes = [list(episode) for episode in episodes]
+        lengths = np.array([len(episode) for episode in episodes], dtype=int)
+        longest = lengths.max() if len(lengths) else 0
+        if max_length is None:
+            max_length = longest
+        elif longest > max_length:
+            raise ValueError('Episode of length {} is longer than '
+                             'max_length {}'.format(longest, max_length))
+        padded = None
+        for i, episode in enumerate(episodes):
+            if not episode:
+                continue
+            if padded is None:
+                flat = self.flatten_n(episode)
+                padded = _zeros_padded(self, max_length, len(episodes),
+                                       flat.dtype)
+                out = padded[:len(episode), i]
+            else:
+                out = padded[:len(episode), i]
+                flat = self.flatten_n(episode, out=out)
+            kernels.copy_to(out, flat)
+        if padded is None:
+            padded = _zeros_padded(self, max_length, len(episodes),
+                                   self.flat_dtype)
+        mask = np.arange(max_length)[:, np.newaxis] < lengths
+        return padded, mask
+
+    @staticmethod
+    def unpack_episodes(padded, mask):
+        """Split a padded batch into episodes.
+
+        This is the inverse of `pack_episodes`.
+
+        Args:
+            padded (np.ndarray): Flattened samples, with shape
+                (max_length, episodes, flat_dim).
+            mask (np.ndarray): A boolean mask of shape (max_length,
+                episodes), True for the time steps belonging to an episode.
+                The time steps of each episode must come first.
+
+        Returns:
+            list[np.ndarray]: The flattened samples of each episode, as
+                views of padded.
+
+        """
+        lengths = np.asarray(mask).sum(axis=0)
+        return [padded[:length, i] for i, length in enumerate(lengths)]
+
     @abc.abstractmethod
     def concat(self, other):
         """Concatenate with another space of the same type.
@@ -78,6 +430,164 @@ class Space(abc.ABC, gym.spaces.Space):
     def flat_dim(self):
         """Return the length of the flattened vector of the space."""
 
+    @property
+    def flat_dtype(self):
+        """np.dtype: dtype of the flattened samples of the space."""
+        return np.result_type(
+            *[leaf.flat_dtype for _, leaf in schema.leaves(self)])
+
+    def empty_flat(self, n, dtype=None, alignment=64, order='C'):
+        """Allocate an uninitialized array for n flattened samples.
+
+        The array can be passed as the out argument of `flatten_n`, so the
+        flattened samples are written straight to memory laid out for the
+        compute kernels consuming them.
+
+        Args:
+            n (int): Number of samples.
+            dtype (np.dtype): dtype of the array. If None, `flat_dtype` is
+                used.
+            alignment (int): Alignment of the first element in bytes, see
+                `akro.kernels.empty_aligned`.
+            order (str): 'C' for a row-major array, 'F' for a column-major
+                one.
+
+        Returns:
+            np.ndarray: An array of shape (n, flat_dim).
+
+        """
+        if dtype is None:
+            dtype = self.flat_dtype
+        return kernels.empty_aligned((n, self.flat_dim),
+                                     dtype=dtype,
+                                     alignment=alignment,
+                                     order=order)
+
+    def nbytes(self, kind='sample'):
+        """Return the number of bytes needed to store one sample.
+
+        Args:
+            kind (str): Representation of the sample. 'sample' for the
+                values of its leaves in their native dtypes, as stored by
+                `akro.ReplayBuffer`, 'flat' for the flattened sample, and
+                'compact' for the leaves encoded in their `compact_dtype`.
+
+        Returns:
+            int: Number of bytes per sample.
+
+        """
+        return sum(self.leaf_nbytes(kind).values())
+
+    def leaf_nbytes(self, kind='sample'):
+        """Return the number of bytes needed to store each leaf of a sample.
+
+        Args:
+            kind (str): Representation of the sample, see `nbytes`.
+
+        Returns:
+            collections.OrderedDict: The number of bytes per sample of each
+                leaf, by path (see `akro.schema.leaves`).
+
+        Raises:
+            ValueError: If kind is unknown.
+
+        """
+        if kind not in ('sample', 'flat', 'compact'):
+            raise ValueError('Unknown kind {!r}'.format(kind))
+        sizes = collections.OrderedDict()
+        for path, leaf in schema.leaves(self):
+            if kind == 'flat':
+                sizes[path] = int(leaf.flat_dim) * self.flat_dtype.itemsize
+                continue
+            if kind == 'sample':
+                sizes[path] = (int(np.prod(schema.leaf_shape(leaf))) *
+                               schema.leaf_dtype(leaf).itemsize)
+            else:
+                sizes[path] = leaf.compact_nbytes
+        return sizes
+
+    @property
+    def compact_nbytes(self):
+        """int: Number of bytes of a sample of a leaf in its compact_dtype."""
+        return (int(np.prod(schema.leaf_shape(self))) *
+                self.compact_dtype.itemsize)
+
+    def capacity(self, nbytes, kind='sample'):
+        """Return how many samples fit in a byte budget.
+
+        Args:
+            nbytes (int): The byte budget.
+            kind (str): Representation of the samples, see `nbytes`.
+
+        Returns:
+            int: Number of samples.
+
+        """
+        return int(nbytes // self.nbytes(kind))
+
+    @requires_tf
+    def tf_signature(self, batch_dims=1):
+        """Return the signature of batched samples of the space.
+
+        With TensorFlow 2.4 or later, this can be passed as the
+        output_signature of `tf.data.Dataset.from_generator`, to build input
+        pipelines yielding batched structures (see `stack_n`) straight from
+        the space. Older versions, including the TensorFlow 1.x supported by
+        akro, take `tf_types_and_shapes` instead.
+
+        Args:
+            batch_dims (int): Number of batch dimensions, of unknown size.
+
+        Returns:
+            object: A tf.TensorSpec per leaf, in a batched structure.
+
+        """
+        specs = [
+            tf.TensorSpec(shape, dtype=dtype)
+            for dtype, shape in self._tf_leaf_types_and_shapes(batch_dims)
+        ]
+        return schema.from_leaf_values(self, specs)
+
+    @requires_tf
+    def tf_types_and_shapes(self, batch_dims=1):
+        """Return the types and shapes of batched samples of the space.
+
+        These are the output_types and output_shapes arguments of
+        `tf.data.Dataset.from_generator`:
+
+            types, shapes = space.tf_types_and_shapes()
+            dataset = tf.data.Dataset.from_generator(
+                generator, output_types=types, output_shapes=shapes)
+
+        Args:
+            batch_dims (int): Number of batch dimensions, of unknown size.
+
+        Returns:
+            tuple: A tf.DType per leaf in a batched structure, and a
+                tf.TensorShape per leaf in a batched structure.
+
+        """
+        types_and_shapes = self._tf_leaf_types_and_shapes(batch_dims)
+        types = [dtype for dtype, _ in types_and_shapes]
+        shapes = [tf.TensorShape(shape) for _, shape in types_and_shapes]
+        return (schema.from_leaf_values(self, types),
+                schema.from_leaf_values(self, shapes))
+
+    def _tf_leaf_types_and_shapes(self, batch_dims):
+        """Return the TensorFlow dtype and batched shape of every leaf.
+
+        Args:
+            batch_dims (int): Number of batch dimensions, of unknown size.
+
+        Returns:
+            list[tuple]: The tf.DType and the shape, as a list, of every
+                leaf.
+
+        """
+        return [(tf.as_dtype(schema.leaf_dtype(leaf)),
+                 [None] * batch_dims + list(schema.leaf_shape(leaf)))
+                for _, leaf in schema.leaves(self)]
+
     @abc.abstractmethod
     def to_tf_placeholder(self, name, batch_dims):
         """Create a tensor placeholder from the Space object.
@@ -108,3 +618,65 @@ class Space(abc.ABC, gym.spaces.Space):
                 modified by batch_dims.
 
         """
+
+
+def _unpickle_with_rng(cls, args, rng):
+    """Rebuild a pickled space and restore its generator.
+
+    Args:
+        cls (type): Type of the space.
+        args (tuple): Arguments of the constructor.
+        rng (np.random.Generator): Generator of the space.
+
+    Returns:
+        Space: The rebuilt space.
+
+    """
+    space = cls(*args)
+    space.pickle_rng = True
+    space._rng = rng
+    space._seed_sequence = None
+    return space
+
+
+def _zeros_padded(space, max_length, n, dtype):
+    """Allocate a zeroed, time-major batch of flattened episodes.
+
+    Args:
+        space (Space): Space of the samples.
+        max_length (int): Number of time steps.
+        n (int): Number of episodes.
+        dtype (np.dtype): dtype of the batch.
+
+    Returns:
+        np.ndarray: An array of shape (max_length, n) + the shape of a
+            flattened sample, allocated with `Space.empty_flat`.
+
+    """
+    padded = space.empty_flat(max_length * n, dtype=dtype)
+    padded = padded.reshape((max_length, n) + padded.shape[1:])
+    padded.fill(0)
+    return padded
+
+
+def _chunks(xs, chunk_size):
+    """Split an iterable into lists of at most chunk_size items.
+
+    Args:
+        xs (:obj:`Iterable`): The items to split.
+        chunk_size (int): Maximum number of items per list.
+
+    Yields:
+        list: The next chunk_size items, or the remaining items.
+
+    Raises:
+        ValueError: If chunk_size is not positive.
+
+    """
+    if chunk_size < 1:
+        raise ValueError('chunk_size must be positive')
+    it = iter(xs)
+    chunk = list(itertools.islice(it, chunk_size))
+    while chunk:
+        yield chunk
+        chunk = list(itertools.islice(it, chunk_size))
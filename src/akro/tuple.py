@@ -8,7 +8,11 @@ import gym.spaces
 import numpy as np
 
 import akro
-from akro.requires import requires_tf, requires_theano
+from akro import kernels
+from akro import schema
+from akro import tf, theano
+from akro.requires import (cache_tf_placeholder, requires_tf,
+                           requires_theano)
 from akro.space import Space
 
 
@@ -23,6 +27,60 @@ class Tuple(gym.spaces.Tuple, Space):
         """Return the length of the flattened vector of the space."""
         return np.sum([c.flat_dim for c in self.spaces])
 
+    @property
+    def flat_offsets(self):
+        """Return the offsets of each space in a flattened observation.
+
+        Returns:
+            np.ndarray: An array with one more entry than there are spaces.
+                The flattened value of the i-th space spans the indices
+                offsets[i]:offsets[i + 1].
+
+        """
+        dims = [c.flat_dim for c in self.spaces]
+        return np.concatenate([[0], np.cumsum(dims)]).astype(int)
+
+    def sample(self):
+        """Randomly sample an element of the space.
+
+        Each subspace is sampled with its own generator.
+
+        Returns:
+            tuple: A sample of the space.
+
+        """
+        return tuple(space.sample() for space in self.spaces)
+
+    def sample_n(self, n):
+        """Randomly sample n elements of the space at once.
+
+        Args:
+            n (int): Number of samples.
+
+        Returns:
+            tuple: The samples, as a batched structure (see `stack_n`).
+
+        """
+        return tuple(space.sample_n(n) for space in self.spaces)
+
+    def set_rng(self, seed=None):
+        """Give the space and its subspaces their own generators.
+
+        Args:
+            seed (int or np.random.SeedSequence or np.random.Generator): Seed
+                of the generator, or the generator itself. If None, fresh
+                entropy is used.
+
+        Returns:
+            np.random.Generator: The generator of the space.
+
+        """
+        rng = super().set_rng(seed)
+        for space, child in zip(self.spaces,
+                                self._spawn_seeds(len(self.spaces))):
+            space.set_rng(child)
+        return rng
+
     def flatten(self, x):
         """Return a flattened observation x.
 
@@ -33,24 +91,52 @@ class Tuple(gym.spaces.Tuple, Space):
             np.ndarray: An array of x collapsed into one dimension.
 
         """
-        return np.concatenate([c.flatten(xi) for c, xi in zip(self.spaces, x)])
+        return kernels.concat(
+            [c.flatten(xi) for c, xi in zip(self.spaces, x)])
 
-    def flatten_n(self, obs):
+    def flatten_n(self, obs, out=None):
         """Return flattened observations obs.
 
         Args:
-            obs (:obj:`Iterable`): The object to reshape and flatten
+            obs (:obj:`Iterable`): The object to reshape and flatten. This
+                may also be a record array (see `to_records`). Batched
+                structures are flattened by `flatten_batch`.
+            out (np.ndarray): Optional array of shape (len(obs), flat_dim)
+                to write the flattened observations to, e.g. one allocated by
+                `empty_flat`.
 
         Returns:
             np.ndarray: An array of obs in a shape inferred by the size of
-                its first element.
+                its first element, or out if it is given.
 
         """
-        obs_regrouped = [[x[i] for x in obs] for i in range(len(obs[0]))]
+        if isinstance(obs, np.ndarray) and obs.dtype.names is not None:
+            return schema.flatten_records(self, obs, out=out)
+        obs = list(obs)
+        if not obs:
+            return kernels.copy_to(out, np.zeros((0, self.flat_dim)))
+        obs_regrouped = zip(*obs)
         flat_regrouped = [
             c.flatten_n(xi) for c, xi in zip(self.spaces, obs_regrouped)
         ]
-        return np.concatenate(flat_regrouped, axis=-1)
+        return kernels.scatter(flat_regrouped, self.flat_offsets, out=out)
+
+    def flatten_batch(self, batch, out=None):
+        """Flatten a batched structure.
+
+        Args:
+            batch (tuple): A batched structure of samples (see `stack_n`).
+            out (np.ndarray): Optional array of shape (n, flat_dim) to write
+                the flattened samples to.
+
+        Returns:
+            np.ndarray: The flattened samples, or out if it is given.
+
+        """
+        return kernels.scatter(
+            [c.flatten_batch(b) for c, b in zip(self.spaces, batch)],
+            self.flat_offsets,
+            out=out)
 
     def unflatten(self, x):
         """Return an unflattened observation x.
@@ -62,8 +148,7 @@ class Tuple(gym.spaces.Tuple, Space):
             tuple: A tuple of x in the shape of self.shape.
 
         """
-        dims = [c.flat_dim for c in self.spaces]
-        flat_x = np.split(x, np.cumsum(dims)[:-1])
+        flat_x = kernels.gather(x, self.flat_offsets)
         return tuple(c.unflatten(xi) for c, xi in zip(self.spaces, flat_x))
 
     def unflatten_n(self, obs):
@@ -77,14 +162,49 @@ class Tuple(gym.spaces.Tuple, Space):
                 its first element and self.shape.
 
         """
-        dims = [c.flat_dim for c in self.spaces]
-        flat_obs = np.split(obs, np.cumsum(dims)[:-1], axis=-1)
+        flat_obs = kernels.gather(obs, self.flat_offsets)
         unflat_obs = [
             c.unflatten_n(xi) for c, xi in zip(self.spaces, flat_obs)
         ]
         unflat_obs_grouped = list(zip(*unflat_obs))
         return unflat_obs_grouped
 
+    @property
+    def record_dtype(self):
+        """np.dtype: Structured dtype holding one sample per record.
+
+        The fields are named after the indices of the subspaces, as f0,
+        f1, etc. Discrete values are stored as int64.
+        """
+        return schema.record_dtype(self)
+
+    def to_records(self, batch):
+        """Copy a batch of samples into a single record array.
+
+        Args:
+            batch (object): A batched structure of samples (see
+                `akro.schema`).
+
+        Returns:
+            np.ndarray: A 1-D array of dtype `record_dtype`, with one record
+                per sample.
+
+        """
+        return schema.to_records(self, batch)
+
+    def from_records(self, records):
+        """Return the batched structure of a record array, without copying.
+
+        Args:
+            records (np.ndarray): An array of dtype `record_dtype`.
+
+        Returns:
+            object: A batched structure (see `akro.schema`) of views of the
+                fields of records.
+
+        """
+        return schema.from_records(self, records)
+
     def concat(self, other):
         """Concatenate with another Tuple space.
 
@@ -98,6 +218,15 @@ class Tuple(gym.spaces.Tuple, Space):
         assert isinstance(other, Tuple)
         return Tuple(self.spaces + other.spaces)
 
+    def _init_args(self):
+        """Return the arguments of the constructor rebuilding the space.
+
+        Returns:
+            tuple: Positional arguments of the constructor.
+
+        """
+        return (list(self.spaces), )
+
     def __hash__(self):
         """Hash the Tuple Space.
 
@@ -108,13 +237,54 @@ class Tuple(gym.spaces.Tuple, Space):
         return hash(tuple(self.spaces))
 
     @requires_tf
+    def tf_flatten(self, x, dtype=None):
+        """Flatten a batch of samples in the TensorFlow graph.
+
+        Each component is flattened by its space, so compact values such as
+        Discrete indices or uint8 images can be fed directly. The layout of
+        the result is the same as `flatten_n`, see `flat_offsets`.
+
+        Args:
+            x (tuple): A tensor of samples per component, with the batch in
+                the first dimension.
+            dtype (tf.DType): dtype of the flattened tensor. If None,
+                tf.float32 is used.
+
+        Returns:
+            tf.Tensor: The flattened samples, with shape [batch, flat_dim].
+
+        """
+        return tf.concat(
+            [space.tf_flatten(xi, dtype) for space, xi in zip(self.spaces, x)],
+            axis=-1)
+
+    @requires_tf
+    def tf_unflatten(self, x):
+        """Unflatten a batch of samples in the TensorFlow graph.
+
+        Args:
+            x (tf.Tensor): Flattened samples, with shape [batch, flat_dim].
+
+        Returns:
+            tuple: The samples of each component, as tensors.
+
+        """
+        blocks = tf.split(x, np.diff(self.flat_offsets).tolist(), axis=-1)
+        return tuple(
+            space.tf_unflatten(block)
+            for space, block in zip(self.spaces, blocks))
+
+    @requires_tf
+    @cache_tf_placeholder
     def to_tf_placeholder(self, name, batch_dims):
         """Create a tensor placeholder from the Space object.
 
+        Placeholders are cached per graph, see `cache_tf_placeholder`.
+
         Args:
-            name (str): name to append to the akro type when naming
-                the tensor.  e.g. When name is 'tmp' - 'Box-tmp',
-                'Discrete-tmp'.
+            name (str): name of the variable. The placeholder of the i-th
+                space is named name-i, so identical spaces get their own
+                placeholders.
 
             batch_dims (:obj:`list`): batch dimensions to add to the
                 shape of each object in self.spaces.
@@ -126,8 +296,49 @@ class Tuple(gym.spaces.Tuple, Space):
 
         """
         return tuple(
-            s.to_tf_placeholder(type(s).__name__ + '-' + name, batch_dims)
-            for s in self.spaces)
+            s.to_tf_placeholder('{}-{}'.format(name, i), batch_dims)
+            for i, s in enumerate(self.spaces))
+
+    @requires_theano
+    def theano_flatten(self, x, dtype=None):
+        """Flatten a batch of samples symbolically.
+
+        Each component is flattened by its space, so compact values such as
+        Discrete indices or uint8 images can be passed directly to compiled
+        functions. The layout of the result is the same as `flatten_n`.
+
+        Args:
+            x (tuple): A variable of samples per component, with the batch
+                in the first dimension.
+            dtype (str): dtype of the flattened variable. If None,
+                theano.config.floatX is used.
+
+        Returns:
+            theano.tensor.TensorVariable: The flattened samples, with shape
+                [batch, flat_dim].
+
+        """
+        return theano.tensor.concatenate(
+            [space.theano_flatten(xi, dtype)
+             for space, xi in zip(self.spaces, x)],
+            axis=1)
+
+    @requires_theano
+    def theano_unflatten(self, x):
+        """Unflatten a batch of samples symbolically.
+
+        Args:
+            x (theano.tensor.TensorVariable): Flattened samples, with shape
+                [batch, flat_dim].
+
+        Returns:
+            tuple: The samples of each component, as variables.
+
+        """
+        offsets = self.flat_offsets.tolist()
+        return tuple(
+            space.theano_unflatten(x[:, start:end]) for space, start, end in
+            zip(self.spaces, offsets[:-1], offsets[1:]))
 
     @requires_theano
     def to_theano_tensor(self, name, batch_dims):
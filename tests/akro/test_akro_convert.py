@@ -1,3 +1,4 @@
+import gc
 import unittest
 
 import gym.spaces
@@ -43,3 +44,63 @@ class TestSpace(unittest.TestCase):
             (gym.spaces.Discrete(2), gym.spaces.Discrete(3)))
         tup = akro.from_gym(obj)
         assert isinstance(tup, akro.Tuple)
+
+    def test_convert_akro_space(self):
+        img = akro.Image((3, 3, 3))
+        assert akro.from_gym(img) is img
+        d = akro.Dict({'image': img})
+        assert d.spaces['image'] is img
+
+    def test_convert_interned(self):
+        obj = gym.spaces.Dict({
+            'position': gym.spaces.Box(0.0, 1.0, (3, )),
+            'action': gym.spaces.Discrete(3)
+        })
+        same = gym.spaces.Dict({
+            'position': gym.spaces.Box(0.0, 1.0, (3, )),
+            'action': gym.spaces.Discrete(3)
+        })
+        first = akro.from_gym(obj, intern=True)
+        assert akro.from_gym(same, intern=True) is first
+        assert akro.from_gym(obj) is not first
+        box = akro.from_gym(gym.spaces.Box(0.0, 1.0, (3, )), intern=True)
+        assert box is first.spaces['position']
+        assert not box.low.flags.writeable
+        other = akro.from_gym(gym.spaces.Box(0.0, 2.0, (3, )), intern=True)
+        assert other is not box
+
+    def test_convert_interned_image(self):
+        obj = gym.spaces.Box(low=0, high=255, shape=(3, 3, 3))
+        img = akro.from_gym(obj, is_image=True, intern=True)
+        assert isinstance(img, akro.Image)
+        box = akro.from_gym(obj, intern=True)
+        assert not isinstance(box, akro.Image)
+
+    def test_convert_interned_akro_space(self):
+        mine = akro.Box(0.0, 5.0, (4, ))
+        assert akro.from_gym(mine, intern=True) is mine
+        assert mine.low.flags.writeable
+        box = akro.from_gym(gym.spaces.Box(0.0, 5.0, (4, )), intern=True)
+        assert box is not mine
+        assert not box.low.flags.writeable
+
+    def test_convert_interned_evicted(self):
+        obj = gym.spaces.Discrete(7)
+        key = akro._fingerprint(obj)
+        first = akro.from_gym(obj, intern=True)
+        assert akro._INTERNED[key] is first
+        del first
+        gc.collect()
+        assert key not in akro._INTERNED
+
+    def test_convert_multi_discrete(self):
+        obj = gym.spaces.MultiDiscrete([3, 2])
+        multi = akro.from_gym(obj)
+        assert isinstance(multi, akro.MultiDiscrete)
+        assert (multi.nvec == obj.nvec).all()
+
+    def test_convert_multi_binary(self):
+        obj = gym.spaces.Dict({'buttons': gym.spaces.MultiBinary(4)})
+        d = akro.from_gym(obj, intern=True)
+        assert isinstance(d.spaces['buttons'], akro.MultiBinary)
+        assert akro.from_gym(obj, intern=True) is d
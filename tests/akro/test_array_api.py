@@ -0,0 +1,248 @@
+import collections
+import unittest
+
+import numpy as np
+
+from akro import Box
+from akro import Dict
+from akro import Discrete
+from akro import MultiBinary
+from akro import MultiDiscrete
+from akro import Tuple
+
+
+class _Namespace:
+    """A minimal array API namespace, backed by numpy."""
+
+    float64 = np.float64
+    int8 = np.int8
+    int64 = np.int64
+
+    @staticmethod
+    def reshape(x, shape):
+        return type(x)(np.reshape(x.data, shape))
+
+    @staticmethod
+    def concat(arrays, axis=0):
+        return type(arrays[0])(
+            np.concatenate([a.data for a in arrays], axis=axis))
+
+    @staticmethod
+    def stack(arrays, axis=0):
+        return type(arrays[0])(
+            np.stack([a.data for a in arrays], axis=axis))
+
+    @staticmethod
+    def astype(x, dtype):
+        return type(x)(x.data.astype(dtype))
+
+    @staticmethod
+    def arange(n):
+        return _Array(np.arange(n))
+
+    @staticmethod
+    def argmax(x, axis=None):
+        return type(x)(np.argmax(x.data, axis=axis))
+
+    @staticmethod
+    def any(x):
+        return _Array(np.any(x.data))
+
+
+class _Array:
+    """An array of another library, which numpy can't convert."""
+
+    def __init__(self, data):
+        self.data = np.asarray(data)
+
+    def __array_namespace__(self, api_version=None):
+        return _Namespace
+
+    def __array__(self, *args, **kwargs):
+        raise TypeError('Converted to numpy')
+
+    @property
+    def shape(self):
+        return self.data.shape
+
+    @property
+    def ndim(self):
+        return self.data.ndim
+
+    @property
+    def dtype(self):
+        return self.data.dtype
+
+    def __getitem__(self, key):
+        return type(self)(self.data[key])
+
+    def __bool__(self):
+        return bool(self.data)
+
+    def __eq__(self, other):
+        return type(self)(self.data == _data(other))
+
+    def __ne__(self, other):
+        return type(self)(self.data != _data(other))
+
+    def __lt__(self, other):
+        return type(self)(self.data < _data(other))
+
+    def __ge__(self, other):
+        return type(self)(self.data >= _data(other))
+
+    def __or__(self, other):
+        return type(self)(self.data | _data(other))
+
+    __hash__ = None
+
+
+class _HostArray(_Array):
+    """An array of another library, which numpy can convert."""
+
+    def __array__(self, *args, **kwargs):
+        return self.data
+
+
+def _data(x):
+    return x.data if isinstance(x, _Array) else x
+
+
+class TestArrayAPI(unittest.TestCase):
+
+    def test_box(self):
+        box = Box(0, 1, (2, 3))
+        sample = _Array(box.sample())
+        flat = box.flatten(sample)
+        assert isinstance(flat, _Array)
+        assert flat.shape == (6, )
+        assert box.unflatten(flat).shape == (2, 3)
+        batch = _Array(box.stack_n([box.sample() for _ in range(4)]))
+        flat = box.flatten_n(batch)
+        assert isinstance(flat, _Array)
+        assert np.array_equal(box.unflatten_n(flat).data, batch.data)
+
+    def test_discrete(self):
+        disc = Discrete(3)
+        flat = disc.flatten_n(_Array([2, 0]))
+        assert isinstance(flat, _Array)
+        assert np.array_equal(flat.data, [[0., 0., 1.], [1., 0., 0.]])
+        assert np.array_equal(disc.unflatten_n(flat).data, [2, 0])
+        with self.assertRaises(IndexError):
+            disc.flatten_n(_Array([3]))
+        flat = disc.flatten(_Array(1))
+        assert isinstance(flat, _Array)
+        assert np.array_equal(flat.data, [0., 1., 0.])
+        flat = disc.flatten_n([_Array(1), _Array(2)])
+        assert isinstance(flat, _Array)
+        assert np.array_equal(disc.unflatten_n(flat).data, [1, 2])
+
+    def test_multi_discrete(self):
+        multi = MultiDiscrete([3, 2])
+        flat = multi.flatten(_Array([2, 1]))
+        assert isinstance(flat, _Array)
+        assert np.array_equal(flat.data, [0., 0., 1., 0., 1.])
+        unflat = multi.unflatten(flat)
+        assert isinstance(unflat, _Array)
+        assert np.array_equal(unflat.data, [2, 1])
+        batch = multi.sample_n(4)
+        flat = multi.flatten_n(_Array(batch))
+        assert np.array_equal(flat.data, multi.flatten_n(batch))
+        unflat = multi.unflatten_n(flat)
+        assert unflat.dtype == multi.dtype
+        assert np.array_equal(unflat.data, batch)
+        with self.assertRaises(IndexError):
+            multi.flatten_n(_Array([[3, 0]]))
+
+    def test_multi_binary(self):
+        multi = MultiBinary(3)
+        flat = multi.flatten(_Array([1, 0, 1]))
+        assert isinstance(flat, _Array)
+        assert np.array_equal(multi.unflatten(flat).data, [1, 0, 1])
+        batch = multi.sample_n(4)
+        flat = multi.flatten_n(_Array(batch))
+        assert np.array_equal(flat.data, multi.flatten_n(batch))
+        unflat = multi.unflatten_n(flat)
+        assert unflat.dtype == multi.dtype
+        assert np.array_equal(unflat.data, batch)
+
+    def test_dict(self):
+        d = Dict(
+            collections.OrderedDict([('position', Box(0, 1, (2, ))),
+                                     ('action', Discrete(3))]))
+        samples = [d.sample() for _ in range(4)]
+        batch = d.stack_n(samples)
+        foreign = collections.OrderedDict([(key, _Array(value))
+                                           for key, value in batch.items()])
+        flat = d.flatten_n(foreign)
+        assert isinstance(flat, _Array)
+        assert np.allclose(flat.data, d.flatten_n(samples))
+        view = d.unflatten_n_view(d.flatten_n(samples))
+        assert np.array_equal(view['action'], batch['action'])
+        unflat = d.unflatten(_Array(d.flatten(samples[0])))
+        assert isinstance(unflat['position'], _Array)
+        assert np.array_equal(unflat['position'].data,
+                              samples[0]['position'])
+        assert int(unflat['action'].data) == samples[0]['action']
+        foreign = [
+            collections.OrderedDict([(key, _Array(value))
+                                     for key, value in sample.items()])
+            for sample in samples
+        ]
+        flat = d.flatten(foreign[0])
+        assert isinstance(flat, _Array)
+        assert np.allclose(flat.data, d.flatten(samples[0]))
+        flat = d.flatten_n(foreign)
+        assert isinstance(flat, _Array)
+        assert np.allclose(flat.data, d.flatten_n(samples))
+
+    def test_out(self):
+        spaces = [
+            Box(0, 1, (2, 3)),
+            Discrete(3),
+            MultiDiscrete([3, 2]),
+            MultiBinary(3),
+            Dict(
+                collections.OrderedDict([('position', Box(0, 1, (2, ))),
+                                         ('action', Discrete(3))])),
+        ]
+        for space in spaces:
+            batch = space.sample_n(4)
+            expected = space.flatten_n(batch)
+            if isinstance(space, Dict):
+                host = collections.OrderedDict([
+                    (key, _HostArray(value)) for key, value in batch.items()
+                ])
+                foreign = collections.OrderedDict([
+                    (key, _Array(value)) for key, value in batch.items()
+                ])
+            else:
+                host = _HostArray(batch)
+                foreign = _Array(batch)
+            out = space.empty_flat(4)
+            assert space.flatten_n(host, out=out) is out
+            assert np.array_equal(out, expected)
+            with self.assertRaises(TypeError):
+                space.flatten_n(foreign, out=space.empty_flat(4))
+
+    def test_dict_multi(self):
+        d = Dict(
+            collections.OrderedDict([('keys', MultiBinary(2)),
+                                     ('action', MultiDiscrete([2, 3]))]))
+        batch = d.sample_n(4)
+        foreign = collections.OrderedDict([(key, _Array(value))
+                                           for key, value in batch.items()])
+        flat = d.flatten_n(foreign)
+        assert isinstance(flat, _Array)
+        assert np.array_equal(flat.data, d.flatten_n(batch))
+
+    def test_tuple(self):
+        tup = Tuple((Box(0, 1, (2, )), Discrete(3)))
+        batch = (_Array(np.ones((4, 2))), _Array([0, 1, 2, 0]))
+        flat = tup.flatten_batch(batch)
+        assert isinstance(flat, _Array)
+        assert flat.shape == (4, 5)
+        single = tup.unflatten(flat[0])
+        assert isinstance(single[0], _Array)
+        assert np.array_equal(single[0].data, [1., 1.])
+        assert int(single[1].data) == 0
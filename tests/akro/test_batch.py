@@ -0,0 +1,85 @@
+import collections
+import pickle
+import unittest
+
+import numpy as np
+
+from akro import Batched
+from akro import Box
+from akro import Dict
+from akro import Discrete
+from akro import Tuple
+
+
+class TestBatched(unittest.TestCase):
+
+    def setUp(self):
+        self.inner = Dict(
+            collections.OrderedDict([
+                ('position', Box(0, 10, (2, ))),
+                ('extra', Tuple((Discrete(3), Box(-1, 1, (2, 2))))),
+            ]))
+        self.space = self.inner.batched(4)
+
+    def test_batched(self):
+        assert isinstance(self.space, Batched)
+        assert self.space.n == 4
+        assert self.space.flat_shape == (4, self.inner.flat_dim)
+        box = Box(0, 1, (3, )).batched(5)
+        assert box.shape == (5, 3)
+        assert box.dtype == np.float32
+
+    def test_sample_contains(self):
+        self.space.set_rng(0)
+        batch = self.space.sample()
+        assert batch['position'].shape == (4, 2)
+        assert batch['extra'][0].shape == (4, )
+        assert self.space.contains(batch)
+        batch['extra'][0][1] = 3
+        assert not self.space.contains(batch)
+        assert not self.space.contains([self.inner.sample()])
+        assert not Box(0, 1, (3, )).batched(5).contains(np.ones((4, 3)))
+
+    def test_flatten_unflatten(self):
+        batch = self.space.sample()
+        flat = self.space.flatten(batch)
+        assert flat.shape == self.space.flat_shape
+        samples = self.inner.unstack_n(batch)
+        assert np.array_equal(flat, self.inner.flatten_n(samples))
+        unflat = self.space.unflatten(flat)
+        assert np.array_equal(unflat['position'], batch['position'])
+        assert np.array_equal(unflat['extra'][0], batch['extra'][0])
+        assert np.allclose(unflat['extra'][1], batch['extra'][1])
+        with self.assertRaises(ValueError):
+            self.space.unflatten(flat[:2])
+        with self.assertRaises(ValueError):
+            self.inner.batched(3).flatten(batch)
+
+    def test_flatten_n(self):
+        batches = [self.space.sample() for _ in range(2)]
+        flat = self.space.flatten_n(batches)
+        assert flat.shape == (2, ) + self.space.flat_shape
+        unflat = self.space.unflatten_n(flat)
+        assert np.array_equal(unflat[1]['position'],
+                              batches[1]['position'])
+
+    def test_flatten_n_out(self):
+        batches = [self.space.sample() for _ in range(2)]
+        out = self.space.empty_flat(2)
+        assert out.shape == (2, ) + self.space.flat_shape
+        assert self.space.flatten_n(batches, out=out) is out
+        assert np.array_equal(out, self.space.flatten_n(batches))
+
+    def test_box_sample_n(self):
+        box = Box(np.array([0, -np.inf]), np.array([1, np.inf]))
+        samples = box.sample_n(100)
+        assert samples.shape == (100, 2)
+        assert ((samples[:, 0] >= 0) & (samples[:, 0] <= 1)).all()
+        ints = Box(0, 3, (2, ), dtype=np.int64).sample_n(100)
+        assert ints.dtype == np.int64
+        assert ((ints >= 0) & (ints <= 3)).all()
+
+    def test_pickleable(self):
+        round_trip = pickle.loads(pickle.dumps(self.space))
+        assert round_trip == self.space
+        assert hash(round_trip) == hash(self.space)
@@ -9,6 +9,14 @@ from akro import theano
 from akro.requires import requires_tf, requires_theano
 
 
+class _UnitBox(Box):
+    """A Box subclass with its own constructor, as in third-party code."""
+
+    def __init__(self, n):
+        super().__init__(0., 1., (n, ))
+        self.n = n
+
+
 class TestBox(unittest.TestCase):
 
     def test_pickleable(self):
@@ -19,6 +27,36 @@ class TestBox(unittest.TestCase):
         assert np.array_equal(round_trip.bounds[0], obj.bounds[0])
         assert np.array_equal(round_trip.bounds[1], obj.bounds[1])
 
+    def test_pickle_compact(self):
+        obj = Box(-1.0, 1.0, (100, 100))
+        data = pickle.dumps(obj)
+        assert len(data) < 1000
+        round_trip = pickle.loads(data)
+        assert round_trip == obj
+        assert round_trip.dtype == obj.dtype
+
+    def test_pickle_bounds(self):
+        obj = Box(np.array([0, 1]), np.array([2, 3]), dtype=np.int64)
+        round_trip = pickle.loads(pickle.dumps(obj))
+        assert round_trip.dtype == np.int64
+        assert np.array_equal(round_trip.low, obj.low)
+        assert np.array_equal(round_trip.high, obj.high)
+
+    def test_pickle_rng(self):
+        obj = Box(-1.0, 1.0, (3, ))
+        obj.set_rng(1)
+        assert not hasattr(pickle.loads(pickle.dumps(obj)), '_rng')
+        obj.pickle_rng = True
+        round_trip = pickle.loads(pickle.dumps(obj))
+        assert np.array_equal(round_trip.sample(), obj.sample())
+
+    def test_pickle_subclass(self):
+        obj = _UnitBox(3)
+        round_trip = pickle.loads(pickle.dumps(obj))
+        assert isinstance(round_trip, _UnitBox)
+        assert round_trip.n == 3
+        assert round_trip == obj
+
     def test_same_dtype(self):
         type1 = np.float32
         box = Box(0, 255, (3, 4), type1)
@@ -101,6 +139,145 @@ class TestBox(unittest.TestCase):
         arr = box.unflatten_n(obs)
         assert arr.shape == (3, 3, 4)
 
+    def test_flatten_chunks(self):
+        box = Box(0.0, 1.0, (2, 2))
+        obs = np.arange(20, dtype=np.float32).reshape((5, 2, 2))
+        chunks = [c.copy() for c in box.flatten_chunks(iter(obs), 2)]
+        assert [c.shape for c in chunks] == [(2, 4), (2, 4), (1, 4)]
+        assert np.array_equal(np.concatenate(chunks), box.flatten_n(obs))
+        assert chunks[0].dtype == np.float32
+
+    def test_flatten_chunks_dtype(self):
+        box = Box(0.0, 1.0, (2, ))
+        obs = np.full((5, 2), 0.1)
+        chunks = [c.copy() for c in box.flatten_chunks(obs, 2)]
+        assert all(c.dtype == np.float64 for c in chunks)
+        assert np.array_equal(np.concatenate(chunks), box.flatten_n(obs))
+        img = Box(0, 255, (2, ), dtype=np.uint8)
+        chunks = [c.copy() for c in img.flatten_chunks(iter(obs * 10), 2)]
+        assert np.array_equal(np.concatenate(chunks), obs * 10)
+
+    def test_flatten_chunks_reuses_buffer(self):
+        box = Box(0.0, 1.0, (2, ))
+        chunks = list(box.flatten_chunks((np.ones(2) * i for i in range(4)),
+                                         2))
+        assert np.shares_memory(chunks[0], chunks[1])
+
+    def test_flatten_chunks_array(self):
+        box = Box(0.0, 1.0, (2, 2))
+        obs = np.zeros((5, 2, 2))
+        chunks = list(box.flatten_chunks(obs, 3))
+        assert [len(c) for c in chunks] == [3, 2]
+        assert np.shares_memory(chunks[0], chunks[1])
+
+    def test_unflatten_chunks(self):
+        box = Box(0.0, 1.0, (2, 2))
+        flat = np.arange(20).reshape((5, 4))
+        chunks = [c.copy() for c in box.unflatten_chunks(iter(flat), 4)]
+        assert [c.shape for c in chunks] == [(4, 2, 2), (1, 2, 2)]
+        assert np.array_equal(np.concatenate(chunks), box.unflatten_n(flat))
+        sliced = list(box.unflatten_chunks(flat, 4))
+        assert np.array_equal(sliced[1], chunks[1])
+
+    def test_chunks_invalid_size(self):
+        box = Box(0.0, 1.0, (2, ))
+        with self.assertRaises(ValueError):
+            list(box.flatten_chunks([np.zeros(2)], 0))
+
+    def test_sample(self):
+        box = Box(np.array([-1., 0., -np.inf, -np.inf]),
+                  np.array([1., np.inf, 0., np.inf]))
+        for _ in range(10):
+            assert box.contains(box.sample())
+        img_box = Box(0, 255, (2, 2), np.uint8)
+        sample = img_box.sample()
+        assert sample.dtype == np.uint8
+        assert img_box.contains(sample)
+
+    def test_stack_n(self):
+        box = Box(0, 1, (2, 2))
+        samples = [box.sample() for _ in range(3)]
+        batch = box.stack_n(samples)
+        assert batch.shape == (3, 2, 2)
+        assert batch.dtype == box.dtype
+        for sample, unstacked in zip(samples, box.unstack_n(batch)):
+            assert np.array_equal(sample, unstacked)
+
+    def test_set_rng(self):
+        box = Box(-1.0, 1.0, (3, 4))
+        box.set_rng(42)
+        first = [box.sample() for _ in range(3)]
+        box.set_rng(np.random.default_rng(42))
+        second = [box.sample() for _ in range(3)]
+        assert all(np.array_equal(a, b) for a, b in zip(first, second))
+
+    def test_seed(self):
+        box = Box(-1.0, 1.0, (3, 4))
+        box.seed(7)
+        first = box.sample()
+        box.seed(7)
+        assert np.array_equal(first, box.sample())
+
+    def test_spawn(self):
+        box = Box(-1.0, 1.0, (3, 4))
+        box.set_rng(0)
+        children = box.spawn(3)
+        samples = [c.sample() for c in children]
+        assert not np.array_equal(samples[0], samples[1])
+        assert all(c.shape == box.shape for c in children)
+        box.set_rng(0)
+        again = [c.sample() for c in box.spawn(3)]
+        assert all(np.array_equal(a, b) for a, b in zip(samples, again))
+
+    def test_quantize(self):
+        box = Box(np.array([-1., 0.]), np.array([1., 10.]))
+        x = np.array([[-1., 0.], [0.5, 10.], [0.1, 3.3]], dtype=np.float32)
+        for dtype in (np.uint8, np.uint16, np.float16):
+            q = box.quantize(x, dtype)
+            assert q.dtype == dtype
+            assert q.shape == x.shape
+            decoded = box.dequantize(q)
+            assert decoded.dtype == np.float32
+            assert np.abs(decoded - x).max() <= box.quantization_error(dtype)
+        q = box.quantize(x, np.uint8)
+        assert np.array_equal(q[:2], [[0, 0], [191, 255]])
+
+    def test_quantization_cached(self):
+        box = Box(0., 1., (3, ))
+        coefficients = box._quantization(np.dtype(np.uint8))
+        assert box._quantization(np.dtype(np.uint8)) is coefficients
+        assert box._quantization(np.dtype(np.uint16)) is not coefficients
+        assert not coefficients[0].flags.writeable
+
+    def test_quantize_single_sample(self):
+        box = Box(0., 1., (2, 2))
+        x = np.full((2, 2), 0.5)
+        q = box.quantize(x, np.uint16)
+        assert q.shape == (2, 2)
+        assert np.allclose(box.dequantize(q), x, atol=1e-4)
+
+    def test_quantize_out(self):
+        box = Box(0., 1., (3, ))
+        x = np.random.uniform(size=(4, 3))
+        q = np.empty((4, 3), dtype=np.uint8)
+        assert box.quantize(x, np.uint8, out=q) is q
+        decoded = np.empty((4, 3))
+        assert box.dequantize(q, out=decoded) is decoded
+        assert np.abs(decoded - x).max() <= box.quantization_error()
+
+    def test_quantize_unbounded(self):
+        box = Box(-np.inf, np.inf, (2, ))
+        with self.assertRaises(ValueError):
+            box.quantize(np.zeros(2))
+        assert box.quantization_error(np.float16) == np.inf
+        with self.assertRaises(ValueError):
+            box.quantize(np.zeros(2), np.int8)
+
+    def test_quantization_error(self):
+        box = Box(0., 255., (2, ))
+        assert box.quantization_error(np.uint8) == 0.5
+        assert box.quantization_error(np.uint16) < 0.5 / 256
+
     def test_concat(self):
         box1 = Box(0.0, 1.0, (3, 4))
         box2 = Box(1.0, 2.0, (2, 3))
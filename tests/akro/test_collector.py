@@ -0,0 +1,106 @@
+import asyncio
+import collections
+import unittest
+
+import numpy as np
+
+from akro import BatchCollector
+from akro import Box
+from akro import Dict
+from akro import Discrete
+
+
+class TestBatchCollector(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.loop.close()
+
+    def test_full_batch(self):
+        collector = BatchCollector(Discrete(3), batch_size=4)
+
+        async def actor(x):
+            return collector.add(x)
+
+        async def main():
+            rows = await asyncio.gather(*[actor(x) for x in (0, 1, 2, 1)])
+            return rows, await collector.get()
+
+        rows, batch = self.loop.run_until_complete(main())
+        assert sorted(rows) == [0, 1, 2, 3]
+        assert batch.shape == (4, 3)
+        assert np.array_equal(batch, Discrete(3).flatten_n([0, 1, 2, 1]))
+        assert collector.pending == 0
+
+    def test_get_waits_for_batch(self):
+        collector = BatchCollector(Box(0, 1, (2, )), batch_size=2)
+
+        async def main():
+            consumer = asyncio.ensure_future(collector.get())
+            await asyncio.sleep(0)
+            assert not consumer.done()
+            collector.add(np.array([0., 1.]))
+            collector.add(np.array([1., 0.]))
+            return await consumer
+
+        batch = self.loop.run_until_complete(main())
+        assert np.array_equal(batch, [[0., 1.], [1., 0.]])
+        assert batch.dtype == np.float64
+
+    def test_timeout_flushes_partial_batch(self):
+        collector = BatchCollector(Discrete(2), batch_size=8, timeout=0.01)
+
+        async def main():
+            collector.add(1)
+            return await collector.get()
+
+        batch = self.loop.run_until_complete(main())
+        assert batch.shape == (1, 2)
+        assert np.array_equal(batch, [[0., 1.]])
+
+    def test_flush(self):
+        collector = BatchCollector(Discrete(2), batch_size=8)
+        collector.flush()
+        assert collector.get_nowait() is None
+        self.loop.run_until_complete(self._add(collector, 0))
+        collector.flush()
+        assert collector.get_nowait().shape == (1, 2)
+
+    def test_batches_are_independent(self):
+        collector = BatchCollector(Discrete(2), batch_size=1, dtype=np.uint8)
+        self.loop.run_until_complete(self._add(collector, 0))
+        self.loop.run_until_complete(self._add(collector, 1))
+        first = collector.get_nowait()
+        second = collector.get_nowait()
+        assert first.dtype == np.uint8
+        assert np.array_equal(first, [[1, 0]])
+        assert np.array_equal(second, [[0, 1]])
+
+    def test_casts_to_batch_dtype(self):
+        box = Box(0, 10, (2, ), dtype=np.int64)
+        collector = BatchCollector(box, batch_size=2, dtype=np.int64)
+        self.loop.run_until_complete(self._add(collector, [1., 2.]))
+        self.loop.run_until_complete(self._add(collector, [3., 4.]))
+        batch = collector.get_nowait()
+        assert batch.dtype == np.int64
+        assert np.array_equal(batch, [[1, 2], [3, 4]])
+
+    def test_dict(self):
+        d = Dict(
+            collections.OrderedDict([('position', Box(0, 10, (2, ))),
+                                     ('action', Discrete(2))]))
+        collector = BatchCollector(d, batch_size=1)
+        sample = collections.OrderedDict([('position', np.array([1., 2.])),
+                                          ('action', 1)])
+        self.loop.run_until_complete(self._add(collector, sample))
+        assert np.array_equal(collector.get_nowait(), [d.flatten(sample)])
+
+    def test_invalid_batch_size(self):
+        with self.assertRaises(ValueError):
+            BatchCollector(Discrete(2), batch_size=0)
+
+    @staticmethod
+    async def _add(collector, sample):
+        return collector.add(sample)
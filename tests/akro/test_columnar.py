@@ -0,0 +1,92 @@
+import collections
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from akro import Box
+from akro import Dict
+from akro import Discrete
+from akro.columnar import ColumnarReader, ColumnarWriter
+
+
+class TestColumnar(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'data')
+        self.space = Dict(
+            collections.OrderedDict([('obs', Box(-1., 1., (2, 3))),
+                                     ('action', Discrete(4))]))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def batch(self, n, start=0):
+        return collections.OrderedDict([
+            ('obs', np.arange(start * 6, (start + n) * 6,
+                              dtype=np.float32).reshape((n, 2, 3))),
+            ('action', np.arange(start, start + n) % 4),
+        ])
+
+    def test_append_and_read(self):
+        with ColumnarWriter(self.path, self.space, chunk_size=3) as writer:
+            batch = self.batch(7)
+            for i in range(7):
+                writer.append(
+                    collections.OrderedDict([('obs', batch['obs'][i]),
+                                             ('action', batch['action'][i])]))
+            assert len(writer) == 7
+        reader = ColumnarReader(self.path)
+        assert len(reader) == 7
+        assert np.array_equal(reader.column('obs'), batch['obs'])
+        assert np.array_equal(reader.column(('action', )), batch['action'])
+
+    def test_extend_across_chunks(self):
+        with ColumnarWriter(self.path, self.space, chunk_size=4) as writer:
+            writer.extend(self.batch(3))
+            writer.extend(self.batch(6, start=3))
+        reader = ColumnarReader(self.path)
+        assert np.array_equal(reader.column('obs'), self.batch(9)['obs'])
+
+    def test_iter_chunks(self):
+        with ColumnarWriter(self.path, self.space) as writer:
+            writer.extend(self.batch(5))
+        chunks = list(ColumnarReader(self.path).iter_chunks(2))
+        assert [len(c['action']) for c in chunks] == [2, 2, 1]
+        assert list(chunks[0].keys()) == ['obs', 'action']
+        assert np.array_equal(chunks[2]['obs'], self.batch(1, start=4)['obs'])
+
+    def test_memory_mapped_column(self):
+        with ColumnarWriter(self.path, self.space) as writer:
+            writer.extend(self.batch(5))
+        column = ColumnarReader(self.path).column('action')
+        assert isinstance(column, np.memmap)
+        assert column.dtype == np.int64
+
+    def test_readable_while_writing(self):
+        writer = ColumnarWriter(self.path, self.space, chunk_size=2)
+        writer.extend(self.batch(3))
+        reader = ColumnarReader(self.path)
+        assert len(reader) == 2
+        writer.close()
+        assert len(reader) == 3
+
+    def test_schema(self):
+        with ColumnarWriter(self.path, self.space):
+            pass
+        with open(os.path.join(self.path, 'schema.json')) as f:
+            meta = json.load(f)
+        assert [c['path'] for c in meta['columns']] == [['obs'], ['action']]
+        reader = ColumnarReader(self.path)
+        assert isinstance(reader.space, Dict)
+        assert reader.space.spaces['action'].n == 4
+        assert reader.paths == [('obs', ), ('action', )]
+
+    def test_missing_column(self):
+        with ColumnarWriter(self.path, self.space):
+            pass
+        with self.assertRaises(KeyError):
+            ColumnarReader(self.path).column('reward')
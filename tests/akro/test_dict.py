@@ -7,6 +7,8 @@ import numpy as np
 from akro import Box
 from akro import Dict
 from akro import Discrete
+from akro import Image
+from akro import kernels
 from akro import tf
 from akro import theano
 from akro.requires import requires_tf, requires_theano
@@ -27,6 +29,43 @@ class TestDict(unittest.TestCase):
         assert round_trip
         assert round_trip.contains(sample)
 
+    def test_pickle_nested(self):
+        d = Dict(
+            collections.OrderedDict([('image', Image((84, 84, 3))),
+                                     ('action', Discrete(3))]))
+        data = pickle.dumps(d)
+        assert len(data) < 500
+        round_trip = pickle.loads(data)
+        assert list(round_trip.spaces.keys()) == ['image', 'action']
+        assert isinstance(round_trip.spaces['image'], Image)
+        assert round_trip.spaces['action'] == d.spaces['action']
+
+    def test_set_rng(self):
+        d = Dict(
+            collections.OrderedDict([('position', Box(0, 10, (2, ))),
+                                     ('action', Discrete(1000))]))
+        d.set_rng(1)
+        first = [d.sample() for _ in range(3)]
+        d.set_rng(1)
+        second = [d.sample() for _ in range(3)]
+        for a, b in zip(first, second):
+            assert d.contains(a)
+            assert list(a.keys()) == ['position', 'action']
+            assert a['action'] == b['action']
+            assert np.array_equal(a['position'], b['position'])
+
+    def test_spawn(self):
+        d = Dict(
+            collections.OrderedDict([('position', Box(0, 10, (2, ))),
+                                     ('action', Discrete(1000))]))
+        d.set_rng(1)
+        workers = d.spawn(2)
+        assert workers[0].spaces['action'] is not d.spaces['action']
+        assert (workers[0].spaces['action'].rng
+                is not workers[1].spaces['action'].rng)
+        samples = [[w.sample()['action'] for _ in range(5)] for w in workers]
+        assert samples[0] != samples[1]
+
     def test_flat_dim(self):
         d = Dict(
             collections.OrderedDict(position=Box(0, 10, (2, )),
@@ -39,6 +78,12 @@ class TestDict(unittest.TestCase):
                                      ('velocity', Box(0, 10, (3, )))]))
         assert d.flat_dim_with_keys(['position']) == 2
 
+    def test_flat_offsets(self):
+        d = Dict(
+            collections.OrderedDict([('position', Box(0, 10, (2, ))),
+                                     ('velocity', Discrete(3))]))
+        assert np.array_equal(d.flat_offsets, [0, 2, 5])
+
     def test_flatten(self):
         d = Dict(
             collections.OrderedDict([('position', Box(0, 10, (2, ))),
@@ -88,6 +133,88 @@ class TestDict(unittest.TestCase):
         for i, fi in enumerate(d.unflatten_n(f)):
             assert all((s[i][k] == v).all() for k, v in fi.items())
 
+    def test_flatten_n_mixed(self):
+        d = Dict(
+            collections.OrderedDict([('position', Box(0, 10, (2, ))),
+                                     ('action', Discrete(3))]))
+        s = [
+            collections.OrderedDict([('position', np.array([1., 2.])),
+                                     ('action', 2)]),
+            collections.OrderedDict([('position', np.array([3., 4.])),
+                                     ('action', 0)])
+        ]
+        flat = d.flatten_n(s)
+        assert np.array_equal(flat, [d.flatten(x) for x in s])
+        unflat = d.unflatten_n(flat)
+        assert [x['action'] for x in unflat] == [2, 0]
+        assert np.array_equal(unflat[1]['position'], [3., 4.])
+
+    def test_flatten_n_empty(self):
+        d = Dict({'position': Box(0, 10, (2, ))})
+        assert d.flatten_n([]).shape == (0, 2)
+
+    def test_flatten_n_out(self):
+        d = Dict(
+            collections.OrderedDict([('position', Box(0, 10, (2, ))),
+                                     ('action', Discrete(3))]))
+        samples = [d.sample() for _ in range(4)]
+        for order in ('C', 'F'):
+            out = d.empty_flat(4, order=order)
+            assert out.shape == (4, d.flat_dim)
+            assert out.dtype == d.flat_dtype
+            assert kernels.is_aligned(out)
+            assert d.flatten_n(samples, out=out) is out
+            assert np.array_equal(out, d.flatten_n(samples))
+            assert d.flatten_n(d.stack_n(samples), out=out) is out
+            assert np.array_equal(out, d.flatten_n(samples))
+
+    def test_flatten_chunks(self):
+        d = Dict(
+            collections.OrderedDict([('position', Box(0, 10, (2, ))),
+                                     ('action', Discrete(3))]))
+        s = [
+            collections.OrderedDict([('position', np.array([i, i + 1.])),
+                                     ('action', i % 3)]) for i in range(5)
+        ]
+        chunks = [c.copy() for c in d.flatten_chunks(iter(s), 2)]
+        assert np.array_equal(np.concatenate(chunks), d.flatten_n(s))
+        unflat = [
+            x for c in d.unflatten_chunks(iter(np.concatenate(chunks)), 3)
+            for x in c
+        ]
+        assert [x['action'] for x in unflat] == [0, 1, 2, 0, 1]
+
+    def test_delta_flattener(self):
+        d = Dict(
+            collections.OrderedDict([('goal', Box(0, 10, (3, ))),
+                                     ('action', Discrete(3))]))
+        flattener = d.delta_flattener()
+        obs = collections.OrderedDict([('goal', np.array([1., 2., 3.])),
+                                       ('action', 2)])
+        flat = flattener.flatten(obs)
+        assert np.array_equal(flat, d.flatten(obs))
+        obs['action'] = 0
+        assert flattener.flatten(obs) is flat
+        assert np.array_equal(flat, d.flatten(obs))
+        obs['goal'] = np.array([4., 5., 6.])
+        assert np.array_equal(flattener.flatten(obs), d.flatten(obs))
+
+    def test_delta_flattener_changed(self):
+        d = Dict(
+            collections.OrderedDict([('goal', Box(0, 10, (2, ))),
+                                     ('position', Box(0, 10, (2, )))]))
+        flattener = d.delta_flattener()
+        obs = collections.OrderedDict([('goal', np.array([1., 2.])),
+                                       ('position', np.array([3., 4.]))])
+        flattener.flatten(obs)
+        # In-place changes are only picked up when listed in changed.
+        obs['goal'][0] = 7.
+        obs['position'][0] = 8.
+        flat = flattener.flatten(obs, changed=['position'])
+        assert np.array_equal(flat, [1., 2., 8., 4.])
+        flattener.reset()
+        assert np.array_equal(flattener.flatten(obs), [7., 2., 8., 4.])
+
     def test_flatten_with_keys(self):
         d = Dict(
             collections.OrderedDict([('position', Box(0, 10, (2, ))),
@@ -115,6 +242,91 @@ class TestDict(unittest.TestCase):
         assert all((s[k] == v).all() for k, v in d.unflatten_with_keys(
             f_full, ['velocity', 'position']).items())
 
+    def test_unflatten_view(self):
+        d = Dict(
+            collections.OrderedDict([
+                ('position', Box(0, 10, (2, 2))),
+                ('action', Discrete(3)),
+                ('goal', Dict({'xy': Box(0, 1, (2, ))})),
+            ]))
+        sample = d.sample()
+        flat = d.flatten(sample)
+        view = d.unflatten_view(flat)
+        assert list(view.keys()) == ['position', 'action', 'goal']
+        assert len(view) == 3
+        assert np.shares_memory(view['position'], flat)
+        assert np.array_equal(view['position'], sample['position'])
+        assert view['action'] == sample['action']
+        assert np.array_equal(view['goal']['xy'], sample['goal']['xy'])
+        with self.assertRaises(ValueError):
+            d.unflatten_view(flat[:-1])
+        with self.assertRaises(ValueError):
+            d.unflatten_view(np.stack([flat, flat]))
+
+    def test_unflatten_n_view(self):
+        d = Dict(
+            collections.OrderedDict([('position', Box(0, 10, (2, 2))),
+                                     ('action', Discrete(3))]))
+        samples = [d.sample() for _ in range(4)]
+        flat = d.flatten_n(samples)
+        view = d.unflatten_n_view(flat)
+        assert view['position'].shape == (4, 2, 2)
+        assert np.shares_memory(view['position'], flat)
+        expected = d.unflatten_n(flat)
+        for i, sample in enumerate(expected):
+            assert np.array_equal(view['position'][i], sample['position'])
+            assert view['action'][i] == sample['action']
+
+    def test_views_share_layout(self):
+        d = Dict(
+            collections.OrderedDict([('position', Box(0, 10, (2, 2))),
+                                     ('action', Discrete(3))]))
+        samples = [d.sample() for _ in range(4)]
+        flat = d.flatten_n(samples)
+        view = d.unflatten_view(flat[0])
+        assert d.unflatten_view(flat[1])._slices is view._slices
+        assert d.unflatten_n_view(flat)._slices is view._slices
+        assert d.delta_flattener()._slices is view._slices
+        with self.assertRaises(ValueError):
+            d.unflatten_view(flat)
+
+    def test_pack_episodes(self):
+        d = Dict(
+            collections.OrderedDict([('position', Box(0, 10, (2, ))),
+                                     ('action', Discrete(3))]))
+        episodes = [[d.sample() for _ in range(length)]
+                    for length in (3, 1, 0, 2)]
+        padded, mask = d.pack_episodes(episodes)
+        assert padded.shape == (3, 4, d.flat_dim)
+        assert padded.flags.c_contiguous
+        assert kernels.is_aligned(padded)
+        assert np.array_equal(mask.sum(axis=0), [3, 1, 0, 2])
+        assert not padded[~mask].any()
+        unpacked = d.unpack_episodes(padded, mask)
+        for episode, flat in zip(episodes, unpacked):
+            assert np.shares_memory(flat, padded) or not len(flat)
+            assert np.array_equal(flat.reshape((-1, d.flat_dim)),
+                                  d.flatten_n(episode).reshape(
+                                      (-1, d.flat_dim)))
+        padded, mask = d.pack_episodes(episodes, max_length=5)
+        assert padded.shape == (5, 4, d.flat_dim)
+        with self.assertRaises(ValueError):
+            d.pack_episodes(episodes, max_length=2)
+
+    def test_pack_episodes_empty(self):
+        box = Box(0, 10, (2, ))
+        for episodes in ([], [[], []]):
+            padded, mask = box.pack_episodes(episodes, max_length=3)
+            assert padded.shape == (3, len(episodes), 2)
+            assert padded.dtype == box.flat_dtype
+            assert not padded.any()
+            assert mask.shape == (3, len(episodes))
+            assert not mask.any()
+        padded, mask = box.pack_episodes([[], [np.ones(2)]])
+        assert padded.shape == (1, 2, 2)
+        assert np.array_equal(padded[0], [[0., 0.], [1., 1.]])
+        assert np.array_equal(mask, [[False, True]])
+
     def test_concat(self):
         d1 = Dict(
             collections.OrderedDict([('position', Box(0, 10, (2, ))),
@@ -136,6 +348,78 @@ class TestDict(unittest.TestCase):
             [isinstance(c, tf.Tensor) for c in tensor_dict.spaces.values()])
         assert all([v.dtype == tf.int64 for v in tensor_dict.spaces.values()])
 
+    @requires_tf
+    def test_tf_flatten(self):
+        d = Dict(
+            collections.OrderedDict([('image', Image((2, 2, 1))),
+                                     ('action', Discrete(3))]))
+        flat = d.tf_flatten({
+            'image': tf.zeros([5, 2, 2, 1], dtype=tf.uint8),
+            'action': tf.zeros([5], dtype=tf.int64),
+        })
+        assert flat.dtype == tf.float32
+        assert flat.get_shape().as_list() == [5, d.flat_dim]
+        unflat = d.tf_unflatten(flat)
+        assert list(unflat.keys()) == ['image', 'action']
+        assert unflat['image'].get_shape().as_list() == [5, 2, 2, 1]
+        assert unflat['action'].get_shape().as_list() == [5]
+
+    @requires_tf
+    def test_convert_tf_cached(self):
+        d = Dict({'position': Discrete(2), 'velocity': Discrete(3)})
+        same = Dict({'position': Discrete(2), 'velocity': Discrete(3)})
+        with tf.Graph().as_default():
+            tensor_dict = d.to_tf_placeholder('obs', 1)
+            assert same.to_tf_placeholder('obs', 1) is tensor_dict
+            assert d.to_tf_placeholder('next_obs', 1) is not tensor_dict
+            names = [t.op.name for t in tensor_dict.spaces.values()]
+            assert names == ['obs-position', 'obs-velocity']
+        with tf.Graph().as_default():
+            assert d.to_tf_placeholder('obs', 1) is not tensor_dict
+
+    @requires_tf
+    def test_tf_signature(self):
+        d = Dict(
+            collections.OrderedDict([('image', Image((2, 2, 1))),
+                                     ('action', Discrete(3))]))
+        signature = d.tf_signature()
+        assert list(signature.keys()) == ['image', 'action']
+        assert signature['image'].dtype == tf.uint8
+        assert signature['image'].shape.as_list() == [None, 2, 2, 1]
+        assert signature['action'].dtype == tf.int64
+        assert signature['action'].shape.as_list() == [None]
+
+    @requires_tf
+    def test_tf_types_and_shapes(self):
+        d = Dict(
+            collections.OrderedDict([('image', Image((2, 2, 1))),
+                                     ('action', Discrete(3))]))
+        types, shapes = d.tf_types_and_shapes(batch_dims=2)
+        assert list(types.keys()) == ['image', 'action']
+        assert types['image'] == tf.uint8
+        assert types['action'] == tf.int64
+        assert shapes['image'].as_list() == [None, None, 2, 2, 1]
+        assert shapes['action'].as_list() == [None, None]
+
+    @requires_theano
+    def test_theano_flatten(self):
+        d = Dict(
+            collections.OrderedDict([('image', Image((2, 2, 1))),
+                                     ('action', Discrete(3))]))
+        image = theano.tensor.TensorType('uint8', (False, ) * 4)('image')
+        action = theano.tensor.lvector('action')
+        flat = d.theano_flatten({'image': image, 'action': action})
+        unflat = d.theano_unflatten(flat)
+        f = theano.function([image, action],
+                            [flat, unflat['image'], unflat['action']])
+        samples = [d.sample() for _ in range(3)]
+        batch = d.stack_n(samples)
+        flat_value, image_value, action_value = f(batch['image'],
+                                                  batch['action'])
+        assert np.allclose(flat_value, d.flatten_n(samples))
+        assert np.array_equal(image_value, batch['image'])
+        assert np.array_equal(action_value, batch['action'])
+
     @requires_theano
     def test_convert_theano(self):
         d = Dict({'position': Discrete(2), 'velocity': Discrete(3)})
@@ -41,6 +41,13 @@ class TestDiscrete(unittest.TestCase):
         base = np.asarray([[1., 0., 0.], [0., 1., 0.], [0., 0., 1.]])
         assert np.array_equal(arr, base)
 
+    def test_flatten_n_out(self):
+        disc = Discrete(3)
+        out = disc.empty_flat(3, alignment=128)
+        assert out.ctypes.data % 128 == 0
+        assert disc.flatten_n([0, 1, 2], out=out) is out
+        assert np.array_equal(out, np.eye(3))
+
     def test_unflatten_n(self):
         disc = Discrete(3)
         obs = np.asarray([0, 1, 2])
@@ -61,6 +68,130 @@ class TestDiscrete(unittest.TestCase):
         res = disc.weighted_sample(weights)
         assert res >= 0 and res < disc.n
 
+    def test_weighted_sample_n(self):
+        disc = Discrete(4)
+        res = disc.weighted_sample_n([0., 1., 0., 3.], size=1000)
+        assert res.shape == (1000, )
+        assert set(res) == {1, 3}
+        assert 0.6 < np.mean(res == 3) < 0.9
+
+    def test_weighted_sample_n_default_size(self):
+        disc = Discrete(4)
+        sample = disc.weighted_sample_n([1., 1., 1., 1.])
+        assert np.ndim(sample) == 0
+        assert disc.contains(int(sample))
+
+    def test_weighted_sample_n_per_row(self):
+        disc = Discrete(3)
+        weights = np.array([[1., 0., 0.], [0., 0., 2.], [0., 5., 0.]])
+        assert np.array_equal(disc.weighted_sample_n(weights), [0, 2, 1])
+        res = disc.weighted_sample_n(weights, size=4)
+        assert res.shape == (3, 4)
+        assert np.array_equal(res, np.repeat([[0], [2], [1]], 4, axis=1))
+
+    def test_weighted_sample_n_invalid(self):
+        disc = Discrete(3)
+        with pytest.raises(ValueError):
+            disc.weighted_sample_n([1., 1.])
+        with pytest.raises(ValueError):
+            disc.weighted_sample_n([1., -1., 1.])
+        with pytest.raises(ValueError):
+            disc.weighted_sample_n([[0., 0., 0.]])
+        with pytest.raises(ValueError):
+            disc.weighted_sampler([[1., 1., 1.]])
+
+    def test_weighted_sampler(self):
+        disc = Discrete(5)
+        weights = np.array([1., 0., 2., 0., 5.])
+        sampler = disc.weighted_sampler(weights)
+        assert sampler.n == 5
+        res = sampler.sample(20000)
+        assert set(res) == {0, 2, 4}
+        freq = np.bincount(res, minlength=5) / len(res)
+        assert np.allclose(freq, weights / weights.sum(), atol=0.02)
+        single = sampler.sample()
+        assert isinstance(single, int)
+        assert sampler.sample((2, 3)).shape == (2, 3)
+
+    def test_set_rng(self):
+        disc = Discrete(100)
+        disc.set_rng(3)
+        first = [disc.sample() for _ in range(5)]
+        first_weighted = disc.weighted_sample(np.ones(100))
+        first_n = disc.weighted_sample_n(np.ones(100), size=5)
+        disc.set_rng(3)
+        assert [disc.sample() for _ in range(5)] == first
+        assert disc.weighted_sample(np.ones(100)) == first_weighted
+        assert np.array_equal(disc.weighted_sample_n(np.ones(100), size=5),
+                              first_n)
+        assert all(isinstance(x, int) for x in first)
+
+    def test_weighted_sampler_uses_rng(self):
+        disc = Discrete(10)
+        disc.set_rng(5)
+        first = disc.weighted_sampler(np.arange(10)).sample(20)
+        disc.set_rng(5)
+        second = disc.weighted_sampler(np.arange(10)).sample(20)
+        assert np.array_equal(first, second)
+
+    def test_pack_mask(self):
+        disc = Discrete(10)
+        mask = np.zeros((3, 10), dtype=bool)
+        mask[0, 9] = mask[1, 0] = mask[2, 4] = True
+        packed = disc.pack_mask(mask)
+        assert packed.dtype == np.uint8
+        assert packed.shape == (3, 2)
+        assert np.array_equal(disc.unpack_mask(packed), mask)
+
+    def test_sample_masked_n(self):
+        disc = Discrete(5)
+        mask = np.array([[False, True, False, True, False],
+                         [False, False, False, False, True]])
+        for _ in range(10):
+            res = disc.sample_masked_n(mask)
+            assert res[0] in (1, 3)
+            assert res[1] == 4
+        res = disc.sample_masked_n(disc.pack_mask(mask), packed=True)
+        assert res[1] == 4
+
+    def test_sample_masked_n_empty_row(self):
+        disc = Discrete(3)
+        with pytest.raises(ValueError):
+            disc.sample_masked_n([[True, False, False], [False] * 3])
+
+    def test_weighted_sample_masked_n(self):
+        disc = Discrete(4)
+        mask = np.array([[True, True, False, False],
+                         [False, False, True, True]])
+        weights = np.array([0., 1., 1., 0.])
+        for _ in range(5):
+            assert np.array_equal(disc.weighted_sample_masked_n(weights, mask),
+                                  [1, 2])
+        with pytest.raises(ValueError):
+            disc.weighted_sample_masked_n(weights,
+                                          [[True, False, False, True]])
+
+    def test_masked_argmax_n(self):
+        disc = Discrete(3)
+        logits = np.array([[3., 2., 1.], [-1., -5., -2.]])
+        mask = np.array([[False, True, True], [False, True, False]])
+        assert np.array_equal(disc.masked_argmax_n(logits, mask), [1, 1])
+        assert np.array_equal(
+            disc.masked_argmax_n(logits, disc.pack_mask(mask), packed=True),
+            [1, 1])
+
+    def test_masked_argmax_n_uint8(self):
+        disc = Discrete(16)
+        mask = np.zeros((1, 16), dtype=np.uint8)
+        mask[0, [0, 9]] = 1
+        logits = np.arange(16.)[np.newaxis]
+        assert np.array_equal(disc.masked_argmax_n(logits, mask), [9])
+
+    def test_mask_wrong_shape(self):
+        disc = Discrete(3)
+        with pytest.raises(ValueError):
+            disc.masked_argmax_n(np.zeros((1, 3)), [[True, True]])
+
     def test_concat(self):
         with pytest.raises(NotImplementedError):
             disc1 = Discrete(4)
@@ -81,6 +212,29 @@ class TestDiscrete(unittest.TestCase):
         assert tensor.dtype == tf.int64
         assert tensor.get_shape().as_list() == [None, 10]
 
+    @requires_tf
+    def test_tf_flatten(self):
+        disc = Discrete(10)
+        flat = disc.tf_flatten(tf.constant([3, 1], dtype=tf.int64))
+        assert flat.dtype == tf.float32
+        assert flat.get_shape().as_list() == [2, 10]
+        unflat = disc.tf_unflatten(flat)
+        assert unflat.dtype == tf.int64
+        assert unflat.get_shape().as_list() == [2]
+
+    @requires_theano
+    def test_theano_flatten(self):
+        disc = Discrete(10)
+        indices = theano.tensor.lvector('indices')
+        flat = disc.theano_flatten(indices)
+        assert flat.ndim == 2
+        assert flat.dtype == theano.config.floatX
+        unflat = disc.theano_unflatten(flat)
+        f = theano.function([indices], [flat, unflat])
+        flat_value, unflat_value = f(np.array([3, 1]))
+        assert np.array_equal(flat_value, disc.flatten_n([3, 1]))
+        assert np.array_equal(unflat_value, [3, 1])
+
     @requires_theano
     def test_convert_theano(self):
         disc = Discrete(10)
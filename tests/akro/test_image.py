@@ -16,6 +16,12 @@ class TestImage(unittest.TestCase):
         assert np.array_equal(round_trip.bounds[0], obj.bounds[0])
         assert np.array_equal(round_trip.bounds[1], obj.bounds[1])
 
+    def test_pickle_compact(self):
+        obj = Image((84, 84, 3))
+        data = pickle.dumps(obj)
+        assert len(data) < 200
+        assert isinstance(pickle.loads(data), Image)
+
     def test_invalid_shape(self):
         with self.assertRaises(AssertionError):
             Image((1, 1, 1, 1))
@@ -0,0 +1,131 @@
+import unittest
+
+import numpy as np
+import pytest
+
+from akro import kernels
+from akro import numba
+
+
+class TestKernels(unittest.TestCase):
+
+    def tearDown(self):
+        kernels.set_jit_enabled(True)
+
+    def backends(self):
+        if numba:
+            return [True, False]
+        return [False]
+
+    def test_one_hot(self):
+        for jit in self.backends():
+            kernels.set_jit_enabled(jit)
+            arr = kernels.one_hot([0, 2, 1], 3)
+            assert arr.dtype == np.float64
+            assert np.array_equal(arr, np.eye(3)[[0, 2, 1]])
+
+    def test_one_hot_out_of_bounds(self):
+        for jit in self.backends():
+            kernels.set_jit_enabled(jit)
+            with pytest.raises(IndexError):
+                kernels.one_hot([0, 3], 3)
+            with pytest.raises(IndexError):
+                kernels.one_hot([-1], 3)
+
+    def test_one_hot_not_integer(self):
+        with pytest.raises(IndexError):
+            kernels.one_hot([0.5], 3)
+
+    def test_nonzero_columns(self):
+        xs = np.array([[0., 1., 0.], [1., 0., 0.], [0., 0., 0.],
+                       [0., 1., 1.]])
+        for jit in self.backends():
+            kernels.set_jit_enabled(jit)
+            assert np.array_equal(kernels.nonzero_columns(xs),
+                                  np.nonzero(xs)[1])
+
+    def test_in_bounds(self):
+        low = np.zeros((2, 2))
+        high = np.ones((2, 2))
+        xs = np.array([np.full((2, 2), 0.5), np.full((2, 2), 2.)])
+        for jit in self.backends():
+            kernels.set_jit_enabled(jit)
+            assert np.array_equal(kernels.in_bounds(xs, low, high),
+                                  [True, False])
+
+    def test_scale(self):
+        xs = np.arange(6, dtype=np.uint8).reshape((3, 2))
+        mul = np.array([0.5, 2.], dtype=np.float32)
+        add = np.array([1., -1.], dtype=np.float32)
+        results = []
+        for jit in self.backends():
+            kernels.set_jit_enabled(jit)
+            results.append(kernels.scale(xs, mul, add))
+        for res in results:
+            assert res.dtype == np.float32
+            assert np.array_equal(res, xs * mul + add)
+
+    def test_scale_out(self):
+        xs = np.arange(6, dtype=np.float64).reshape((3, 2))
+        out = np.empty((3, 2), dtype=np.float32)
+        ret = kernels.scale(xs, 2., 1., out=out)
+        assert ret is out
+        assert np.array_equal(out, xs * 2. + 1.)
+
+    def test_alias_table(self):
+        probs = np.array([0.1, 0., 0.6, 0.3])
+        tables = []
+        for jit in self.backends():
+            kernels.set_jit_enabled(jit)
+            prob, alias = kernels.alias_table(probs)
+            # Each entry's probability is split between itself and aliases.
+            total = prob.copy()
+            np.add.at(total, alias, 1. - prob)
+            assert np.allclose(total / len(probs), probs)
+            assert prob[1] == 0.
+            tables.append((prob, alias))
+        for prob, alias in tables[1:]:
+            assert np.array_equal(prob, tables[0][0])
+            assert np.array_equal(alias, tables[0][1])
+
+    def test_scatter_gather(self):
+        blocks = [np.ones((2, 1)), np.zeros((2, 3), dtype=np.float32)]
+        offsets = np.array([0, 1, 4])
+        flat = kernels.scatter(blocks, offsets)
+        assert flat.shape == (2, 4)
+        assert flat.dtype == np.float64
+        for block, gathered in zip(blocks, kernels.gather(flat, offsets)):
+            assert np.array_equal(block, gathered)
+
+    def test_scatter_aligned(self):
+        flat = kernels.scatter([np.ones((3, 2)), np.zeros((3, 1))],
+                               np.array([0, 2, 3]))
+        assert flat.flags.c_contiguous
+        assert kernels.is_aligned(flat)
+
+    def test_empty_aligned(self):
+        for alignment in (16, 64, 4096):
+            arr = kernels.empty_aligned((5, 3), np.float32, alignment)
+            assert arr.shape == (5, 3)
+            assert arr.dtype == np.float32
+            assert arr.flags.c_contiguous
+            assert kernels.is_aligned(arr, alignment)
+        arr = kernels.empty_aligned((5, 3), order='F')
+        assert arr.flags.f_contiguous
+        assert kernels.is_aligned(arr)
+        assert kernels.empty_aligned(0).shape == (0, )
+        with pytest.raises(ValueError):
+            kernels.empty_aligned((5, 3), alignment=48)
+        with pytest.raises(ValueError):
+            kernels.empty_aligned((5, 3), order='K')
+
+    def test_one_hot_out(self):
+        for jit in self.backends():
+            kernels.set_jit_enabled(jit)
+            outs = [
+                np.full((4, 3), 7., dtype=np.float32),
+                np.full((8, 3), 7.)[::2]
+            ]
+            for out in outs:
+                assert kernels.one_hot([0, 2, 1, 2], 3, out=out) is out
+                assert np.array_equal(out, np.eye(3)[[0, 2, 1, 2]])
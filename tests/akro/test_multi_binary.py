@@ -0,0 +1,44 @@
+import pickle
+import unittest
+
+import numpy as np
+
+from akro import MultiBinary
+from akro import Tuple
+
+
+class TestMultiBinary(unittest.TestCase):
+
+    def test_pickleable(self):
+        obj = MultiBinary((2, 3))
+        round_trip = pickle.loads(pickle.dumps(obj))
+        assert round_trip == obj
+        assert round_trip.shape == (2, 3)
+
+    def test_flatten(self):
+        obj = MultiBinary((2, 3))
+        sample = obj.sample()
+        assert obj.contains(sample)
+        flat = obj.flatten(sample)
+        assert flat.shape == (6, )
+        assert np.array_equal(obj.unflatten(flat), sample)
+        samples = obj.sample_n(5)
+        flat = obj.flatten_n(samples)
+        assert flat.shape == (5, 6)
+        assert np.array_equal(obj.unflatten_n(flat), samples)
+
+    def test_pack_n(self):
+        obj = MultiBinary(10)
+        samples = obj.sample_n(7)
+        packed = obj.pack_n(samples)
+        assert packed.shape == (7, 2)
+        assert packed.dtype == np.uint8
+        assert obj.compact_nbytes == 2
+        assert np.array_equal(obj.unpack_n(packed), samples)
+
+    def test_in_tuple(self):
+        tup = Tuple((MultiBinary(3), MultiBinary(2)))
+        samples = [tup.sample() for _ in range(4)]
+        flat = tup.flatten_n(samples)
+        assert flat.shape == (4, 5)
+        assert np.array_equal(tup.flatten_batch(tup.stack_n(samples)), flat)
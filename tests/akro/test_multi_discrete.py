@@ -0,0 +1,58 @@
+import collections
+import pickle
+import unittest
+
+import numpy as np
+import pytest
+
+from akro import Box
+from akro import Dict
+from akro import MultiDiscrete
+
+
+class TestMultiDiscrete(unittest.TestCase):
+
+    def test_pickleable(self):
+        obj = MultiDiscrete([3, 2, 4])
+        round_trip = pickle.loads(pickle.dumps(obj))
+        assert round_trip == obj
+        assert hash(round_trip) == hash(obj)
+
+    def test_sample(self):
+        obj = MultiDiscrete([3, 2, 4])
+        obj.set_rng(0)
+        samples = obj.sample_n(100)
+        assert samples.shape == (100, 3)
+        assert all(obj.contains(x) for x in samples)
+        assert obj.contains(obj.sample())
+
+    def test_flatten(self):
+        obj = MultiDiscrete([3, 2, 4])
+        assert obj.flat_dim == 9
+        flat = obj.flatten([1, 0, 3])
+        assert np.array_equal(flat, [0, 1, 0, 1, 0, 0, 0, 0, 1])
+        assert np.array_equal(obj.unflatten(flat), [1, 0, 3])
+
+    def test_flatten_n(self):
+        obj = MultiDiscrete([3, 2, 4])
+        xs = np.array([[1, 0, 3], [2, 1, 0]])
+        flat = obj.flatten_n(xs)
+        assert flat.shape == (2, 9)
+        assert np.array_equal(flat[1], [0, 0, 1, 0, 1, 1, 0, 0, 0])
+        assert np.array_equal(obj.unflatten_n(flat), xs)
+        with pytest.raises(IndexError):
+            obj.flatten_n([[3, 0, 0]])
+
+    def test_in_dict(self):
+        d = Dict(
+            collections.OrderedDict([('buttons', MultiDiscrete([2, 3])),
+                                     ('position', Box(0, 1, (2, )))]))
+        samples = [d.sample() for _ in range(4)]
+        flat = d.flatten_n(samples)
+        assert flat.shape == (4, 7)
+        for sample, unflat in zip(samples, d.unflatten_n(flat)):
+            assert np.array_equal(sample['buttons'], unflat['buttons'])
+
+    def test_concat(self):
+        concat = MultiDiscrete([3, 2]).concat(MultiDiscrete([4]))
+        assert np.array_equal(concat.nvec, [3, 2, 4])
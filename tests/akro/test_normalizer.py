@@ -0,0 +1,75 @@
+import collections
+import pickle
+import unittest
+
+import numpy as np
+
+from akro import Box
+from akro import Dict
+from akro import Discrete
+from akro import RunningNormalizer
+
+
+class TestRunningNormalizer(unittest.TestCase):
+
+    def setUp(self):
+        self.space = Dict(
+            collections.OrderedDict([('position', Box(-10., 10., (3, ))),
+                                     ('goal', Discrete(3))]))
+        rng = np.random.default_rng(0)
+        self.positions = rng.normal(2., 3., size=(1000, 3))
+
+    def batch(self, positions):
+        return collections.OrderedDict([
+            ('position', positions.astype(np.float32)),
+            ('goal', np.arange(len(positions)) % 3),
+        ])
+
+    def test_update(self):
+        normalizer = RunningNormalizer(self.space)
+        for chunk in np.split(self.positions, 10):
+            normalizer.update(self.batch(chunk))
+        positions = self.positions.astype(np.float32)
+        assert normalizer.count == 1000
+        assert np.allclose(normalizer.mean(('position', )),
+                           positions.mean(axis=0))
+        assert np.allclose(normalizer.std(('position', )),
+                           positions.std(axis=0))
+
+    def test_merge(self):
+        whole = RunningNormalizer(self.space)
+        whole.update(self.batch(self.positions))
+        first = RunningNormalizer(self.space)
+        first.update(self.batch(self.positions[:300]))
+        second = RunningNormalizer(self.space)
+        second.update(self.batch(self.positions[300:]))
+        first.merge(pickle.loads(pickle.dumps(second)))
+        assert first.count == whole.count
+        assert np.allclose(first.mean(('position', )),
+                           whole.mean(('position', )))
+        assert np.allclose(first.std(('position', )),
+                           whole.std(('position', )))
+        with self.assertRaises(ValueError):
+            first.merge(RunningNormalizer(Box(0., 1., (3, ))))
+
+    def test_normalize(self):
+        normalizer = RunningNormalizer(self.space, clip=5.)
+        batch = self.batch(self.positions)
+        normalizer.update(batch)
+        out = self.space.stack_n([self.space.sample()] * 1000)
+        normalized = normalizer.normalize(batch, out=out)
+        assert normalized['position'] is out['position']
+        assert normalized['goal'] is batch['goal']
+        assert np.allclose(normalized['position'].mean(axis=0), 0.,
+                           atol=1e-5)
+        assert np.allclose(normalized['position'].std(axis=0), 1., atol=1e-3)
+        restored = normalizer.denormalize(normalized)
+        assert np.allclose(restored['position'], batch['position'],
+                           atol=1e-4)
+
+    def test_normalize_before_update(self):
+        normalizer = RunningNormalizer(Box(0, 255, (2, ), dtype=np.uint8))
+        batch = np.array([[0, 255]], dtype=np.uint8)
+        normalized = normalizer.normalize(batch)
+        assert normalized.dtype == np.float32
+        assert np.allclose(normalized, batch)
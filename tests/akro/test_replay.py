@@ -0,0 +1,114 @@
+import collections
+import unittest
+
+import numpy as np
+
+from akro import Box
+from akro import Dict
+from akro import Discrete
+from akro import ReplayBuffer
+from akro import Tuple
+
+
+class TestReplayBuffer(unittest.TestCase):
+
+    def setUp(self):
+        self.obs_space = Dict(
+            collections.OrderedDict([('position', Box(-1., 1., (2, ))),
+                                     ('goal', Discrete(3))]))
+        self.action_space = Discrete(4)
+
+    def batch(self, n, start=0):
+        steps = np.arange(start, start + n)
+        obs = collections.OrderedDict([
+            ('position', np.stack([steps, -steps], axis=1).astype(np.float32)),
+            ('goal', steps % 3),
+        ])
+        return dict(observations=obs,
+                    actions=steps % 4,
+                    rewards=steps.astype(np.float32),
+                    next_observations=obs,
+                    terminals=steps % 2 == 0)
+
+    def test_nbytes(self):
+        buf = ReplayBuffer(self.obs_space, self.action_space, 10)
+        # Two observations (2 float32 + 1 int64), an int64 action, a
+        # float32 reward and a bool terminal per transition.
+        assert buf.nbytes == 10 * (2 * (8 + 8) + 8 + 4 + 1)
+
+    def test_capacity_for(self):
+        nbytes = ReplayBuffer(self.obs_space, self.action_space, 10).nbytes
+        assert ReplayBuffer.capacity_for(self.obs_space, self.action_space,
+                                         nbytes) == 10
+        assert ReplayBuffer.capacity_for(self.obs_space, self.action_space,
+                                         nbytes - 1) == 9
+
+    def test_add_n(self):
+        buf = ReplayBuffer(self.obs_space, self.action_space, 10)
+        buf.add_n(**self.batch(4))
+        assert len(buf) == 4
+        buf.add_n(**self.batch(4, start=4))
+        assert len(buf) == 8
+
+    def test_sample_rng(self):
+        rewards = []
+        for _ in range(2):
+            buf = ReplayBuffer(self.obs_space, self.action_space, 10, rng=3)
+            buf.add_n(**self.batch(10))
+            rewards.append(buf.sample(20)['rewards'])
+        assert np.array_equal(rewards[0], rewards[1])
+
+    def test_wraps_around(self):
+        buf = ReplayBuffer(self.obs_space, self.action_space, 5)
+        buf.add_n(**self.batch(4))
+        buf.add_n(**self.batch(3, start=4))
+        assert len(buf) == 5
+        rewards = buf.sample(100)['rewards']
+        assert set(rewards) == {2., 3., 4., 5., 6.}
+
+    def test_batch_larger_than_capacity(self):
+        buf = ReplayBuffer(self.obs_space, self.action_space, 3)
+        buf.add_n(**self.batch(7))
+        assert len(buf) == 3
+        assert set(buf.sample(100)['rewards']) == {4., 5., 6.}
+
+    def test_sample_flat(self):
+        buf = ReplayBuffer(self.obs_space, self.action_space, 10)
+        buf.add_n(**self.batch(6))
+        batch = buf.sample(8)
+        assert batch['observations'].shape == (8, self.obs_space.flat_dim)
+        assert batch['actions'].shape == (8, 4)
+        for obs, action, reward in zip(batch['observations'],
+                                       batch['actions'], batch['rewards']):
+            step = int(reward)
+            assert np.array_equal(obs[:2], [step, -step])
+            assert np.argmax(obs[2:]) == step % 3
+            assert np.argmax(action) == step % 4
+
+    def test_sample_unflat(self):
+        buf = ReplayBuffer(self.obs_space, self.action_space, 10)
+        buf.add_n(**self.batch(6))
+        batch = buf.sample(5, flat=False)
+        assert len(batch['observations']) == 5
+        for obs, action, reward in zip(batch['observations'],
+                                       batch['actions'], batch['rewards']):
+            assert obs['goal'] == int(reward) % 3
+            assert action == int(reward) % 4
+
+    def test_tuple_space(self):
+        space = Tuple((Box(0., 1., (2, 2)), Discrete(2)))
+        buf = ReplayBuffer(space, Box(-1., 1., (1, )), 4)
+        obs = (np.zeros((2, 2, 2), dtype=np.float32), np.array([0, 1]))
+        buf.add_n(obs, np.zeros((2, 1)), [0., 1.], obs, [False, True])
+        batch = buf.sample(3)
+        assert batch['observations'].shape == (3, 6)
+        assert batch['actions'].shape == (3, 1)
+
+    def test_sample_empty(self):
+        buf = ReplayBuffer(self.obs_space, self.action_space, 10)
+        with self.assertRaises(ValueError):
+            buf.sample(1)
+
+    def test_invalid_capacity(self):
+        with self.assertRaises(ValueError):
+            ReplayBuffer(self.obs_space, self.action_space, 0)
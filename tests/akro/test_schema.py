@@ -0,0 +1,143 @@
+import collections
+import json
+import unittest
+
+import numpy as np
+
+from akro import Box
+from akro import Dict
+from akro import Discrete
+from akro import Image
+from akro import MultiBinary
+from akro import MultiDiscrete
+from akro import schema
+from akro import Tuple
+
+
+class TestSchema(unittest.TestCase):
+
+    def setUp(self):
+        self.space = Dict(
+            collections.OrderedDict([
+                ('image', Image((4, 4, 3))),
+                ('pos', Box(np.array([-1., -2.]), np.array([1., 2.]))),
+                ('extra',
+                 Tuple((Discrete(3), Box(0, 1, (2, ), dtype=np.float64)))),
+            ]))
+
+    def test_round_trip(self):
+        s = schema.to_schema(self.space)
+        round_trip = schema.from_schema(json.loads(json.dumps(s)))
+        assert isinstance(round_trip, Dict)
+        assert list(round_trip.spaces.keys()) == ['image', 'pos', 'extra']
+        assert isinstance(round_trip.spaces['image'], Image)
+        pos = round_trip.spaces['pos']
+        assert np.array_equal(pos.low, [-1., -2.])
+        assert pos.dtype == np.float32
+        extra = round_trip.spaces['extra']
+        assert extra.spaces[0].n == 3
+        assert extra.spaces[1].dtype == np.float64
+        assert schema.to_schema(round_trip) == s
+
+    def test_collapsed_bounds(self):
+        s = schema.to_schema(Box(0., 1., (100, 100)))
+        assert s['low'] == 0.
+        assert s['high'] == 1.
+
+    def test_unsupported(self):
+        with self.assertRaises(TypeError):
+            schema.to_schema(object())
+        with self.assertRaises(TypeError):
+            schema.from_schema({'type': 'Foo'})
+
+    def test_leaves(self):
+        paths = [path for path, _ in schema.leaves(self.space)]
+        assert paths == [('image', ), ('pos', ), ('extra', 0), ('extra', 1)]
+        assert [p for p, _ in schema.leaves(Discrete(2))] == [()]
+
+    def test_leaf_shape_dtype(self):
+        assert schema.leaf_shape(Discrete(3)) == ()
+        assert schema.leaf_dtype(Discrete(3)) == np.int64
+        assert schema.leaf_shape(Image((2, 2))) == (2, 2)
+        assert schema.leaf_dtype(Image((2, 2))) == np.uint8
+
+    def test_leaf_values_round_trip(self):
+        sample = self.space.sample()
+        values = schema.leaf_values(self.space, sample)
+        assert len(values) == 4
+        rebuilt = schema.from_leaf_values(self.space, values)
+        assert list(rebuilt.keys()) == ['image', 'pos', 'extra']
+        assert rebuilt['extra'][0] == sample['extra'][0]
+        assert np.array_equal(rebuilt['image'], sample['image'])
+
+    def test_record_dtype(self):
+        dtype = schema.record_dtype(self.space)
+        assert dtype.names == ('image', 'pos', 'extra')
+        assert dtype['image'] == np.dtype((np.uint8, (4, 4, 3)))
+        assert dtype['extra'].names == ('f0', 'f1')
+        assert dtype['extra']['f0'] == np.int64
+
+    def test_records_round_trip(self):
+        samples = [self.space.sample() for _ in range(5)]
+        batch = schema.from_leaf_values(self.space, [
+            np.array(values)
+            for values in zip(*[schema.leaf_values(self.space, s)
+                                for s in samples])
+        ])
+        records = self.space.to_records(batch)
+        assert records.shape == (5, )
+        assert records.dtype == self.space.record_dtype
+        unpacked = self.space.from_records(records)
+        assert np.shares_memory(unpacked['pos'], records)
+        assert np.array_equal(unpacked['image'], batch['image'])
+        assert np.array_equal(unpacked['extra'][0], batch['extra'][0])
+        assert np.array_equal(self.space.flatten_n(records),
+                              self.space.flatten_n(samples))
+
+    def test_flatten_records_view(self):
+        space = Dict(
+            collections.OrderedDict([('a', Box(0, 1, (2, 2))),
+                                     ('b', Box(0, 1, (3, )))]))
+        records = space.to_records(
+            collections.OrderedDict([('a', np.ones((4, 2, 2))),
+                                     ('b', np.zeros((4, 3)))]))
+        flat = space.flatten_n(records)
+        assert flat.shape == (4, 7)
+        assert np.shares_memory(flat, records)
+        assert np.array_equal(flat[:, :4], np.ones((4, 4)))
+
+    def test_stack_n(self):
+        samples = [self.space.sample() for _ in range(3)]
+        batch = self.space.stack_n(samples)
+        assert schema.is_batch(self.space, batch)
+        assert not schema.is_batch(self.space, samples)
+        assert batch['image'].shape == (3, 4, 4, 3)
+        assert batch['extra'][0].dtype == np.int64
+        assert np.array_equal(self.space.flatten_batch(batch),
+                              self.space.flatten_n(samples))
+        for sample, unstacked in zip(samples,
+                                     self.space.unstack_n(batch)):
+            assert np.array_equal(unstacked['pos'], sample['pos'])
+            assert unstacked['extra'][0] == sample['extra'][0]
+
+    def test_nbytes(self):
+        # uint8 image, float32 pos, int64 Discrete index, float64 Box.
+        assert self.space.nbytes() == 48 + 8 + 8 + 16
+        # The flat vector mixes float32 and float64, so it is float64.
+        assert self.space.flat_dtype == np.float64
+        assert self.space.nbytes('flat') == 8 * self.space.flat_dim
+        leaves = self.space.leaf_nbytes('compact')
+        assert list(leaves.keys()) == [('image', ), ('pos', ),
+                                       ('extra', 0), ('extra', 1)]
+        assert list(leaves.values()) == [48, 2, 1, 2]
+        assert self.space.capacity(800) == 10
+        with self.assertRaises(ValueError):
+            self.space.nbytes('packed')
+
+    def test_multi_round_trip(self):
+        space = Tuple((MultiDiscrete([3, 2]), MultiBinary(10)))
+        s = schema.to_schema(space)
+        round_trip = schema.from_schema(json.loads(json.dumps(s)))
+        assert round_trip.spaces[0] == space.spaces[0]
+        assert round_trip.spaces[1] == space.spaces[1]
+        assert space.nbytes('compact') == 2 + 2
@@ -19,10 +19,23 @@ class TestTuple(unittest.TestCase):
         assert round_trip
         assert round_trip.spaces == tup.spaces
 
+    def test_set_rng(self):
+        tup = Tuple((Discrete(1000), Discrete(1000)))
+        tup.set_rng(9)
+        first = [tup.sample() for _ in range(3)]
+        tup.set_rng(9)
+        assert [tup.sample() for _ in range(3)] == first
+        # Subspaces draw from independent streams.
+        assert [x[0] for x in first] != [x[1] for x in first]
+
     def test_flat_dim(self):
         tup = Tuple((Discrete(3), Discrete(2)))
         assert tup.flat_dim == 5
 
+    def test_flat_offsets(self):
+        tup = Tuple((Discrete(3), Box(0, 1, (2, 2))))
+        assert np.array_equal(tup.flat_offsets, [0, 3, 7])
+
     def test_flatten(self):
         tup = Tuple((Discrete(3), Discrete(2)))
         x = [2, 0]
@@ -44,6 +57,24 @@ class TestTuple(unittest.TestCase):
         base = np.asarray([[1., 0., 1., 0., 0.]])
         assert np.array_equal(flat_ret, base)
 
+    def test_flatten_n_out(self):
+        tup = Tuple((Discrete(3), Box(0, 1, (2, ), dtype=np.float32)))
+        batch = (np.array([0, 2]), np.array([[0.5, 0.5], [0.25, 1.]]))
+        out = tup.empty_flat(2, dtype=np.float32)
+        assert tup.flatten_batch(batch, out=out) is out
+        assert np.array_equal(out, tup.flatten_batch(batch))
+        out = tup.empty_flat(2)
+        assert tup.flatten_n(tup.to_records(batch), out=out) is out
+        assert np.array_equal(out, tup.flatten_batch(batch))
+
+    def test_flatten_n_tuple_of_samples(self):
+        tup = Tuple((Discrete(3), Discrete(2)))
+        samples = (np.array([2, 0]), np.array([1, 1]))
+        assert np.array_equal(tup.flatten_n(samples),
+                              tup.flatten_n(list(samples)))
+        assert np.array_equal(tup.flatten_n(samples),
+                              [[0., 0., 1., 1., 0.], [0., 1., 0., 0., 1.]])
+
     def test_unflatten_n(self):
         disc = Discrete(3)
         tup = Tuple((Discrete(2), disc))
@@ -51,6 +82,26 @@ class TestTuple(unittest.TestCase):
         ret = tup.unflatten_n(obs)
         assert ret == [(0, 0)]
 
+    def test_records(self):
+        tup = Tuple((Discrete(3), Box(0, 1, (2, ), dtype=np.float64)))
+        batch = (np.array([0, 2]), np.array([[0.5, 0.5], [0.25, 1.]]))
+        records = tup.to_records(batch)
+        assert records.dtype.names == ('f0', 'f1')
+        unpacked = tup.from_records(records)
+        assert np.array_equal(unpacked[0], batch[0])
+        assert np.array_equal(unpacked[1], batch[1])
+        assert np.array_equal(tup.flatten_n(records),
+                              [[1., 0., 0., 0.5, 0.5], [0., 0., 1., 0.25, 1.]])
+
+    def test_stack_n(self):
+        tup = Tuple((Discrete(2), Discrete(3)))
+        samples = [(0, 2), (1, 0)]
+        batch = tup.stack_n(samples)
+        assert isinstance(batch, tuple)
+        assert np.array_equal(batch[0], [0, 1])
+        assert np.array_equal(tup.flatten_batch(batch), tup.flatten_n(samples))
+        assert [tuple(x) for x in tup.unstack_n(batch)] == samples
+
     def test_concat(self):
         tup1 = Tuple((Box(0, 1, (5, )), Box(0, 1, (10, ))))
         tup2 = Tuple((Box(0, 1, (5, )), Box(0, 1, (10, ))))
@@ -73,6 +124,14 @@ class TestTuple(unittest.TestCase):
         assert [c.get_shape().as_list() for c in tensor_tup] == [[None, 3, 4],
                                                                  [None, 2]]
 
+    @requires_tf
+    def test_convert_tf_identical(self):
+        tup = Tuple((Discrete(2), Discrete(2)))
+        with tf.Graph().as_default():
+            first, second = tup.to_tf_placeholder('obs', 1)
+            assert first is not second
+            assert [first.op.name, second.op.name] == ['obs-0', 'obs-1']
+
     @requires_theano
     def test_convert_theano(self):
         tup = Tuple((Box(0.0, 1.0, (3, 4)), Discrete(2)))